@@ -0,0 +1,349 @@
+"""Benchmarks for the smart_tex search and colorization paths.
+
+Runs the searches the tutorials actually make (trig template, quadratic
+sandbox scenes, slope-intercept templates) and reports, per operation and
+case, wall time, LaTeX compile count and peak Python memory, once on cold
+caches and once warm.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_smart_tex
+    python -m benchmarks.bench_smart_tex --case quadratic --json results.json
+    python -m benchmarks.bench_smart_tex --compare-outline
+
+Cold runs get an empty manim tex cache, an empty shape cache and empty
+in-memory caches; warm runs repeat the operation right after, with all of
+them filled. The haystack expressions are built before timing starts, like
+in a scene. Times are taken with tracemalloc running, so they are comparable
+between runs of this script rather than absolute.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from math import radians
+from pathlib import Path
+
+from manim import *
+from manim.utils import tex_file_writing
+
+from src.components.common import smart_tex
+from src.components.common.base_scene import MathTutorialScene
+from src.components.common.smart_tex import (
+    ExpressionShapeIndex,
+    SmartColorizeStatic,
+    clear_shape_caches,
+    group_shapes_in_text,
+    search_shape_in_text,
+)
+
+
+def _trig_cases() -> dict:
+    """Steps of the trig template for the triangles configured in its scene."""
+    # trig_variants imports its sibling utils as a top-level module: that name
+    # points at the template's own utils while it is imported, so no other
+    # utils module on sys.path can be picked up instead
+    package = "src.templates.trignometry"
+    previous_utils = sys.modules.get("utils")
+    sys.modules["utils"] = importlib.import_module(f"{package}.utils")
+    try:
+        trig_variants = importlib.import_module(f"{package}.trig_variants")
+    finally:
+        if previous_utils is None:
+            del sys.modules["utils"]
+        else:
+            sys.modules["utils"] = previous_utils
+
+    color_map = {"hyp": GREEN, "opp": RED, "adj": TEAL}
+    patterns = ["=", r"\times", r"\circ"]
+    return {
+        # Default configuration of src/templates/trignometry/scene.py
+        "trig/sin_h_beta": {
+            "expressions": trig_variants.generate_sin_variants(
+                17.6, "a", "adj", r"13^\circ", round(radians(13), 5), prec=2
+            ),
+            "patterns": patterns,
+            "color_map": color_map,
+            "queries": [("=", {}), (r"\times", {})],
+        },
+        # Alternative configuration kept in the same scene file
+        "trig/cos_c_beta": {
+            "expressions": trig_variants.generate_cos_variants(
+                37.8, "c", "hyp", r"47^\circ 12'", round(radians(47.2), 5), unit="cm", prec=2
+            ),
+            "patterns": patterns,
+            "color_map": color_map,
+            "queries": [("=", {}), ("37.8", {})],
+        },
+    }
+
+
+def _quadratic_cases() -> dict:
+    """Expressions and lookups of the quadratic formula sandbox scenes."""
+    return {
+        # src/sandbox/quadratics/quadratic_formula/quadratic_formula_14a.py
+        "quadratic/formula_14a": {
+            "expressions": [
+                "x^2 - 6x + 8 = 0",
+                r"x = \frac{-(-6) \pm \sqrt{(-6)^2 - 4(1)(8)}}{2(1)}",
+                r"x = \frac{6 \pm \sqrt{36 - 32}}{2}",
+                r"x = \frac{6 + 2}{2} = 4 \ \text{or} \ x = \frac{6 - 2}{2} = 2",
+            ],
+            "patterns": ["=", r"\pm", "-6", "8"],
+            "color_map": {"-6": ORANGE, "8": PURPLE, "1": BLUE},
+            "queries": [
+                ("-6", {}),
+                ("8", {}),
+                ("-6", {"nth": 0, "context": "-(-6)"}),
+                ("-6", {"nth": 1, "context": "-6"}),
+                ("1", {"context": "4(1)"}),
+                ("8", {"context": ")(8)2"}),
+                ("1", {"context": "2(1)"}),
+            ],
+        },
+        # src/sandbox/quadratics/quadratic_formula_04/quad_formula_05a.py
+        "quadratic/formula_05a": {
+            "expressions": [
+                "4(x+5)^2=48",
+                "(x+5)^2=12",
+                "x^2 + 10x + 25 = 12",
+                "x^2 + 10x + 13 = 0",
+                r"x = \frac{-(10) \pm \sqrt{(10)^2 - 4(1)(13)}}{2(1)}",
+            ],
+            "patterns": ["=", "4", "12", "25", "10"],
+            "color_map": {"1": BLUE, "10": ORANGE, "13": PURPLE},
+            "queries": [("4", {}), ("48", {}), ("25", {}), ("12", {}), ("10", {}), ("13", {})],
+        },
+    }
+
+
+def _slope_cases() -> dict:
+    """Expressions and color maps of the slope-intercept templates."""
+    graph = importlib.import_module(
+        "src.templates.linear_equations.graphing_slope_intercept_form.t_graph_slope_intercept_form"
+    )
+    find = importlib.import_module(
+        "src.templates.linear_equations.finding_slope_intercept_form.t_find_slope_intercept"
+    )
+    return {
+        "slope/graph_template": {
+            "expressions": [
+                graph.EQUATION_FORMATTED,
+                f"\\text{{Slope }} = {graph.SLOPE_DISPLAY} = \\frac{{\\text{{rise}}}}{{\\text{{run}}}}",
+                f"\\text{{Connect points }} ({graph.Y_INTERCEPT_POINT[0]}, {graph.Y_INTERCEPT_POINT[1]})"
+                f" \\text{{ and }} ({graph.SECOND_POINT[0]}, {graph.SECOND_POINT[1]})",
+            ],
+            "patterns": ["=", "m", "b"],
+            "color_map": {
+                r"\text{rise}": graph.RISE_COLOR,
+                r"\text{run}": graph.RUN_COLOR,
+                graph.SLOPE_DISPLAY: graph.SLOPE_COLOR,
+            },
+            "queries": [(graph.Y_INTERCEPT_DISPLAY, {}), ("x", {})],
+        },
+        "slope/find_template": {
+            "expressions": [
+                find.FINAL_EQUATION,
+                r"\text{Slope } = \frac{\text{rise}}{\text{run}}",
+                f"\\text{{Slope }} = \\frac{{{find.RISE_VALUE}}}{{{find.RUN_VALUE}}} = {find.SLOPE_DISPLAY}",
+                "y = mx + b",
+            ],
+            "patterns": ["=", "y", "x", "+"],
+            "color_map": {
+                find.SLOPE_DISPLAY: find.SLOPE_COLOR,
+                find.Y_INTERCEPT_DISPLAY: find.Y_INTERCEPT_COLOR,
+            },
+            "queries": [(find.Y_INTERCEPT_DISPLAY, {}), ("y", {}), ("=", {})],
+        },
+    }
+
+
+def collect_cases() -> dict:
+    cases = {}
+    for collect in (_trig_cases, _quadratic_cases, _slope_cases):
+        cases.update(collect())
+    return cases
+
+
+def _clear_memory_caches():
+    """Glyph IDs, shape indexes and the element finder's queries, pattern library."""
+    clear_shape_caches()
+
+
+@contextmanager
+def cold_caches():
+    """Empty tex and shape caches on disk and in memory for the duration of the block."""
+    saved_tex_dir = config.tex_dir
+    saved_env = os.environ.get(smart_tex.SHAPE_CACHE_ENV)
+    with tempfile.TemporaryDirectory(prefix="nammi_bench_") as tmp:
+        config.tex_dir = str(Path(tmp) / "Tex")
+        os.environ[smart_tex.SHAPE_CACHE_ENV] = str(Path(tmp) / "shapes")
+        _clear_memory_caches()
+        try:
+            yield
+        finally:
+            config.tex_dir = saved_tex_dir
+            if saved_env is None:
+                os.environ.pop(smart_tex.SHAPE_CACHE_ENV, None)
+            else:
+                os.environ[smart_tex.SHAPE_CACHE_ENV] = saved_env
+            _clear_memory_caches()
+
+
+class CompileCounter:
+    """Counts LaTeX runs by wrapping ``tex_file_writing.compile_tex``."""
+
+    def __init__(self):
+        self.count = 0
+        self._original = None
+
+    def __enter__(self):
+        self._original = tex_file_writing.compile_tex
+
+        def counting_compile_tex(*args, **kwargs):
+            self.count += 1
+            return self._original(*args, **kwargs)
+
+        tex_file_writing.compile_tex = counting_compile_tex
+        return self
+
+    def __exit__(self, *exc):
+        tex_file_writing.compile_tex = self._original
+
+
+def measure(operation) -> dict:
+    """Runs operation once; returns its wall time, LaTeX compiles and peak memory."""
+    tracemalloc.start()
+    with CompileCounter() as compiles:
+        start = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "compiles": compiles.count, "peak_kib": peak / 1024}
+
+
+def operations(case: dict, scene: MathTutorialScene, expressions: list) -> dict:
+    """The benchmarked operations of one case, as callables over built expressions."""
+
+    def run_search_shape():
+        for exp in expressions:
+            for pattern in case["patterns"]:
+                search_shape_in_text(exp, MathTex(pattern))
+
+    def run_group_shapes():
+        for exp in expressions:
+            group_shapes_in_text(exp, case["patterns"])
+
+    def run_colorize():
+        for exp in expressions:
+            SmartColorizeStatic(exp, case["color_map"])
+
+    def run_find_element():
+        for exp in expressions:
+            for pattern, kwargs in case["queries"]:
+                scene.find_element(pattern, exp, **kwargs)
+
+    return {
+        "search_shape_in_text": run_search_shape,
+        "group_shapes_in_text": run_group_shapes,
+        "SmartColorizeStatic": run_colorize,
+        "find_element": run_find_element,
+    }
+
+
+def run_case(name: str, case: dict, scene: MathTutorialScene) -> list:
+    rows = []
+    for operation_name in operations(case, scene, []):
+        with cold_caches():
+            expressions = [MathTex(tex) for tex in case["expressions"]]
+            operation = operations(case, scene, expressions)[operation_name]
+            cold = measure(operation)
+            warm = measure(operation)
+        rows.append({"case": name, "operation": operation_name, "cold": cold, "warm": warm})
+    return rows
+
+
+def compare_outline(name: str, case: dict) -> list:
+    """Slices found by exact and outline matching, per expression and color map key.
+
+    Every disagreement is either a size variant that only outline matching
+    finds or an outline false positive, and is worth looking at.
+    """
+    rows = []
+    for tex in case["expressions"]:
+        exp = MathTex(tex)
+        shape_index = ExpressionShapeIndex.of(exp)
+        for key in case["color_map"]:
+            exact = set(
+                (s.start, s.stop)
+                for s in shape_index.find_many({key: smart_tex._match_variants(key)})[key]
+            )
+            outline = set(
+                (s.start, s.stop)
+                for s in shape_index.find_many(
+                    {key: smart_tex._match_variants(key, match="outline")}, match="outline"
+                )[key]
+            )
+            rows.append({
+                "case": name,
+                "expression": tex,
+                "key": key,
+                "exact": len(exact),
+                "outline": len(outline),
+                "only_exact": sorted(exact - outline),
+                "only_outline": sorted(outline - exact),
+            })
+    return rows
+
+
+def print_report(rows: list) -> None:
+    header = f"{'case':<24} {'operation':<22} {'cold s':>8} {'LaTeX':>6} {'KiB':>9} {'warm s':>8} {'LaTeX':>6} {'KiB':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        cold, warm = row["cold"], row["warm"]
+        print(
+            f"{row['case']:<24} {row['operation']:<22} "
+            f"{cold['seconds']:>8.3f} {cold['compiles']:>6} {cold['peak_kib']:>9.0f} "
+            f"{warm['seconds']:>8.3f} {warm['compiles']:>6} {warm['peak_kib']:>9.0f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--case", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument(
+        "--compare-outline",
+        action="store_true",
+        help="Report where exact and outline matching disagree instead of timing",
+    )
+    args = parser.parse_args(argv)
+
+    cases = {name: case for name, case in collect_cases().items() if args.case in name}
+    if args.compare_outline:
+        rows = [row for name, case in cases.items() for row in compare_outline(name, case)]
+        disagreements = [row for row in rows if row["only_exact"] or row["only_outline"]]
+        for row in disagreements:
+            print(
+                f"{row['case']:<24} {row['key']!r:<16} exact={row['exact']} outline={row['outline']}"
+                f" only_exact={row['only_exact']} only_outline={row['only_outline']}  {row['expression']}"
+            )
+        print(f"{len(disagreements)} of {len(rows)} (expression, key) pairs disagree")
+    else:
+        scene = MathTutorialScene()
+        rows = [row for name, case in cases.items() for row in run_case(name, case, scene)]
+        print_report(rows)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
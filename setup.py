@@ -5,7 +5,7 @@ setup(
     version="0.1",
     packages=find_packages(),
     install_requires=[
-        "manim>=0.18.0",
+        "manim>=0.18.0,<0.22",
         "manim-voiceover>=0.3.0",
         "numpy>=1.22.0",
         "pillow>=9.0.0",
@@ -10,9 +10,13 @@ For other components, use explicit imports.
 # Import everything we want to expose
 from .base_scene import MathTutorialScene
 from .smart_tex import *  # Import all smart_tex utilities
-from .scroll_manager import ScrollManager
+from .scroll_manager import ScrollManager, LazyEquations
 from .quick_tip import QuickTip
 from .annotation import Annotation
+from .source_map import SourceMappedMathTex
+from .expression_query import ExpressionQuery
+from .speech import CachedSpeechService, LocalSpeechService
+from .dry_run import DryRun
 
 # Define what gets exported with 'from src.components.common import *'
 __all__ = [
@@ -21,9 +25,20 @@ __all__ = [
     'SmartColorizeStatic', 
     'search_shape_in_text',
     'search_shapes_in_text',  # Add other smart_tex utilities
+    'ExpressionShapeIndex',
+    'PatternLibrary',
+    'pattern_library',
+    'outline_distances',
+    'clear_shape_caches',
+    'SourceMappedMathTex',
+    'ExpressionQuery',
+    'CachedSpeechService',
+    'LocalSpeechService',
+    'DryRun',
     'group_shapes_in_text',
     'all_sizes_symbol',
     'ScrollManager',
+    'LazyEquations',
     'QuickTip',
     'Annotation'
 ]
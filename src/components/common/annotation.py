@@ -53,6 +53,33 @@ class Annotation:
         self.h_spacing = h_spacing
 
     def __call__(self, scene, exp=None, exp_annotation_buff=0.2):
+        left_term, right_term = self.resolve(scene, exp)
+        return self.layout(scene, left_term, right_term, exp_annotation_buff=exp_annotation_buff)
+
+    def target_patterns(self):
+        """Patterns find_element may search in exp to resolve this annotation's targets.
+
+        Lets a caller resolving many annotations search them all at once (see
+        ``MathTutorialScene.resolve_annotations``).
+        """
+        patterns = []
+        for term in (self.left_term, self.right_term):
+            if type(term) is functools.partial:
+                pattern, context = term.keywords.get("pattern"), term.keywords.get("context")
+            elif type(term) is str:
+                pattern, context = term, None
+            else:
+                continue
+            patterns.append(pattern)
+            if context:
+                patterns.append(context)
+            # Negative numbers fall back to "-" next to the number
+            if pattern.startswith("-") and len(pattern) > 1:
+                patterns += ["-", pattern[1:]]
+        return patterns
+
+    def resolve(self, scene, exp=None):
+        """Evaluates the left and right targets in exp; returns (left_term, right_term)."""
         left_term = self.left_term
         # if it is find_element_lazy, evaluate it first
         if type(self.left_term) is functools.partial:
@@ -71,6 +98,10 @@ class Annotation:
             assert exp is not None
             right_term = scene.find_element(pattern=self.right_term, exp=exp)
 
+        return left_term, right_term
+
+    def layout(self, scene, left_term, right_term, exp_annotation_buff=0.2):
+        """Places the annotation terms under already resolved targets."""
         if left_term is None:
             print("Cannot find left term target")
             return None
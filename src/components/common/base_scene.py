@@ -2,14 +2,26 @@
 
 from manim import *
 from fractions import Fraction
+import contextlib
+import hashlib
+import io
 from manim_voiceover import VoiceoverScene
 from manim_voiceover.services.azure import AzureService
 
 from .annotation import Annotation
 from .smart_tex import *
+from .smart_tex import _match_variants
+from .tex_batch import TEX_ERRORS, compile_tex_batch, prerender_tex, record_tex
+from .speech import CachedSpeechService, LocalSpeechService, speech_backend
+from .dry_run import DryRun, dry_run_requested, print_dry_run_report, save_dry_run_report
+from .parallel_render import parallel_render_requested, render_segment
+from .section_cache import hash_mobject, install_section_cache, uninstall_section_cache
+from .source_map import SourceMappedMathTex
+from .expression_query import ExpressionQuery
 from .custom_axes import CustomAxes
 
 from functools import partial, partialmethod
+from pathlib import Path
 
 
 MATH_SCALE = 0.60
@@ -32,6 +44,37 @@ COMPREHENSION_PAUSE = 2.0
 BACKGROUND_COLOR = ManimColor("#121212")
 
 
+def _is_expression(elem) -> bool:
+    """Whether a step element is a math expression (Tex is a MathTex subclass)."""
+    return isinstance(elem, MathTex) and not isinstance(elem, Tex)
+
+
+class _RehearsalTracker:
+    """Stand-in for a voiceover tracker while construct is rehearsed."""
+
+    duration = 1.0
+
+    def get_remaining_duration(self, buff=0.0):
+        return 0.0
+
+    def time_until_bookmark(self, mark, buff=0, limit=None):
+        return 0.0
+
+
+# Arguments of self.voiceover consumed by the scene, not the speech service
+_SUBCAPTION_ARGS = ("subcaption", "max_subcaption_len", "subcaption_buff")
+
+# Scene methods that render, play or synthesize, replaced by no-ops while rehearsing
+_REHEARSAL_NO_OPS = (
+    "play", "wait", "add_sound", "next_section",
+    "add_voiceover_text", "wait_for_voiceover", "safe_wait", "wait_until_bookmark",
+)
+
+# What a rehearsal on placeholder glyphs is expected to stop on: TeX errors,
+# indexing past the single glyph, or a search finding nothing (None)
+_REHEARSAL_ERRORS = TEX_ERRORS + (AttributeError, TypeError)
+
+
 class Step(VGroup):
     """
     A class to wrap the step fetching operations.
@@ -61,26 +104,224 @@ class Step(VGroup):
 class MathTutorialScene(VoiceoverScene):
     """Base scene class that handles Azure voiceover setup."""
 
+    # Render the standard search patterns (digits, operators, trig words, ...)
+    # in one LaTeX run at setup, see smart_tex.PatternLibrary
+    preload_patterns = False
+
+    # Build expressions as SourceMappedMathTex so find_element can look tokens
+    # up in the compiled source map instead of searching by shape
+    use_source_map = False
+
+    # LaTeX runs in flight at once when pre-rendering (None: one per CPU)
+    tex_workers = None
+
+    # Rehearse construct once to compile all of its TeX in parallel before
+    # the real run, see prewarm
+    prewarm_tex = False
+    # Set while construct is being rehearsed
+    rehearsing = False
+
+    # Cache clips by content and synthesize all voiceovers of construct
+    # concurrently before the real run, see speech.CachedSpeechService
+    presynthesize_speech = False
+    speech_workers = 4
+
+    # "azure" or "local" (offline stand-in), overridden by NAMMI_SPEECH_SERVICE
+    speech_service_name = "azure"
+
+    # Run construct without rendering frames or writing video and print its
+    # timing and warnings (NAMMI_DRY_RUN=1 turns it on too), see dry_run.py
+    dry_run = False
+
+    # Name partial movies by a cheap hash restarted at each voiceover block,
+    # so a re-render only redoes the blocks that changed, see section_cache.py
+    cache_sections = False
+    section_cache = None
+
     def __init__(self):
         """Initialize the scene."""
+        # Mobjects drawn into the camera background, see freeze
+        self.frozen_mobjects = []
+        # Fingerprint of the frozen mobjects as they were drawn
+        self._frozen_state = None
         super().__init__()
 
+    def render(self, preview=False):
+        """Renders the scene; the section cache hook is removed once it has finished."""
+        try:
+            return super().render(preview)
+        finally:
+            uninstall_section_cache(self)
+
     def setup(self):
         """Setup Azure voice configuration and common scene settings."""
         super().setup()
         # Set up Azure voice
-        self.set_speech_service(
-            AzureService(
-                voice="en-US-DerekMultilingualNeural",
-                prosody={
-                    "rate": "-15%",  # Slower for better comprehension
-                }
+        voice = "en-US-DerekMultilingualNeural"
+        prosody = {
+            "rate": "-15%",  # Slower for better comprehension
+        }
+        if speech_backend(self.speech_service_name) == "local":
+            # Same timing, no network: for dry renders, CI and benchmarks
+            speech_service = LocalSpeechService(voice=voice, prosody=prosody)
+        else:
+            speech_service = AzureService(voice=voice, prosody=prosody)
+        segment = render_segment()
+        if segment is not None:
+            # Parallel render worker: clips come from the store shared with the
+            # dry run, the index file of manim_voiceover is per process
+            store_dir = Path(config.media_dir) / "voiceovers"
+            speech_service = CachedSpeechService(
+                speech_service, cache_dir=store_dir / f"segment-{segment[0]}", store_dir=store_dir
             )
-        )
+        elif self.presynthesize_speech or parallel_render_requested():
+            speech_service = CachedSpeechService(speech_service, max_workers=self.speech_workers)
+        self.set_speech_service(speech_service)
 
         # Set common scene settings
         self.camera.background_color = BACKGROUND_COLOR 
 
+        if self.cache_sections or parallel_render_requested():
+            install_section_cache(self)
+        if segment is not None:
+            # Only the partial movies of the segment; the final pass combines
+            self.renderer.file_writer.finish = lambda: None
+
+        if self.preload_patterns:
+            pattern_library.preload()
+
+        dry_run = dry_run_requested(self.dry_run)
+        if self.prewarm_tex or self.presynthesize_speech or dry_run:
+            # Deferred to construct time, after the setup of subclasses
+            construct = self.construct
+
+            def wrapped_construct():
+                del self.construct
+                if self.prewarm_tex or self.presynthesize_speech:
+                    self.prewarm(construct)
+                if dry_run:
+                    self.dry_run_report = DryRun(self).run(construct)
+                    print_dry_run_report(self.dry_run_report, type(self).__name__)
+                    save_dry_run_report(self.dry_run_report)
+                    # Nothing was rendered: no movie to combine, no last frame
+                    self.renderer.scene_finished = lambda scene: None
+                else:
+                    construct()
+
+            self.construct = wrapped_construct
+
+    def add_voiceover_text(self, text, *args, **kwargs):
+        """Adds a voiceover; with ``cache_sections``, a new cache block starts with it."""
+        tracker = super().add_voiceover_text(text, *args, **kwargs)
+        if self.section_cache is not None:
+            self.section_cache.start_block(Path(self.speech_service.cache_dir) / tracker.data["final_audio"])
+        return tracker
+
+    def next_section(self, *args, **kwargs):
+        """Starts a section; with ``cache_sections``, a new cache block starts with it too."""
+        super().next_section(*args, **kwargs)
+        if self.section_cache is not None:
+            self.section_cache.start_block()
+
+    def prewarm(self, construct=None, max_passes=8) -> int:
+        """Compiles every TeX string construct will request, in parallel, before it runs.
+
+        construct is rehearsed while recording (see tex_batch.record_tex):
+        animations, waits, sections and voiceovers are skipped and its output
+        is silenced. The recorded strings are then compiled into manim's tex
+        cache and the scene gets back the mobjects it had, so the real run
+        only hits the cache.
+        When the speech service can presynthesize (CachedSpeechService), the
+        voiceover texts met on the way are synthesized concurrently as well.
+
+        On a cold cache every expression is a one-glyph placeholder, so a
+        rehearsal indexing into one fails part way. Rehearsals are repeated,
+        each on the cache the previous ones compiled, until construct
+        completes, a pass records nothing new or max_passes is reached.
+
+        construct therefore runs up to max_passes times before the real run.
+        Side effects it has besides building mobjects (writing files, global
+        state) should be skipped while ``self.rehearsing`` is set.
+
+        Args:
+            construct: Callable to rehearse (defaults to ``self.construct``)
+            max_passes: Most rehearsals to run
+
+        Returns:
+            The number of TeX strings compiled
+        """
+        construct = construct or self.construct
+        voiceovers = {}
+        seen = set()
+        compiled = 0
+        failure = None
+        for _ in range(max_passes):
+            jobs, failure = self._rehearse(construct, voiceovers)
+            new_jobs = []
+            for job in jobs:
+                expression, environment, tex_template = job
+                key = (expression, environment, getattr(tex_template, "body", None))
+                if key not in seen:
+                    seen.add(key)
+                    new_jobs.append(job)
+            compile_tex_batch(new_jobs, self.tex_workers)
+            compiled += len(new_jobs)
+            if failure is None or not new_jobs:
+                break
+
+        if failure is not None:
+            print(f"Prewarm rehearsal stopped early: {failure!r}")
+        if voiceovers and hasattr(self.speech_service, "presynthesize"):
+            self.speech_service.presynthesize(list(voiceovers.values()))
+        return compiled
+
+    def _rehearse(self, construct, voiceovers):
+        """One recorded run of construct; returns its jobs and the exception it stopped on, if any.
+
+        The voiceovers it meets are added to the voiceovers dict, keyed so
+        that each (text, arguments) pair appears once over all passes. The
+        scene's mobjects (e.g. those added in setup) are put back afterwards.
+        """
+        tracker = _RehearsalTracker()
+
+        @contextlib.contextmanager
+        def voiceover(text=None, ssml=None, **kwargs):
+            if text is not None:
+                service_args = {k: v for k, v in kwargs.items() if k not in _SUBCAPTION_ARGS}
+                key = (" ".join(text.split()), repr(sorted(service_args.items())))
+                voiceovers.setdefault(key, (text, service_args))
+            yield tracker
+
+        no_op = lambda *args, **kwargs: None
+        stubs = {name: no_op for name in _REHEARSAL_NO_OPS}
+        stubs["voiceover"] = voiceover
+        mobjects, foreground_mobjects = list(self.mobjects), list(self.foreground_mobjects)
+        frozen_mobjects = list(self.frozen_mobjects)
+        self.__dict__.update(stubs)
+        self.rehearsing = True
+        failure = None
+        try:
+            with record_tex() as jobs, contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    construct()
+                except _REHEARSAL_ERRORS as e:
+                    failure = e
+        finally:
+            for name in stubs:
+                del self.__dict__[name]
+            self.rehearsing = False
+            self.mobjects, self.foreground_mobjects = mobjects, foreground_mobjects
+            if self.frozen_mobjects != frozen_mobjects:
+                self.frozen_mobjects = frozen_mobjects
+                self._render_background()
+        return jobs, failure
+
+    def math_tex(self, *tex_strings, **kwargs):
+        """Creates a MathTex, source-mapped when ``use_source_map`` is set."""
+        if self.use_source_map:
+            return SourceMappedMathTex(*tex_strings, **kwargs)
+        return MathTex(*tex_strings, **kwargs)
+
     def color_component(self, formula, component, color, index=0):
         """Color a component in a formula.
         
@@ -90,7 +331,7 @@ class MathTutorialScene(VoiceoverScene):
             color: The color to use
             index: Which occurrence of the component to color (default: 0 for first occurrence)
         """
-        char = formula[0][search_shape_in_text(formula, MathTex(component))[index]]
+        char = formula[0][search_shape_in_text(formula, component)[index]]
         char.set_color(color)
         return char
 
@@ -103,7 +344,7 @@ class MathTutorialScene(VoiceoverScene):
             color: The color to use for highlighting
             duration: How long to show the highlight
         """
-        char = formula[0][search_shape_in_text(formula, MathTex(component))[0]]
+        char = formula[0][search_shape_in_text(formula, component)[0]]
         char.set_color(color)
 
         arrow = Arrow(
@@ -199,6 +440,145 @@ class MathTutorialScene(VoiceoverScene):
         """
         return VGroup(title, *content).arrange(DOWN, aligned_edge=LEFT, buff=buff) 
 
+    def freeze(self, *mobjects):
+        """Renders static mobjects once into the background instead of every frame.
+
+        The mobjects are drawn into the camera background image and taken out
+        of the scene, so no frame or play renders them again. They end up
+        below every other mobject. Animating one of them (``play``) unfreezes
+        everything first; removing one (``remove``, ``clear``, ``replace``)
+        redraws the background without it, and one changed directly
+        (``set_color``, ``shift``, ...) is redrawn before the next play.
+
+        Mobjects with updaters are not frozen, since their updaters would stop
+        running, and nothing is frozen with a moving camera (MovingCamera),
+        whose frame the background would not follow.
+
+        Example:
+            axes, axes_labels = self.create_axes()
+            self.play(Create(axes), Write(axes_labels))
+            self.freeze(axes, axes_labels, title)
+            # ... dots and arrows animate over a cached background
+
+        Args:
+            *mobjects: Static mobjects, e.g. axes, axis labels and titles
+        """
+        if not hasattr(self.camera, "background"):
+            print("freeze needs the Cairo renderer, mobjects are left as they are")
+            return
+        if isinstance(self.camera, MovingCamera):
+            print("Warning: freeze needs a static camera, mobjects are left as they are")
+            return
+        updated = [mobject for mobject in mobjects if mobject.get_family_updaters()]
+        if updated:
+            print(f"Warning: {len(updated)} mobject(s) with updaters are left unfrozen")
+        # Kept in their scene order, which is the drawing order
+        order = {id(mobject): i for i, mobject in enumerate(self.mobjects)}
+        new = [
+            mobject for mobject in mobjects
+            if mobject not in self.frozen_mobjects and mobject not in updated
+        ]
+        self.frozen_mobjects = sorted(
+            self.frozen_mobjects + new, key=lambda mobject: order.get(id(mobject), len(order))
+        )
+        super().remove(*new)
+        self._render_background()
+
+    def unfreeze(self, *mobjects):
+        """Puts frozen mobjects (all of them by default) back in the scene, below the others."""
+        if not self.frozen_mobjects:
+            return
+        thawed = [mobject for mobject in self.frozen_mobjects if not mobjects or mobject in mobjects]
+        self.frozen_mobjects = [mobject for mobject in self.frozen_mobjects if mobject not in thawed]
+        self.add(*thawed)
+        self.bring_to_back(*thawed)
+        self._render_background()
+
+    def remove(self, *mobjects):
+        """Removes mobjects; frozen ones, or parts of them, leave the background too."""
+        involved = self._frozen_involving(mobjects)
+        if involved:
+            self.unfreeze(*involved)
+        return super().remove(*mobjects)
+
+    def clear(self):
+        """Removes every mobject, frozen ones included."""
+        if self.frozen_mobjects:
+            self.frozen_mobjects = []
+            self._render_background()
+        return super().clear()
+
+    def replace(self, old_mobject, new_mobject):
+        """Replaces a mobject; a frozen one (or one holding it) is unfrozen first."""
+        involved = self._frozen_involving([old_mobject])
+        if involved:
+            self.unfreeze(*involved)
+        return super().replace(old_mobject, new_mobject)
+
+    def _frozen_involving(self, mobjects) -> list:
+        """Frozen mobjects that are, contain or belong to one of mobjects."""
+        if not self.frozen_mobjects:
+            return []
+        members = {id(member) for mobject in mobjects for member in mobject.get_family()}
+        return [
+            frozen for frozen in self.frozen_mobjects
+            if any(id(member) in members for member in frozen.get_family())
+        ]
+
+    def _frozen_fingerprint(self) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        for mobject in self.frozen_mobjects:
+            hash_mobject(h, mobject)
+        return h.digest()
+
+    def _render_background(self):
+        camera = self.camera
+        camera.init_background()
+        if self.frozen_mobjects:
+            camera.reset()
+            camera.capture_mobjects(self.frozen_mobjects)
+            camera.background = camera.pixel_array.copy()
+        camera.reset()
+        self._frozen_state = self._frozen_fingerprint() if self.frozen_mobjects else None
+
+    def _refresh_frozen(self) -> None:
+        """Brings the background up to date with the frozen mobjects, before each play.
+
+        Frozen mobjects that were given updaters are unfrozen, and the
+        background is redrawn if a frozen mobject was changed directly.
+        """
+        if not self.frozen_mobjects:
+            return
+        updated = [mobject for mobject in self.frozen_mobjects if mobject.get_family_updaters()]
+        if updated:
+            self.unfreeze(*updated)
+        elif self._frozen_fingerprint() != self._frozen_state:
+            self._render_background()
+
+    def _animates_frozen(self, animations) -> bool:
+        """Whether any of the animations changes a frozen mobject or a part of one."""
+        frozen = {id(member) for mobject in self.frozen_mobjects for member in mobject.get_family()}
+        pending = list(animations)
+        while pending:
+            animation = pending.pop()
+            # Animations and .animate builders both have a mobject; a Transform
+            # also draws its target, a group the mobjects of its animations
+            mobjects = [getattr(animation, "mobject", None)]
+            if isinstance(animation, Animation):
+                mobjects.append(getattr(animation, "target_mobject", None))
+            if isinstance(animation, AnimationGroup):
+                pending.extend(animation.animations)
+            for mobject in mobjects:
+                if isinstance(mobject, Mobject) and any(id(member) in frozen for member in mobject.get_family()):
+                    return True
+        return False
+
+    def play(self, *args, **kwargs):
+        if self.frozen_mobjects and self._animates_frozen(args):
+            self.unfreeze()
+        self._refresh_frozen()
+        return super().play(*args, **kwargs)
+
     def create_axes(self, x_range=[-6, 6, 1], y_range=[-6, 6, 1], x_length=6, y_length=6):
         """Create standardized axes with customizable ranges and lengths.
         
@@ -353,7 +733,7 @@ class MathTutorialScene(VoiceoverScene):
                 tex_scale=TEX_SCALE
         ):
         label = Tex(label_text, color=label_color).scale(label_scale)
-        exp_group = VGroup(*[MathTex(exp).scale(tex_scale) for exp in expressions])
+        exp_group = VGroup(*[self.math_tex(exp).scale(tex_scale) for exp in expressions])
         exp_group.arrange(RIGHT, buff=eq_hbuff)
 
         if color_map:
@@ -857,6 +1237,16 @@ class MathTutorialScene(VoiceoverScene):
     #     print(f"Warning: Could not find occurrence {nth} of '{pattern}'")
     #     return None
 
+    def query(self, exp, index=0):
+        """Returns an ExpressionQuery of exp; every query of exp shares what was found.
+
+        Example:
+            query = self.query(step_1_exp)
+            b_in_frac = query.find_in_context("-6", "-(-6)")
+            ones = query.find_all("1")
+        """
+        return ExpressionQuery.of(exp, index)
+
     def find_element(self, pattern, exp, nth=0, color=None, opacity=None, as_group=False, context=None):
         """
         Enhanced find_element that automatically handles negative numbers, context, and other patterns.
@@ -875,98 +1265,50 @@ class MathTutorialScene(VoiceoverScene):
             The matching element, or a VGroup containing the element if as_group=True
             None if not found
         """
+        # Every lookup below shares the expression's query, so no pattern is
+        # searched twice (also across find_element calls on the same expression)
+        query = self.query(exp)
+        element = None
+
         # If context is provided, try context-aware finding first
         if context:
             try:
-                # Find all occurrences of the pattern
-                pattern_indices = search_shape_in_text(exp, MathTex(pattern))
-
-                if pattern_indices:
-                    # Find the context pattern
-                    context_indices = search_shape_in_text(exp, MathTex(context))
-
-                    if context_indices:
-                        # Find matches within or adjacent to the context
-                        context_matches = []
-                        for p_idx in pattern_indices:
-                            for c_idx in context_indices:
-                                # Check if pattern is within or adjacent to the context
-                                if isinstance(p_idx, slice) and isinstance(c_idx, slice):
-                                    # Within context
-                                    if (p_idx.start >= c_idx.start and p_idx.stop <= c_idx.stop):
-                                        context_matches.append(p_idx)
-                                    # Adjacent to context (just before or after)
-                                    elif (abs(p_idx.stop - c_idx.start) <= 1) or (abs(p_idx.start - c_idx.stop) <= 1):
-                                        context_matches.append(p_idx)
-
-                        # Use the nth match found in context
-                        if context_matches and nth < len(context_matches):
-                            element = exp[0][context_matches[nth]]
-
-                            if color is not None:
-                                element.set_color(color)
-
-                            if opacity is not None:
-                                element.set_opacity(opacity)
-
-                            return VGroup(element) if as_group else element
+                element = query.find_in_context(pattern, context, nth)
             except Exception as e:
                 print(f"Context search failed: {e}, falling back to standard search")
                 # Continue with regular search methods
 
-        # First try direct search
-        try:
-            indices = search_shape_in_text(exp, MathTex(pattern))
-            if indices and nth < len(indices):
-                element = exp[0][indices[nth]]
-
-                if color is not None:
-                    element.set_color(color)
-
-                if opacity is not None:
-                    element.set_opacity(opacity)
+        # Then try direct search
+        if element is None:
+            try:
+                element = query.find(pattern, nth)
+            except Exception:
+                pass  # If direct search fails, try adjacent elements approach
 
-                return VGroup(element) if as_group else element
-        except Exception:
-            pass  # If direct search fails, try adjacent elements approach
+        if element is not None and as_group:
+            element = VGroup(element)
 
         # If pattern looks like it might be a negative number, try adjacent search
-        if pattern.startswith('-') and len(pattern) > 1:
+        # (the minus sign and the number are returned as a group)
+        if element is None and pattern.startswith('-') and len(pattern) > 1:
             try:
-                num_part = pattern[1:]  # Remove the minus sign
-                minus_indices = search_shape_in_text(exp, MathTex("-"))
-                num_indices = search_shape_in_text(exp, MathTex(num_part))
-
-                # Find adjacent pairs
-                adjacent_pairs = []
-                for minus_idx in minus_indices:
-                    for num_idx in num_indices:
-                        if isinstance(minus_idx, slice) and isinstance(num_idx, slice):
-                            if minus_idx.stop == num_idx.start:
-                                adjacent_pairs.append((minus_idx, num_idx))
-
-                if adjacent_pairs and nth < len(adjacent_pairs):
-                    minus_idx, num_idx = adjacent_pairs[nth]
-                    minus_element = exp[0][minus_idx]
-                    num_element = exp[0][num_idx]
-
-                    # Create a group with both elements
-                    result = VGroup(minus_element, num_element)
+                element = query.find_signed_number(pattern, nth)
+            except Exception:
+                pass  # If adjacent search fails, fall back to default behavior
 
-                    if color is not None:
-                        result.set_color(color)
+        if element is None:
+            # If we get here, both context search and standard searches failed
+            print(f"Warning: Could not find occurrence {nth} of '{pattern}'" + 
+                (f" within context '{context}'" if context else ""))
+            return None
 
-                    if opacity is not None:
-                        result.set_opacity(opacity)
+        if color is not None:
+            element.set_color(color)
 
-                    return result
-            except Exception:
-                pass  # If adjacent search fails, fall back to default behavior
+        if opacity is not None:
+            element.set_opacity(opacity)
 
-        # If we get here, both context search and standard searches failed
-        print(f"Warning: Could not find occurrence {nth} of '{pattern}'" + 
-            (f" within context '{context}'" if context else ""))
-        return None
+        return element
 
     def find_element_lazy(self, pattern, nth=0, color=None, opacity=None, as_group=False, context=None):
         return partial(self.find_element, pattern=pattern, nth=nth, color=color, opacity=opacity, as_group=as_group, context=context)
@@ -974,7 +1316,7 @@ class MathTutorialScene(VoiceoverScene):
     def create_annotated_expression(self, main_expr, annotations=None, buff=0.3, h_spacing=0):
         # Create main expression
         if isinstance(main_expr, str):
-            expr = MathTex(main_expr).scale(TEX_SCALE)
+            expr = self.math_tex(main_expr).scale(TEX_SCALE)
         else:
             expr = main_expr
 
@@ -1035,6 +1377,25 @@ class MathTutorialScene(VoiceoverScene):
 
         return result
 
+    def resolve_annotations(self, pending):
+        """Resolves the targets of many annotations, one shared search per expression.
+
+        Args:
+            pending: List of (annotation, exp) pairs
+
+        Returns:
+            List of (left_term, right_term) pairs, in the same order
+        """
+        # Every pattern any annotation may look for in an expression is found
+        # in one pass over that expression; the lookups are then memo hits
+        patterns_by_exp = {}
+        for annotation, exp in pending:
+            patterns_by_exp.setdefault(id(exp), (exp, []))[1].extend(annotation.target_patterns())
+        for exp, patterns in patterns_by_exp.values():
+            self.query(exp).prefetch(patterns)
+
+        return [annotation.resolve(self, exp) for annotation, exp in pending]
+
     def create_step_from_list(
         self,
         *elements,
@@ -1049,7 +1410,40 @@ class MathTutorialScene(VoiceoverScene):
         annotation_exp_buff=0.2,
         exp_annotation_buff=0.2,
     ) -> Step:
+        plan = self._plan_step(
+            elements,
+            scale_map=scale_map,
+            label_color=label_color,
+            label_scale=label_scale,
+            expression_scale=expression_scale,
+            annotation_scale=annotation_scale,
+            label_exp_buff=label_exp_buff,
+            exp_exp_buff=exp_exp_buff,
+            annotation_exp_buff=annotation_exp_buff,
+            exp_annotation_buff=exp_annotation_buff,
+        )
+        targets = self.resolve_annotations(plan["annotations"])
+        return self._build_step(plan, targets, color_map=color_map, exp_annotation_buff=exp_annotation_buff)
+
+    def _plan_step(
+        self,
+        elements,
+        scale_map,
+        label_color,
+        label_scale,
+        expression_scale,
+        annotation_scale,
+        label_exp_buff,
+        exp_exp_buff,
+        annotation_exp_buff,
+        exp_annotation_buff,
+    ):
+        """Creates the labels and expressions of a step and lays out its arrangement.
 
+        Annotations are only recorded (with the expression they annotate), so
+        that their targets can be resolved together, possibly with the ones of
+        other steps, before ``_build_step`` creates them.
+        """
         min_arrange = min(
             label_exp_buff, exp_exp_buff, annotation_exp_buff, exp_annotation_buff
         )
@@ -1059,7 +1453,9 @@ class MathTutorialScene(VoiceoverScene):
                 # will not be added to the output, just a placehoder for spaceing
                 group.add(Rectangle(height=space, width=1).set_opacity(0))
 
-        step = Step()
+        entries = []  # (kind, mobject or annotation index) in element order
+        annotations = []  # (annotation, exp to annotate)
+        annotation_slots = []  # (arrange group, scale) of each annotation
         arrange_group = VGroup()  # used only for arranging
         exp_group = VGroup()  # hold only exps for colorizing and more
 
@@ -1068,18 +1464,18 @@ class MathTutorialScene(VoiceoverScene):
                 label = Tex(elem, color=label_color).scale(
                     scale_map.get(i, label_scale)
                 )
-                step.add_label(label)
+                entries.append(("label", label))
                 arrange_group.add(label)
                 if i < len(elements) - 1:
                     add_space(arrange_group, label_exp_buff - min_arrange)
-            elif type(elem) is MathTex:
+            elif _is_expression(elem):
                 exp = elem.scale(scale_map.get(i, expression_scale))
                 exp_group.add(exp)
-                step.add_expression(exp)
+                entries.append(("expression", exp))
                 # if there an expression coming
                 if i < len(elements) - 1:
                     # add the exp to the arrangement if the incoming element is exp
-                    if type(elements[i + 1]) is MathTex:
+                    if _is_expression(elements[i + 1]):
                         arrange_group.add(exp)
                         add_space(arrange_group, exp_exp_buff - min_arrange)
                 else:
@@ -1089,36 +1485,102 @@ class MathTutorialScene(VoiceoverScene):
                 # ensure that we have an exp to annotate and reject multiple annotation
                 # per expression (exp should be followed by zero or one annotation)
                 # TODO: add multiple annotations for the same expr (should they be at the same line or each one in a sep. line)
-                assert len(exp_group) >= 1 and type(elements[i - 1]) is MathTex
-                # assert len(exp_group) >= 1
+                assert len(exp_group) >= 1 and _is_expression(elements[i - 1])
                 # get the preceeding exp
                 to_annotate = exp_group[-1]
-                # call the Annotation class (do the actual annotation)
-                annotation = elem(
-                    self, to_annotate, exp_annotation_buff=exp_annotation_buff
-                ).scale(scale_map.get(i, annotation_scale))
-                step.add_annotation(annotation)
-                # if type(elements[i-1]) is MathTex:
-                arrange_group.add(VGroup(to_annotate, annotation))
-                # add it to the previous group of annot. and exp if there is another annotation
-                # elif type(elements[i-1]) is Annotation:
-                    # annotation_annotation_buff = 0.2
-                    # annotation.shift(DOWN, (len(arrange_group[-1]) - 1) * annotation_annotation_buff)
-                    # arrange_group[-1].add(annotation)
+                # the annotation joins this group once it is created
+                annotated = VGroup(to_annotate)
+                arrange_group.add(annotated)
+                entries.append(("annotation", len(annotations)))
+                annotations.append((elem, to_annotate))
+                annotation_slots.append((annotated, scale_map.get(i, annotation_scale)))
                 # if there is an expression coming
-                if i < len(elements) - 1 and type(elements[i+1]) is MathTex:
+                if i < len(elements) - 1 and _is_expression(elements[i + 1]):
                     add_space(arrange_group, annotation_exp_buff - min_arrange)
             else:
                 assert False, "Unreachable"
 
+        return {
+            "entries": entries,
+            "annotations": annotations,
+            "annotation_slots": annotation_slots,
+            "arrange_group": arrange_group,
+            "exp_group": exp_group,
+            "min_arrange": min_arrange,
+        }
+
+    def _build_step(self, plan, targets, color_map=None, exp_annotation_buff=0.2) -> Step:
+        """Creates the annotations of a planned step from resolved targets and arranges it."""
+        created = []
+        for (annotation, _), (left_term, right_term), (annotated, scale) in zip(
+            plan["annotations"], targets, plan["annotation_slots"]
+        ):
+            # do the actual annotation
+            term = annotation.layout(
+                self, left_term, right_term, exp_annotation_buff=exp_annotation_buff
+            ).scale(scale)
+            annotated.add(term)
+            created.append(term)
+
+        step = Step()
+        for kind, item in plan["entries"]:
+            if kind == "label":
+                step.add_label(item)
+            elif kind == "expression":
+                step.add_expression(item)
+            else:
+                step.add_annotation(created[item])
+
         if color_map:
-            self.apply_smart_colorize(exp_group, color_map)
+            self.apply_smart_colorize(plan["exp_group"], color_map)
 
-        arrange_group.arrange(DOWN, aligned_edge=LEFT, buff=min_arrange).to_edge(
+        plan["arrange_group"].arrange(DOWN, aligned_edge=LEFT, buff=plan["min_arrange"]).to_edge(
             UP, buff=0.4
         ).to_edge(LEFT, buff=1)
         return step
 
+    def prerender_steps(self, steps, color_map=None) -> int:
+        """Compiles, in parallel, the TeX that building the given step lists needs.
+
+        Covers the labels, the annotation terms, the search renderings of
+        every expression that is annotated or colorized, the patterns the
+        annotations search for and the color map patterns. Nothing is created
+        or changed, so the steps built afterwards are identical, only faster.
+
+        Args:
+            steps: Element lists as passed to ``create_ordered_steps``
+            color_map: Color map the steps will be colorized with
+
+        Returns:
+            The number of TeX strings that went through the batch
+        """
+
+        def factory():
+            # Needles of resolve_annotations, loaded into the pattern library
+            target_patterns = []
+            for elements in steps:
+                searched = []
+                for i, elem in enumerate(elements):
+                    if type(elem) is str:
+                        Tex(elem)
+                    elif type(elem) is Annotation:
+                        MathTex(rf"{elem.added_term}")
+                        target_patterns += elem.target_patterns()
+                        if i > 0 and _is_expression(elements[i - 1]):
+                            searched.append(elements[i - 1])
+                    elif _is_expression(elem) and color_map:
+                        searched.append(elem)
+                for exp in dict.fromkeys(searched):
+                    ExpressionShapeIndex.of(exp)
+                    if color_map:
+                        pattern_library.preload(
+                            [variant for tex in color_map for variant in _match_variants(tex, exp.tex_template)]
+                        )
+            if target_patterns:
+                pattern_library.preload(dict.fromkeys(target_patterns))
+
+        return prerender_tex(factory, self.tex_workers)
+
     def create_ordered_steps(
         self,
         *steps,
@@ -1133,13 +1595,16 @@ class MathTutorialScene(VoiceoverScene):
         annotation_exp_buff=0.2,
         exp_annotation_buff=0.2,
         step_step_buff=0.5,
+        prerender=True,
     ):
-        steps_group = VGroup()
-
-        for i, step in enumerate(steps):
-            step_ = self.create_step_from_list(
-                *step,
-                color_map=color_map,
+        if prerender:
+            # Every string the steps will compile is compiled up front, in
+            # parallel; building the steps below then only hits the tex cache
+            self.prerender_steps(steps, color_map=color_map)
+
+        plans = [
+            self._plan_step(
+                step,
                 scale_map=scale_maps.get(i, {}),
                 label_color=label_color,
                 label_scale=label_scale,
@@ -1150,6 +1615,21 @@ class MathTutorialScene(VoiceoverScene):
                 annotation_exp_buff=annotation_exp_buff,
                 exp_annotation_buff=exp_annotation_buff,
             )
-            steps_group.add(step_)
+            for i, step in enumerate(steps)
+        ]
+
+        # The annotation targets of all steps are resolved together, one
+        # search setup per expression, before any annotation is laid out
+        targets = self.resolve_annotations(
+            [pending for plan in plans for pending in plan["annotations"]]
+        )
+
+        steps_group = VGroup()
+        for plan in plans:
+            count = len(plan["annotations"])
+            step_targets, targets = targets[:count], targets[count:]
+            steps_group.add(
+                self._build_step(plan, step_targets, color_map=color_map, exp_annotation_buff=exp_annotation_buff)
+            )
         steps_group.arrange(DOWN, aligned_edge=LEFT, buff=step_step_buff)
         return steps_group
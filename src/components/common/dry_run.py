@@ -0,0 +1,215 @@
+"""Layout-only dry runs of tutorial scenes.
+
+A dry run executes ``construct`` for real (mobjects, layouts, ``find_element``
+lookups, animations brought to their final state) but with the renderer in
+skip mode: no frame is rasterized and no video is written. On the way it
+keeps the books a render would: animation time, sections, voiceovers and the
+warnings printed by the scene code.
+
+Example:
+    NAMMI_DRY_RUN=1 manim -ql slope.py FindSlopeInterceptFormTemplate
+
+or ``dry_run = True`` on the scene class. Combined with
+``NAMMI_SPEECH_SERVICE=local`` nothing leaves the machine.
+"""
+
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from manim import config
+
+
+# Environment variable turning on the dry run of every MathTutorialScene
+DRY_RUN_ENV = "NAMMI_DRY_RUN"
+
+# Environment variable naming a file the dry run report is written to as JSON
+DRY_RUN_REPORT_ENV = "NAMMI_DRY_RUN_REPORT"
+
+# Printed lines kept as warnings: manim's WARNING and ERROR log lines (after
+# their time stamp), the "Warning: ...", "Could not ...", "Cannot ..." messages
+# of the scene code and the fallbacks reported by this package
+_WARNING_LINE = re.compile(
+    r"^(\[[^\]]*\]\s*)?(warning|error)\b"
+    r"|^(could not|couldn't|cannot|can't|no more)\b"
+    r"|^(batched latex compilation failed|context search failed|prewarm rehearsal stopped"
+    r"|section cache inactive|freeze needs)\b",
+    re.IGNORECASE,
+)
+
+
+def dry_run_requested(default=False) -> bool:
+    """Whether ``NAMMI_DRY_RUN`` asks for a dry run (falls back to default)."""
+    value = os.environ.get(DRY_RUN_ENV, "").strip().lower()
+    if not value:
+        return default
+    return value not in ("0", "false", "no", "off")
+
+
+class _Tee(io.TextIOBase):
+    """Writes to a stream while keeping every printed line."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lines = []
+        self._partial = ""
+
+    def write(self, text):
+        self.stream.write(text)
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        self.lines += [line.strip() for line in lines if line.strip()]
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class DryRun:
+    """Runs construct of a scene without rendering and reports its timing.
+
+    Args:
+        scene: Scene to run; its renderer is switched to skip mode and movie
+            writing is turned off while construct runs
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.animation_time = 0.0
+        self.plays = 0
+        # [name, start time]; manim starts every scene with an implicit section
+        self.sections = [["autocreated", 0.0]]
+        self.voiceovers = []  # (text, duration)
+        # (play number, start time) of every voiceover block and section
+        self.boundaries = []
+        self.warnings = []
+        # Play numbers during which something moved with the time (dt updaters)
+        self.time_based_plays = []
+        self.construct_time = 0.0
+
+    def run(self, construct=None) -> dict:
+        """Executes construct (defaults to ``scene.construct``) and returns the report."""
+        scene = self.scene
+        construct = construct or scene.construct
+        # Restored afterwards, so later renders in this process write as usual
+        write_to_movie, save_last_frame = config.write_to_movie, config.save_last_frame
+        renderer = scene.renderer
+        skipping = renderer.skip_animations, renderer._original_skipping_status
+        config.write_to_movie = False
+        config.save_last_frame = False
+        scene.renderer.skip_animations = True
+        scene.renderer._original_skipping_status = True
+
+        play, next_section = scene.play, scene.next_section
+        add_voiceover_text = scene.add_voiceover_text
+
+        def counted_play(*args, **kwargs):
+            # The renderer clock, not scene.duration: a play that plays
+            # nothing leaves the duration of the previous one behind
+            start_time = scene.renderer.time
+            if _has_time_based_updaters(scene):
+                self.time_based_plays.append(self.plays)
+            play(*args, **kwargs)
+            self.plays += 1
+            self.animation_time += scene.renderer.time - start_time
+
+        def timed_section(name="unnamed", *args, **kwargs):
+            self.sections.append([name, self.animation_time])
+            self.boundaries.append((self.plays, self.animation_time))
+            return next_section(name, *args, **kwargs)
+
+        def timed_voiceover_text(text, *args, **kwargs):
+            tracker = add_voiceover_text(text, *args, **kwargs)
+            self.voiceovers.append((text, tracker.duration))
+            self.boundaries.append((self.plays, self.animation_time))
+            return tracker
+
+        instrumented = {
+            "play": counted_play,
+            "next_section": timed_section,
+            "add_voiceover_text": timed_voiceover_text,
+        }
+        scene.__dict__.update(instrumented)
+        tee = _Tee(sys.stdout)
+        stdout, sys.stdout = sys.stdout, tee
+        start = time.perf_counter()
+        try:
+            construct()
+        finally:
+            self.construct_time = time.perf_counter() - start
+            sys.stdout = stdout
+            config.write_to_movie = write_to_movie
+            config.save_last_frame = save_last_frame
+            renderer.skip_animations, renderer._original_skipping_status = skipping
+            for name in instrumented:
+                del scene.__dict__[name]
+            self.warnings = [line for line in tee.lines if _WARNING_LINE.search(line)]
+        return self.report()
+
+    def report(self) -> dict:
+        """Timing of the run so far.
+
+        Returns:
+            dict with construct_time (wall seconds), animation_time (seconds of
+            video), plays, sections and voiceovers as (name or text, seconds)
+            pairs, the warning-like lines printed (by the scene code or manim's
+            logger), the boundaries: (play number, start
+            time) of every voiceover block and section, and
+            time_based_plays: the plays run with dt updaters in the scene
+        """
+        bounds = [start for _, start in self.sections[1:]] + [self.animation_time]
+        sections = [(name, stop - start) for (name, start), stop in zip(self.sections, bounds)]
+        if len(sections) > 1 and sections[0][1] == 0:
+            # Nothing played before the first next_section
+            sections = sections[1:]
+        return {
+            "construct_time": self.construct_time,
+            "animation_time": self.animation_time,
+            "plays": self.plays,
+            "sections": sections,
+            "voiceovers": list(self.voiceovers),
+            "warnings": list(self.warnings),
+            "boundaries": sorted(set(self.boundaries)),
+            "time_based_plays": list(self.time_based_plays),
+        }
+
+
+def _has_time_based_updaters(scene) -> bool:
+    """Whether the scene or one of its mobjects has an updater taking dt."""
+    if any(getattr(scene, "updaters", ())):
+        return True
+    return any(
+        mobject.get_time_based_updaters()
+        for top in getattr(scene, "mobjects", ())
+        for mobject in top.get_family()
+    )
+
+
+def save_dry_run_report(report: dict) -> None:
+    """Writes the report as JSON to the file named by ``NAMMI_DRY_RUN_REPORT``, if set."""
+    path = os.environ.get(DRY_RUN_REPORT_ENV)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def print_dry_run_report(report: dict, name="Scene") -> None:
+    """Prints a dry run report as a short table."""
+    print(f"\nDry run of {name}")
+    print(f"  construct time  {report['construct_time']:8.2f} s")
+    print(f"  animation time  {report['animation_time']:8.2f} s in {report['plays']} plays")
+    if report["sections"]:
+        print("  sections:")
+        for section, duration in report["sections"]:
+            print(f"    {duration:8.2f} s  {section}")
+    if report["voiceovers"]:
+        print("  voiceovers:")
+        for text, duration in report["voiceovers"]:
+            short = text if len(text) <= 60 else text[:57] + "..."
+            print(f"    {duration:8.2f} s  {short}")
+    print(f"  warnings: {len(report['warnings'])}")
+    for warning in report["warnings"]:
+        print(f"    {warning}")
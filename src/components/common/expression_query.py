@@ -0,0 +1,143 @@
+"""Repeated lookups on one expression from a single shared index."""
+
+from typing import Dict, List, Optional, Tuple
+
+from manim import *
+
+from .smart_tex import ExpressionShapeIndex, _expression_cache, _tex_signature
+from .source_map import SourceMappedMathTex
+from .tex_batch import is_recording
+
+
+class ExpressionQuery:
+    """Query object bound to one expression.
+
+    Every pattern is searched at most once: the slices found for it are kept
+    and shared by ``find``, ``find_all``, ``find_in_context``, ``find_adjacent``
+    and ``find_signed_number``, and by every query of the same expression
+    (see ``of``). The glyphs come from the expression's source
+    map when it is a SourceMappedMathTex, otherwise from its shape index.
+
+    Example:
+        query = self.query(exp)
+        b = query.find_in_context("-6", "-(-6)")
+        c = query.find_signed_number("-9")
+        ones = query.find_all("1")
+    """
+
+    def __init__(self, exp: VMobject, index=0, slices: Optional[Dict[str, List[slice]]] = None):
+        self.exp = exp
+        self.index = index
+        self._shape_index = None
+        self._slices: Dict[str, List[slice]] = {} if slices is None else slices
+
+    @classmethod
+    def of(cls, exp: VMobject, index=0) -> "ExpressionQuery":
+        """Returns a query of ``exp[index]`` sharing the slices found by earlier queries.
+
+        The slices live in the cache entry of the expression's shape indexes
+        (see ``ExpressionShapeIndex.of``), so both are dropped together when
+        its tex string changes. The entry holds no query: a query keeps its
+        expression alive, which the weak-keyed cache must not.
+        """
+        signature = _tex_signature(exp)
+        if signature is None:
+            return cls(exp, index)
+        slices = _expression_cache(exp, signature)[2].setdefault(index, {})
+        return cls(exp, index, slices)
+
+    def slices(self, pattern: str) -> List[slice]:
+        """Slices of ``exp[index]`` matching pattern, searched only the first time."""
+        if pattern in self._slices:
+            return list(self._slices[pattern])
+
+        found = None
+        if isinstance(self.exp, SourceMappedMathTex):
+            found = self.exp.find_source(pattern, self.index)
+        if found is None:
+            if self._shape_index is None:
+                self._shape_index = ExpressionShapeIndex.of(self.exp, self.index)
+            found = self._shape_index.find(pattern)
+        if is_recording():
+            # Slices of placeholder glyphs (see tex_batch) are not kept
+            self._shape_index = None
+        else:
+            self._slices[pattern] = found
+        return list(found)
+
+    def prefetch(self, patterns) -> None:
+        """Searches every pattern not searched yet, all in one pass over the expression."""
+        pending = [pattern for pattern in dict.fromkeys(patterns) if pattern not in self._slices]
+        if not pending or is_recording():
+            return
+        if isinstance(self.exp, SourceMappedMathTex):
+            for pattern in list(pending):
+                found = self.exp.find_source(pattern, self.index)
+                if found is not None:
+                    self._slices[pattern] = found
+                    pending.remove(pattern)
+            if not pending:
+                return
+        if self._shape_index is None:
+            self._shape_index = ExpressionShapeIndex.of(self.exp, self.index)
+        self._slices.update(self._shape_index.find_many({pattern: [pattern] for pattern in pending}))
+
+    def context_slices(self, pattern: str, context: str) -> List[slice]:
+        """Slices of pattern that lie within, or right next to, an occurrence of context."""
+        context_indices = self.slices(context)
+        matches = []
+        for p_idx in self.slices(pattern):
+            for c_idx in context_indices:
+                # Within context
+                if p_idx.start >= c_idx.start and p_idx.stop <= c_idx.stop:
+                    matches.append(p_idx)
+                # Adjacent to context (just before or after)
+                elif abs(p_idx.stop - c_idx.start) <= 1 or abs(p_idx.start - c_idx.stop) <= 1:
+                    matches.append(p_idx)
+        return matches
+
+    def adjacent_slices(self, first: str, second: str) -> List[Tuple[slice, slice]]:
+        """Pairs of slices where an occurrence of first is directly followed by second."""
+        second_indices = self.slices(second)
+        return [
+            (first_idx, second_idx)
+            for first_idx in self.slices(first)
+            for second_idx in second_indices
+            if first_idx.stop == second_idx.start
+        ]
+
+    def _part(self, s: slice) -> VMobject:
+        return self.exp[self.index][s]
+
+    def find_all(self, pattern: str) -> List[VMobject]:
+        """Every occurrence of pattern."""
+        return [self._part(s) for s in self.slices(pattern)]
+
+    def find(self, pattern: str, nth=0) -> Optional[VMobject]:
+        """The nth occurrence of pattern, None if there is none."""
+        indices = self.slices(pattern)
+        return self._part(indices[nth]) if nth < len(indices) else None
+
+    def find_in_context(self, pattern: str, context: str, nth=0) -> Optional[VMobject]:
+        """The nth occurrence of pattern within or next to context (e.g. "a" in "4ac")."""
+        matches = self.context_slices(pattern, context)
+        return self._part(matches[nth]) if nth < len(matches) else None
+
+    def find_adjacent(self, first: str, second: str, nth=0) -> Optional[VGroup]:
+        """The nth occurrence of first directly followed by second, as VGroup(first, second)."""
+        pairs = self.adjacent_slices(first, second)
+        if nth >= len(pairs):
+            return None
+        first_idx, second_idx = pairs[nth]
+        return VGroup(self._part(first_idx), self._part(second_idx))
+
+    def find_signed_number(self, pattern: str, nth=0) -> Optional[VGroup]:
+        """The nth negative number pattern (e.g. "-5") as VGroup(minus, number).
+
+        For expressions where the minus sign and the number do not match as one
+        shape, like a minus rendered as a binary operator.
+        """
+        if not pattern.startswith("-") or len(pattern) < 2:
+            return None
+        return self.find_adjacent("-", pattern[1:], nth)
+
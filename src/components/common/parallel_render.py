@@ -0,0 +1,189 @@
+"""Section-parallel rendering of long tutorial scenes.
+
+Cairo renders one frame at a time in one process. This script renders a
+scene over several processes instead:
+
+1. A dry run (see dry_run.py) finds where the voiceover blocks and sections
+   start, in play numbers and seconds of video.
+2. The plays are cut at those boundaries into segments of similar length,
+   rendered by parallel manim processes (``-n first,last``). Each worker
+   rebuilds the mobject state at its first boundary by running the earlier
+   plays in skip mode, then writes the partial movies of its segment under
+   the section cache names (see section_cache.py).
+3. A final, sequential manim run finds every partial movie in the cache and
+   only concatenates them. The voiceover audio is added there, at the times
+   of that run, so it stays aligned with the video.
+
+Voiceover clips are synthesized once, during the dry run, and shared through a
+``CachedSpeechService`` store; each process keeps its own manim_voiceover index.
+
+Usage:
+    python -m src.components.common.parallel_render path/to/scene.py SceneName -q h -j 8
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .dry_run import DRY_RUN_ENV, DRY_RUN_REPORT_ENV
+
+
+# Set for every manim process of a parallel render: voiceovers go through the
+# shared clip store and partial movies are named by the section cache
+PARALLEL_RENDER_ENV = "NAMMI_PARALLEL_RENDER"
+
+# "first,last" play numbers of the segment a worker renders
+SEGMENT_ENV = "NAMMI_RENDER_SEGMENT"
+
+
+def parallel_render_requested() -> bool:
+    """Whether this process is part of a parallel render."""
+    return bool(os.environ.get(PARALLEL_RENDER_ENV))
+
+
+def render_segment() -> Optional[Tuple[int, int]]:
+    """(first, last) play numbers rendered by this worker, None outside of workers."""
+    value = os.environ.get(SEGMENT_ENV)
+    if not value:
+        return None
+    first, last = value.split(",")
+    return int(first), int(last)
+
+
+def plan_segments(report: dict, workers: int) -> List[Tuple[int, int]]:
+    """Cuts the plays of a dry run into at most workers segments of similar duration.
+
+    Cuts are only made at voiceover block and section boundaries, where the
+    section cache restarts its hash chain.
+
+    Args:
+        report: Dry run report (see ``DryRun.report``)
+        workers: Number of segments wanted
+
+    Returns:
+        (first, last) play numbers of each segment, both included
+    """
+    plays = report["plays"]
+    if plays == 0:
+        return []
+    target = report["animation_time"] / max(1, workers)
+    candidates = [(play, start_time) for play, start_time in report["boundaries"] if 0 < play < plays]
+
+    # Cut k starts at the boundary closest to k segments of target duration
+    starts = [0]
+    for k in range(1, workers):
+        later = [candidate for candidate in candidates if candidate[0] > starts[-1]]
+        if not later:
+            break
+        play, _ = min(later, key=lambda candidate: abs(candidate[1] - k * target))
+        starts.append(play)
+    stops = [start - 1 for start in starts[1:]] + [plays - 1]
+    return list(zip(starts, stops))
+
+
+def manim_command(scene_file: str, scene_name: str, quality: str, extra=()) -> List[str]:
+    return [sys.executable, "-m", "manim", "render", f"-q{quality}", *extra, scene_file, scene_name]
+
+
+def _run(command, **env) -> None:
+    subprocess.run(command, env={**os.environ, PARALLEL_RENDER_ENV: "1", **env}, check=True)
+
+
+def dry_run(scene_file: str, scene_name: str, quality: str, extra=()) -> dict:
+    """Runs the scene without rendering and returns its dry run report."""
+    with tempfile.TemporaryDirectory() as tmp:
+        report_file = os.path.join(tmp, "report.json")
+        _run(
+            manim_command(scene_file, scene_name, quality, extra),
+            **{DRY_RUN_ENV: "1", DRY_RUN_REPORT_ENV: report_file},
+        )
+        with open(report_file, encoding="utf-8") as f:
+            return json.load(f)
+
+
+def render_parallel(scene_file: str, scene_name: str, quality="l", workers=None, extra=()) -> dict:
+    """Renders a MathTutorialScene over several processes; returns timings.
+
+    Segments only join up through the partial movie cache, so
+    ``--disable_caching`` is dropped from extra with a warning. Scenes with
+    time-based (dt) updaters are rendered with a warning too: workers run the
+    plays before their segment in skip mode, where such an updater takes a
+    single step per play, so a segment may start from a slightly different
+    state than a sequential render would reach.
+
+    Args:
+        scene_file: Python file of the scene
+        scene_name: Class name of the scene
+        quality: manim quality flag (l, m, h, p, k)
+        workers: Segments rendered at once (None: one per CPU)
+        extra: More arguments for every manim run
+
+    Returns:
+        dict with the segments and the wall time of each phase
+    """
+    workers = workers or os.cpu_count() or 1
+    timings = {}
+    if "--disable_caching" in extra:
+        print("Warning: --disable_caching ignored, a parallel render joins its segments through the cache")
+        extra = [arg for arg in extra if arg != "--disable_caching"]
+
+    start = time.perf_counter()
+    report = dry_run(scene_file, scene_name, quality, extra)
+    timings["dry_run"] = time.perf_counter() - start
+
+    time_based_plays = report.get("time_based_plays", [])
+    if time_based_plays:
+        print(
+            f"Warning: {len(time_based_plays)} plays run with time-based (dt) updaters, from play "
+            f"{time_based_plays[0]}; segments rebuild them in skip mode and may not join up exactly"
+        )
+
+    segments = plan_segments(report, workers)
+    start = time.perf_counter()
+
+    def render(segment):
+        first, last = segment
+        _run(
+            manim_command(scene_file, scene_name, quality, [*extra, "-n", f"{first},{last}"]),
+            **{SEGMENT_ENV: f"{first},{last}"},
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, len(segments))) as pool:
+        list(pool.map(render, segments))
+    timings["segments"] = time.perf_counter() - start
+
+    # Every play is a cache hit now: concatenation and audio only
+    start = time.perf_counter()
+    _run(manim_command(scene_file, scene_name, quality, extra))
+    timings["combine"] = time.perf_counter() - start
+
+    return {"segments": segments, "animation_time": report["animation_time"], "timings": timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render one tutorial scene over several processes")
+    parser.add_argument("scene_file")
+    parser.add_argument("scene_name")
+    parser.add_argument("-q", "--quality", default="l", help="manim quality flag (l, m, h, p, k)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="parallel segments (default: CPUs)")
+    parser.add_argument("manim_args", nargs=argparse.REMAINDER, help="more manim arguments, after --")
+    args = parser.parse_args()
+
+    extra = [arg for arg in args.manim_args if arg != "--"]
+    result = render_parallel(args.scene_file, args.scene_name, args.quality, args.workers, extra)
+
+    print(f"\n{len(result['segments'])} segments for {result['animation_time']:.1f} s of video:")
+    for first, last in result["segments"]:
+        print(f"  plays {first}-{last}")
+    for phase, seconds in result["timings"].items():
+        print(f"  {phase:<10} {seconds:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,230 @@
 """Scroll manager for handling scrolling animations in tutorials."""
 
+import contextlib
+import heapq
+import io
+import itertools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
 from manim import *
 
+from .tex_batch import TEX_ERRORS, compile_tex_batch, is_recording, record_tex, unique_jobs
+
+
+class LazyEquations:
+    """Equation source for ScrollManager that builds each equation when it is reached.
+
+    Takes a callable ``build(index)`` (with the number of equations) or any
+    iterable, e.g. a generator. Equations are built in order the first time
+    ScrollManager reads them (``prepare_next``, ``fade_in_from_target``) and
+    stacked downwards like ``create_ordered_steps`` arranges steps. Equations
+    faded out by ``scroll_down`` are released.
+
+    Given ``tex_strings(index)``, the TeX the next ``lookahead`` equations
+    need is compiled on a background thread meanwhile, so it runs while the
+    current animations render. The builder itself is never run ahead. Only
+    the compilation leaves the main thread: throwaway MathTex/Tex of the
+    strings are recorded there (see ``record_tex``) and every mobject is built
+    there, since manim, the tex recording and the glyph caches are not
+    thread-safe. Call ``close()`` (or use ``with``) to stop the worker early.
+
+    Example:
+        equations = LazyEquations(
+            lambda i: self.create_step_from_list(*steps[i]),
+            len(steps),
+            tex_strings=lambda i: [(Tex, elem) for elem in steps[i] if type(elem) is str],
+        )
+        scroll_mgr = ScrollManager(equations)
+
+    Slices without an end (``equations[i:]``) only cover the equations built so
+    far; building is always in index order, so a slice with an end builds
+    everything before it. ``len()`` is the given count; without one it raises
+    TypeError rather than building ahead (see ``built`` and ``available``).
+
+    Args:
+        source: Callable index -> mobject, or an iterable of mobjects
+        count: Number of equations (required for a callable source)
+        tex_strings: Callable index -> TeX the equation compiles, as MathTex
+            strings or (Tex or MathTex, string) pairs; without it nothing is
+            compiled ahead
+        lookahead: Equations whose TeX is compiled ahead in the background
+        start: Top-left corner of the first equation (defaults to where
+            ``create_ordered_steps`` puts the first step)
+        buff: Vertical space between equations
+    """
+
+    def __init__(self, source, count=None, tex_strings=None, lookahead=2, start=None, buff=0.5):
+        if callable(source):
+            if count is None:
+                raise ValueError("A callable equation source needs the number of equations")
+            self._build = source
+        else:
+            iterator = iter(source)
+            self._build = lambda index: next(iterator)
+        self.tex_strings = tex_strings
+        self.count = count
+        self.lookahead = lookahead
+        self.buff = buff
+        if start is None:
+            start = np.array([-config.frame_width / 2 + 1, config.frame_height / 2 - 0.4, 0])
+        # Where the top-left corner of the next equation goes
+        self.cursor = np.array(start, dtype=float)
+        self._equations = []
+        self._exhausted = False
+        self._pending = {}  # index -> future of the LaTeX batch covering it
+        self._executor = None
+        if tex_strings is not None and lookahead > 0:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+            # Stops the worker if the source is dropped without close()
+            self._finalizer = weakref.finalize(self, self._executor.shutdown, wait=False)
+
+    def close(self):
+        """Stops the background compilation; building on demand keeps working."""
+        if self._executor is not None:
+            self._finalizer()
+            self._executor = None
+            self._pending.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _take(self, index):
+        future = self._pending.pop(index, None)
+        if future is not None:
+            try:
+                future.result()
+            except Exception as e:
+                # The equation compiles its own LaTeX when built
+                print(f"Could not compile equation {index} ahead: {e!r}")
+        try:
+            return self._build(index)
+        except StopIteration:
+            return None
+
+    def _ensure(self, index) -> bool:
+        """Builds and places every equation up to index; False if the source ends before."""
+        while len(self._equations) <= index and not self._exhausted:
+            position = len(self._equations)
+            if self.count is not None and position >= self.count:
+                self._exhausted = True
+                break
+            equation = self._take(position)
+            if equation is None:
+                self._exhausted = True
+                break
+            equation.move_to(self.cursor, aligned_edge=UL)
+            self.cursor = equation.get_corner(DL) + DOWN * self.buff
+            self._equations.append(equation)
+        if self._exhausted or (self.count is not None and len(self._equations) >= self.count):
+            # Nothing left to compile ahead
+            self.close()
+        self._prefetch()
+        return index < len(self._equations)
+
+    def _prefetch(self):
+        """Compiles the LaTeX of the next equations on the worker thread."""
+        # Inside a recording (e.g. a prewarm rehearsal) the outer block compiles
+        if self._executor is None or self._exhausted or is_recording():
+            return
+        stop = len(self._equations) + self.lookahead
+        if self.count is not None:
+            stop = min(stop, self.count)
+        positions = [position for position in range(len(self._equations), stop) if position not in self._pending]
+        if not positions:
+            return
+        # Throwaway mobjects of the strings on this thread, only to learn the
+        # jobs; a string that fails here is compiled when its equation is built
+        failures = []
+        with record_tex() as jobs, contextlib.redirect_stdout(io.StringIO()):
+            for position in positions:
+                for item in self.tex_strings(position):
+                    tex_class, string = (MathTex, item) if isinstance(item, str) else item
+                    try:
+                        tex_class(string)
+                    except TEX_ERRORS as e:
+                        failures.append((position, e))
+        for position, e in failures:
+            print(f"Could not prepare equation {position} ahead: {e!r}")
+        jobs = unique_jobs(jobs)
+        future = self._executor.submit(compile_tex_batch, jobs) if jobs else None
+        for position in positions:
+            self._pending[position] = future
+
+    def available(self, stop) -> int:
+        """Number of equations below stop that exist, building them if needed."""
+        if stop > 0:
+            self._ensure(stop - 1)
+        return min(stop, len(self._equations))
+
+    def release(self, start, stop):
+        """Drops the equations in [start, stop), once they are off screen for good."""
+        for position in range(start, min(stop, len(self._equations))):
+            self._equations[position] = None
+
+    @property
+    def built(self) -> int:
+        """Number of equations built so far, released ones included."""
+        return len(self._equations)
+
+    def shift_cursor(self, offset):
+        """Moves the place of the equations still to be built, e.g. by a scroll."""
+        self.cursor = self.cursor + offset
+
+    def __len__(self):
+        if self.count is None:
+            # Answering would mean building the whole source
+            raise TypeError("An equation source without a count has no length, see built and available()")
+        return self.count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.start or 0, key.stop, key.step or 1
+            if stop is None:
+                stop = len(self._equations)
+            else:
+                self._ensure(stop - 1)
+            return VGroup(*[
+                equation for equation in self._equations[start:stop:step] if equation is not None
+            ])
+        if not self._ensure(key):
+            raise IndexError(f"No equation at index {key}")
+        return self._equations[key]
+
+    def __setitem__(self, index, equation):
+        self._ensure(index)
+        self._equations[index] = equation
+
+    def __iter__(self):
+        return (equation for equation in self._equations if equation is not None)
+
+
 class ScrollManager(VGroup):
     def __init__(self, equations, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.equations = equations
-        self.start_position = self.equations[0].copy()
+        # Only its top is used: where the first equation in view is aligned
+        self.start_position = Point(self.equations[0].get_top())
+        # Total shift applied by scroll_down so far
+        self.scroll_offset = np.zeros(3)
         self.current_position = 0
         self.last_in_view = 0
         self.last_steps = 0
         self.replacements = {}  # Add this line
-        # Store callouts with their target scroll index
-        self.callouts_by_scroll_index = (
-            {}
-        )  # Key: scroll index, Value: list of callout managers
+        # Heaps of (scroll index or equation index, order, callout manager):
+        # a scroll only pops the callouts it passes
+        self._scroll_callouts = []
+        self._equation_callouts = []
+        self._callout_order = itertools.count()
         self.scroll_count = 0  # Track number of scrolls
+        # id of every mobject of an equation -> (weakref to it, weakref to the
+        # equation, equation index); filled as equations appear and kept up to
+        # date by the replacement methods
+        self._owners = {}
+        self._indexed = 0  # Equations below this index are in _owners
 
     def prepare_next(
         self,
@@ -59,11 +268,43 @@ class ScrollManager(VGroup):
 
     def attach_callout_at_scroll(self, scroll_index, callout_manager):
         """Attach a callout manager to fade out at a specific scroll index."""
-        if scroll_index not in self.callouts_by_scroll_index:
-            self.callouts_by_scroll_index[scroll_index] = []
-        self.callouts_by_scroll_index[scroll_index].append(callout_manager)
+        heapq.heappush(self._scroll_callouts, (scroll_index, next(self._callout_order), callout_manager))
+        return self
+
+    def attach_callout_to_equation(self, index, callout_manager):
+        """Attach a callout manager to fade out when an equation leaves the view.
+
+        The callout fades out with the ``scroll_down`` or ``fade_out_in_view``
+        that removes equation index, whichever comes first.
+
+        Args:
+            index: Index of the equation the callout belongs to
+            callout_manager: Manager returned by ``create_callout``
+
+        Returns:
+            self: For method chaining
+        """
+        heapq.heappush(self._equation_callouts, (index, next(self._callout_order), callout_manager))
         return self
 
+    def _expire_callouts(self, previous_scroll_count, last_in_view):
+        """FadeOut animations of the callouts whose scroll index or equation was just passed."""
+        due = []
+        while self._scroll_callouts and self._scroll_callouts[0][0] < self.scroll_count:
+            scroll_index, _, callout_manager = heapq.heappop(self._scroll_callouts)
+            # Attached after its scroll index had passed: it never fires
+            if scroll_index >= previous_scroll_count:
+                due.append(callout_manager)
+        while self._equation_callouts and self._equation_callouts[0][0] < last_in_view:
+            due.append(heapq.heappop(self._equation_callouts)[2])
+
+        animations = []
+        for callout_manager in due:
+            if callout_manager.is_visible:
+                animations.append(FadeOut(callout_manager.get_callout(), shift=UP * 2))
+                callout_manager.is_visible = False
+        return animations
+
     def scroll_down(self, scene, steps=1, run_time=None):
         """Scrolls equations up and reveals new equations"""
         run_time = {} if run_time is None else {"run_time": run_time}
@@ -72,41 +313,41 @@ class ScrollManager(VGroup):
             self.last_in_view + steps : self.current_position
         ]
 
-        callout_animations = []
-
         # Increment scroll count
         previous_scroll_count = self.scroll_count
         self.scroll_count += steps
-
-        # Directly hide callouts associated with scroll_index + 1
-        for scroll_index, managers in self.callouts_by_scroll_index.items():
-            if (
-                scroll_index < self.scroll_count
-                and scroll_index >= previous_scroll_count
-            ):
-                for callout_manager in managers:
-                    if callout_manager.is_visible:
-                        callout_animations.append(
-                            FadeOut(callout_manager.get_callout(), shift=UP * 2)
-                        )
-                        callout_manager.is_visible = False
-                        print(
-                            f"Reached scroll index {self.scroll_count}, fading out callout."
-                        )
-
-        VGroup(
-            viewed_equations.copy(), self.equations[self.current_position :]
-        ).align_to(self.start_position, UP)
+        callout_animations = self._expire_callouts(previous_scroll_count, self.last_in_view + steps)
+
+        # Equations are stacked downwards, so the top one in view (or the next
+        # one to come) alone gives the shift; the pending equations are moved
+        # by it directly instead of aligning a copy of everything in view
+        first_index = min(self.last_in_view + steps, self.current_position)
+        offset = np.zeros(3)
+        if self._has_equation(first_index):
+            offset = UP * (self.start_position.get_top()[1] - self.equations[first_index].get_top()[1])
+        self.scroll_offset += offset
+        self.equations[self.current_position :].shift(offset)
+        if isinstance(self.equations, LazyEquations):
+            self.equations.shift_cursor(offset)
 
         scene.play(
-            viewed_equations.animate.align_to(self.start_position, UP),
+            viewed_equations.animate.shift(offset),
             FadeOut(hidden_equations, shift=UP * 2),
             *callout_animations,
             **run_time,
         )
         self.remove(hidden_equations)
+        self._release(self.last_in_view, self.last_in_view + steps)
         self.last_in_view += steps
 
+    def _release(self, start, stop):
+        """Lets a lazy equation source drop equations that were faded out."""
+        if isinstance(self.equations, LazyEquations):
+            for index in range(start, min(stop, self.equations.built)):
+                if self.equations[index] is not None:
+                    self._unindex_equation(self.equations[index])
+            self.equations.release(start, stop)
+
     def _is_target_in_container(self, target, container):
         """Recursively check if target is inside a container"""
         if target == container:
@@ -131,8 +372,10 @@ class ScrollManager(VGroup):
             animation_type(self.equations[self.last_in_view + i], **animation_kwargs)
             for i in range(steps)
         ]
+        animations += self._expire_callouts(self.scroll_count, self.last_in_view + steps)
 
         scene.play(*animations, **run_time)
+        self._release(self.last_in_view, self.last_in_view + steps)
         self.last_in_view += steps
 
     def fade_out_all_in_view(
@@ -149,27 +392,87 @@ class ScrollManager(VGroup):
             animation_kwargs=animation_kwargs,
         )
 
-    def _is_container_parent_of(self, potential_parent, child):
-        """Check if potential_parent is a parent/ancestor of child"""
-        # Get the parent of the child
-        if hasattr(child, "parent_mobject") and child.parent_mobject is not None:
-            parent = child.parent_mobject
-
-            # Check if this parent is our target
-            if parent == potential_parent:
-                return True
+    def _has_equation(self, index) -> bool:
+        """Whether an equation exists at index; a lazy source builds it if needed."""
+        if isinstance(self.equations, LazyEquations):
+            return self.equations.available(index + 1) > index
+        return index < len(self.equations)
+
+    def _built_equations(self):
+        if isinstance(self.equations, LazyEquations):
+            return self.equations.built
+        return len(self.equations)
+
+    def _index_equation(self, index, equation):
+        """Records equation, at index, as the owner of every mobject of its family."""
+        equation_ref = weakref.ref(equation)
+        for member in equation.get_family():
+            self._owners[id(member)] = (weakref.ref(member), equation_ref, index)
+
+    def _unindex_equation(self, equation):
+        for member in equation.get_family():
+            entry = self._owners.get(id(member))
+            if entry is not None and entry[0]() is member:
+                del self._owners[id(member)]
+
+    def _set_equation(self, index, equation):
+        """Puts equation at index and hands it the ownership of its family."""
+        previous = self.equations[index]
+        if previous is not None:
+            self._unindex_equation(previous)
+        self.equations[index] = equation
+        if index < self._indexed:
+            self._index_equation(index, equation)
+
+    def _owner_index(self, target):
+        """Index of the equation owning target according to the owner map, None if unknown."""
+        built = self._built_equations()
+        for index in range(self._indexed, built):
+            if self.equations[index] is not None:
+                self._index_equation(index, self.equations[index])
+        self._indexed = max(self._indexed, built)
+
+        entry = self._owners.get(id(target))
+        if entry is None:
+            return None
+        member_ref, equation_ref, index = entry
+        # The id may have been reused by a new mobject, or the equation
+        # replaced without going through this class
+        equation = equation_ref()
+        if member_ref() is target and equation is not None and self.equations[index] is equation:
+            return index
+        del self._owners[id(target)]
+        return None
+
+    def get_top_level_index(self, target):
+        """Index of the top-level equation (direct child of self.equations) containing target.
+
+        Answered from an id-keyed map of every mobject of the equations. A
+        mobject added to an equation after the equation appeared is found by
+        searching the equations once, then recorded too.
 
-            # If not, check the parent's parent recursively
-            return self._is_container_parent_of(potential_parent, parent)
+        Args:
+            target: Mobject to look up
 
-        return False
+        Returns:
+            The index of its equation, or None if no equation contains it
+        """
+        index = self._owner_index(target)
+        if index is not None:
+            return index
+        for index in range(self._built_equations()):
+            equation = self.equations[index]
+            if equation is not None and self._is_target_in_container(target, equation):
+                self._index_equation(index, equation)
+                return index
+        return None
 
     def get_top_level_parent(self, target):
         """Find the top-level parent equation (direct child of self.equations) containing the target."""
-        for equation in self.equations:
-            if self._is_target_in_container(target, equation):
-                return equation
-        return None  # If not found
+        index = self.get_top_level_index(target)
+        if index is None:
+            return None  # If not found
+        return self.equations[index]
 
     def replace_in_place(self, scene, index, new_content, animation_type=ReplacementTransform, run_time=None, animation_kwargs=None, move_new_content=True):
         """Replaces an equation at its current position
@@ -203,7 +506,7 @@ class ScrollManager(VGroup):
         scene.play(animation_type(original, new_content, **animation_kwargs), **run_time)
 
         # Update the equations list
-        self.equations[index] = new_content
+        self._set_equation(index, new_content)
         self.remove(original)
         # self.add(new_content)
 
@@ -243,7 +546,7 @@ class ScrollManager(VGroup):
         scene.play(new_content.animate.set_color(final_color), run_time=highlight_time)
 
         # Update the equations list
-        self.equations[index] = new_content
+        self._set_equation(index, new_content)
         self.remove(original)
         # self.add(new_content)
 
@@ -277,14 +580,14 @@ class ScrollManager(VGroup):
         scene.play(animation_type(current, original, **animation_kwargs), **run_time)
 
         # Update the equations list
-        self.equations[index] = original
+        self._set_equation(index, original)
         self.remove(current)
         self.add(original)
 
         # Remove from replacements dictionary
         del self.replacements[index]
 
-    def cascade_update(self, scene, start_index, new_contents, cascade_delay=0.2, run_time=1, animation_type=ReplacementTransform):
+    def cascade_update(self, scene, start_index, new_contents, cascade_delay=0.2, run_time=1, animation_type=ReplacementTransform, batched=False):
         """Updates multiple equations in a cascading sequence
         
         Args:
@@ -294,10 +597,18 @@ class ScrollManager(VGroup):
             cascade_delay: Delay between successive animations in seconds (default: 0.2)
             run_time: Duration of each replacement animation in seconds (default: 1)
             animation_type: Animation to use for replacement (default: Transform)
+            batched: Play the whole cascade as one LaggedStart with the same
+                timing, one partial movie instead of one per play and wait;
+                ignored when run_time is not positive (default: False)
         """
         if start_index < self.last_in_view or start_index + len(new_contents) > self.current_position:
             raise IndexError(f"Replacement range {start_index}-{start_index + len(new_contents) - 1} is outside visible range")
 
+        # The lag of the batched cascade is relative to run_time
+        if batched and run_time > 0:
+            self._cascade_update_batched(scene, start_index, new_contents, cascade_delay, run_time, animation_type)
+            return
+
         for i, new_content in enumerate(new_contents):
             index = start_index + i
 
@@ -314,13 +625,37 @@ class ScrollManager(VGroup):
             scene.play(animation_type(original, new_content), run_time=run_time)
 
             # Update the equations list
-            self.equations[index] = new_content
+            self._set_equation(index, new_content)
             self.remove(original)
 
             # Add delay between animations if not the last one
             if i < len(new_contents) - 1:
                 scene.wait(cascade_delay)
 
+    def _cascade_update_batched(self, scene, start_index, new_contents, cascade_delay, run_time, animation_type):
+        """cascade_update in a single play: each replacement starts run_time + cascade_delay after the previous one."""
+        pairs = []
+        for i, new_content in enumerate(new_contents):
+            index = start_index + i
+            if self.equations[index] is None:
+                continue
+            original = self.equations[index]
+            new_content.move_to(original.get_center())
+            pairs.append((index, original, new_content))
+        if not pairs:
+            return
+
+        # Not run_time on the group: that would rescale the whole cascade
+        scene.play(LaggedStart(
+            *[animation_type(original, new_content, run_time=run_time) for _, original, new_content in pairs],
+            lag_ratio=(run_time + cascade_delay) / run_time,
+        ))
+
+        for index, original, new_content in pairs:
+            self.replacements[index] = original
+            self._set_equation(index, new_content)
+            self.remove(original)
+
     def fade_in_from_target(self, scene, target, steps=1, run_time=None, animation_kwargs=None):
         """Fades in the next equation(s) from a target position
         
@@ -338,8 +673,12 @@ class ScrollManager(VGroup):
         animation_kwargs = {} if animation_kwargs is None else animation_kwargs
 
         # Make sure we have enough equations left
-        if self.current_position + steps > len(self.equations):
-            steps = len(self.equations) - self.current_position
+        if isinstance(self.equations, LazyEquations):
+            available = self.equations.available(self.current_position + steps)
+        else:
+            available = len(self.equations)
+        if self.current_position + steps > available:
+            steps = available - self.current_position
             if steps <= 0:
                 print("No more equations to display.")
                 return self
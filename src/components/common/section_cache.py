@@ -0,0 +1,238 @@
+"""Partial movie caching per voiceover block.
+
+manim names the partial movie file of each ``play`` call after a hash of the
+camera, the animations and every mobject of the scene, computed by
+serializing all of them to JSON. On a long tutorial that is slow enough that
+templates render with ``--disable_caching`` and every edit re-renders the
+whole scene.
+
+``SectionCache`` replaces that hash, for the scenes it is installed on, by a
+cheap one: the points and style arrays of every mobject are hashed as raw
+bytes with blake2b. The hashes are chained within a voiceover block, and the
+chain restarts at each block from the mobject state going into it and the
+content of its audio. An edit therefore changes the hashes of the blocks it
+affects only; every other block keeps its partial movie files and the final
+video is spliced from cached and new ones as usual.
+
+Example:
+    class MyTutorial(MathTutorialScene):
+        cache_sections = True
+"""
+
+import functools
+import hashlib
+import types
+from enum import Enum
+from pathlib import Path
+
+import numpy as np
+from manim import *
+from manim.renderer import cairo_renderer
+
+
+# Partial movie files kept in the cache; manim's default (100) is less than
+# the play calls of one tutorial, so it would evict them during the render
+SECTION_CACHE_FILES = 20000
+
+# Mobject attributes hashed as arrays and as plain values
+_STATE_ARRAYS = (
+    "points", "fill_rgbas", "stroke_rgbas", "background_stroke_rgbas", "sheen_direction", "pixel_array",
+)
+_STATE_VALUES = (
+    "stroke_width", "background_stroke_width", "sheen_factor", "z_index", "joint_type", "cap_style",
+)
+
+# Depth up to which containers in animation attributes are hashed
+_MAX_DEPTH = 3
+
+
+def _hash_array(h, array) -> None:
+    array = np.ascontiguousarray(array)
+    h.update(f"{array.dtype}{array.shape}".encode())
+    h.update(array.tobytes())
+
+
+def hash_mobject(h, mobject: Mobject, depth=0) -> None:
+    """Feeds the drawn state of mobject and its family, updaters included, to the blake2b object h."""
+    for member in mobject.get_family():
+        h.update(type(member).__name__.encode())
+        for name in _STATE_ARRAYS:
+            value = getattr(member, name, None)
+            if isinstance(value, np.ndarray):
+                _hash_array(h, value)
+        for name in _STATE_VALUES:
+            h.update(repr(getattr(member, name, None)).encode())
+        for updater in getattr(member, "updaters", ()):
+            _hash_value(h, updater, depth + 1)
+
+
+def _hash_code(h, code: types.CodeType) -> None:
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # Nested functions and lambdas
+            _hash_code(h, const)
+        elif isinstance(const, frozenset):
+            # Iteration order of a frozenset of strings changes between processes
+            h.update(repr(sorted(map(repr, const))).encode())
+        else:
+            h.update(repr(const).encode())
+
+
+def _hash_function(h, function: types.FunctionType, depth) -> None:
+    """Feeds the code of function and the values it closes over to h, like manim's own hash."""
+    h.update(function.__qualname__.encode())
+    _hash_code(h, function.__code__)
+    _hash_value(h, function.__defaults__, depth + 1)
+    _hash_value(h, function.__kwdefaults__, depth + 1)
+    for cell in function.__closure__ or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            # Cell of a variable not assigned yet
+            contents = None
+        _hash_value(h, contents, depth + 1)
+
+
+def _hash_value(h, value, depth=0) -> None:
+    """Feeds an attribute of an animation to h, as far as it can affect the frames."""
+    if isinstance(value, Mobject):
+        if depth < _MAX_DEPTH:
+            hash_mobject(h, value, depth)
+        else:
+            h.update(type(value).__name__.encode())
+    elif isinstance(value, Animation):
+        _hash_animation(h, value, depth)
+    elif isinstance(value, np.ndarray):
+        _hash_array(h, value)
+    elif isinstance(value, (str, int, float, bool, type(None), Enum)):
+        h.update(repr(value).encode())
+    elif hasattr(value, "to_hex"):
+        # ManimColor
+        h.update(value.to_hex().encode())
+    elif isinstance(value, (list, tuple)) and depth < _MAX_DEPTH:
+        h.update(b"[")
+        for item in value:
+            _hash_value(h, item, depth + 1)
+        h.update(b"]")
+    elif isinstance(value, dict) and depth < _MAX_DEPTH:
+        for key in sorted(value, key=str):
+            h.update(str(key).encode())
+            _hash_value(h, value[key], depth + 1)
+    elif isinstance(value, types.FunctionType) and depth < _MAX_DEPTH:
+        # Lambdas and closures share a qualname whatever values they capture
+        _hash_function(h, value, depth)
+    elif isinstance(value, types.MethodType) and depth < _MAX_DEPTH:
+        _hash_value(h, value.__func__, depth + 1)
+        _hash_value(h, value.__self__, depth + 1)
+    elif isinstance(value, functools.partial) and depth < _MAX_DEPTH:
+        _hash_value(h, value.func, depth + 1)
+        _hash_value(h, value.args, depth + 1)
+        _hash_value(h, value.keywords, depth + 1)
+    elif callable(value):
+        h.update(getattr(value, "__qualname__", type(value).__name__).encode())
+    else:
+        h.update(type(value).__name__.encode())
+
+
+def _hash_animation(h, animation: Animation, depth=0) -> None:
+    h.update(type(animation).__name__.encode())
+    for name, value in sorted(vars(animation).items()):
+        h.update(name.encode())
+        _hash_value(h, value, depth + 1)
+
+
+def _hash_camera(h, camera) -> None:
+    for name in ("pixel_width", "pixel_height", "frame_rate", "frame_width", "frame_height", "background_opacity"):
+        h.update(repr(getattr(camera, name, None)).encode())
+    _hash_value(h, getattr(camera, "background_color", None))
+    _hash_value(h, getattr(camera, "frame_center", None))
+    frame = getattr(camera, "frame", None)
+    if isinstance(frame, Mobject):
+        # MovingCamera
+        hash_mobject(h, frame)
+
+
+class SectionCache:
+    """Hash chain naming the partial movie files of one scene.
+
+    Args:
+        scene: Scene whose play calls are hashed
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.blocks = 0
+        # Play hash and max_files_cached before install_section_cache
+        self._previous = None
+        self._chain = hashlib.blake2b(b"scene").digest()
+
+    def start_block(self, audio_file=None) -> None:
+        """Restarts the chain at a voiceover block: from the mobjects on screen and its audio."""
+        h = hashlib.blake2b(b"block")
+        for mobject in [*self.scene.mobjects, *getattr(self.scene, "frozen_mobjects", [])]:
+            hash_mobject(h, mobject)
+        if audio_file is not None:
+            try:
+                h.update(Path(audio_file).read_bytes())
+            except OSError:
+                h.update(str(audio_file).encode())
+        self._chain = h.digest()
+        self.blocks += 1
+
+    def play_hash(self, camera, animations, mobjects) -> str:
+        """Name of the partial movie of the play call about to run."""
+        h = hashlib.blake2b(self._chain)
+        _hash_camera(h, camera)
+        # Sorted like manim does, so the order of play arguments does not matter
+        for animation in sorted(animations, key=str):
+            _hash_animation(h, animation)
+        # Frozen mobjects are drawn from the camera background (see freeze)
+        frozen = getattr(self.scene, "frozen_mobjects", [])
+        for mobject in [*mobjects, *self.scene.foreground_mobjects, *frozen]:
+            hash_mobject(h, mobject)
+        self._chain = h.digest()
+        return f"nammi_{h.hexdigest()[:32]}"
+
+
+_manim_play_hash = cairo_renderer.get_hash_from_play_call
+
+
+def _play_hash(scene, camera, animations, mobjects) -> str:
+    cache = getattr(scene, "section_cache", None)
+    if cache is None:
+        return _manim_play_hash(scene, camera, animations, mobjects)
+    return cache.play_hash(camera, animations, mobjects)
+
+
+def install_section_cache(scene) -> SectionCache:
+    """Names the partial movies of scene with a SectionCache; returns it.
+
+    Other scenes keep manim's hash. Caching must not be disabled
+    (``--disable_caching``) for partial movies to be reused. The hook and
+    ``max_files_cached`` are put back by ``uninstall_section_cache``.
+    """
+    cache = SectionCache(scene)
+    cache._previous = (cairo_renderer.get_hash_from_play_call, config.max_files_cached)
+    cairo_renderer.get_hash_from_play_call = _play_hash
+    config.max_files_cached = max(config.max_files_cached, SECTION_CACHE_FILES)
+    if config.disable_caching:
+        print("Section cache inactive: caching is disabled (--disable_caching)")
+    scene.section_cache = cache
+    return cache
+
+
+def uninstall_section_cache(scene) -> None:
+    """Restores manim's play hash and ``max_files_cached`` as they were before install_section_cache.
+
+    Call it once the scene has finished (its partial movies are combined and
+    the cache cleaned), see ``MathTutorialScene.render``.
+    """
+    cache = getattr(scene, "section_cache", None)
+    if cache is None or cache._previous is None:
+        return
+    hook, max_files_cached = cache._previous
+    cairo_renderer.get_hash_from_play_call = hook
+    config.max_files_cached = max_files_cached
+    cache._previous = None
@@ -1,9 +1,135 @@
 """Smart TeX utilities for Manim animations."""
 
+import hashlib
+import itertools
+import json
+import os
+import threading
+import warnings
+import weakref
+from collections import OrderedDict, deque, namedtuple
+from functools import lru_cache
+from pathlib import Path
+
 from manim import *
 from typing import Dict, List, Union, Optional, Tuple
 
-def search_shape_in_text(text: VMobject, shape: VMobject, index=0, threshold=100000):
+from .tex_batch import build_batched, is_recording, prerender_tex
+
+
+# Directory holding the re-rendered glyph outlines used by the shape search.
+# Defaults to a ``shapes`` folder next to manim's own tex cache so it is shared
+# by every scene (and every render process) of the project.
+SHAPE_CACHE_ENV = "NAMMI_SHAPE_CACHE"
+
+
+@lru_cache(maxsize=None)
+def _search_template() -> TexTemplate:
+    """The txfonts template every shape search re-renders with."""
+    template = TexTemplate()
+    template.add_to_preamble(
+        r"""
+        \usepackage[T1]{fontenc}
+        \usepackage{txfonts}
+        """
+    )
+    return template
+
+
+def shape_cache_dir() -> Path:
+    """Returns the directory of the on-disk glyph shape cache."""
+    cache_dir = os.environ.get(SHAPE_CACHE_ENV)
+    if cache_dir:
+        return Path(cache_dir)
+    return Path(config.get_dir("tex_dir")) / "shapes"
+
+
+def _shape_cache_key(mobject_type: str, tex_strings, template: TexTemplate, environment: str) -> str:
+    """Content address of one re-rendering: tex string(s), template and environment."""
+    payload = json.dumps(
+        [mobject_type, list(tex_strings), template.tex_compiler, template.body, environment]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _load_glyph_points(key: str):
+    """Reads the glyph point arrays stored under key, or None if they are not cached."""
+    path = shape_cache_dir() / f"{key}.npz"
+    if not path.exists():
+        return None
+    try:
+        with np.load(path) as data:
+            points, glyph_sizes, group_sizes = data["points"], data["glyph_sizes"], data["group_sizes"]
+    except (OSError, ValueError, KeyError):
+        # A truncated or foreign file is treated as a miss and rewritten
+        return None
+    glyphs = np.split(points, np.cumsum(glyph_sizes)[:-1]) if len(glyph_sizes) else []
+    groups, start = [], 0
+    for size in group_sizes:
+        groups.append(glyphs[start : start + size])
+        start += size
+    return groups
+
+
+def _store_glyph_points(key: str, groups) -> None:
+    """Writes the glyph point arrays of a rendering to the cache (atomically)."""
+    glyphs = [glyph for group in groups for glyph in group]
+    cache_dir = shape_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{key}.npz"
+    # Unique per writer: threads of one process may store the same key
+    tmp_path = cache_dir / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    np.savez(
+        tmp_path,
+        points=np.concatenate(glyphs) if glyphs else np.zeros((0, 3)),
+        glyph_sizes=np.array([len(glyph) for glyph in glyphs], dtype=np.int64),
+        group_sizes=np.array([len(group) for group in groups], dtype=np.int64),
+    )
+    # Several render processes and threads may fill the cache at once; replace is atomic
+    os.replace(tmp_path, path)
+
+
+def _glyph_points(mobject: VMobject):
+    """Point arrays of every glyph, grouped like ``mobject.submobjects``."""
+    return [[glyph.points for glyph in group.submobjects] for group in mobject.submobjects]
+
+
+def _search_glyphs(mobject: VMobject):
+    """Glyph point arrays of mobject as the shape search sees them.
+
+    Tex and MathTex objects are re-rendered with the txfonts template so that
+    shapes coming from different templates can be compared. Re-renderings are
+    cached on disk, keyed by their tex string(s), template and environment, so
+    the same expression is only compiled once across calls, scenes and processes.
+    """
+    template = _search_template()
+    if hasattr(mobject, "tex_string") and not isinstance(mobject, Tex):
+        mobject_type, tex_strings, environment = "MathTex", [mobject.tex_string], "align*"
+    elif hasattr(mobject, "tex_strings"):
+        mobject_type, tex_strings, environment = "Tex", list(mobject.tex_strings), "center"
+    else:
+        return _glyph_points(mobject)
+
+    return _rendered_glyphs(mobject_type, tex_strings, template, environment)
+
+
+def _rendered_glyphs(mobject_type: str, tex_strings, template: TexTemplate, environment: str):
+    """Glyph point arrays of tex_strings rendered with template, through the disk cache."""
+    key = _shape_cache_key(mobject_type, tex_strings, template, environment)
+    groups = _load_glyph_points(key)
+    if groups is None:
+        if mobject_type == "MathTex":
+            rendered = MathTex(*tex_strings, tex_template=template)
+        else:
+            rendered = Tex(*tex_strings, tex_template=template)
+        groups = _glyph_points(rendered)
+        # While recording (see tex_batch) the glyphs are placeholders
+        if not is_recording():
+            _store_glyph_points(key, groups)
+    return groups
+
+
+def search_shape_in_text(text: VMobject, shape: VMobject, index=0, threshold=None, match="exact"):
     r"""Receives two VMobjects resulting from rendering text (either by Tex, Text
     or MathTex) and looks for occurrences of the second in the first, but comparing
     the shapes and not the text itself.
@@ -16,10 +142,12 @@ def search_shape_in_text(text: VMobject, shape: VMobject, index=0, threshold=100
     element of that list is a slice because the text may span more than one
     element of text[0].
     
-    The parameter threshold influences the result. With its default value of None
-    the matching of shapes can produce some false positives (but this is how manim's
-    TransformMatchingShapes works too). You can give it very large values (above 100000)
-    to reduce the chance of false positives, at the cost of a little longer run time.
+    Shapes are compared through a fingerprint of their outline points, centered
+    and scaled to unit height and snapped to a grid of 1/100 of that height. The
+    parameter threshold no longer has any effect and is deprecated.
+    With match="outline" the shapes are compared by their outlines within a
+    tolerance, which also finds the pattern in other TeX sizes (see
+    ``ExpressionShapeIndex``).
     
     Example (changing the color of all x's):
        gx = MathTex(r'''
@@ -36,66 +164,680 @@ def search_shape_in_text(text: VMobject, shape: VMobject, index=0, threshold=100
         self.wait()
     """
 
-    # Define the font template
-    template = TexTemplate()
-    template.add_to_preamble(
-        r"""
-        \usepackage[T1]{fontenc}
-        \usepackage{txfonts}
+    _warn_threshold(threshold)
+    return ExpressionShapeIndex.of(text, index).find(shape, match)
+
+
+def _warn_threshold(threshold) -> None:
+    if threshold is not None:
+        warnings.warn(
+            "threshold no longer has any effect on the shape search and will be removed",
+            DeprecationWarning,
+            stacklevel=3,
+        )
+
+
+# Fingerprints quantize normalized coordinates to 1/100 of the shape height
+_FINGERPRINT_GRID = 100
+
+
+# Outline matching: points sampled per glyph outline, samples per Bézier curve,
+# and the default tolerances, in units of the glyph (or window) height
+_OUTLINE_SAMPLES = 48
+_CURVE_SAMPLES = 8
+OUTLINE_TOLERANCE = 0.05
+LAYOUT_TOLERANCE = 0.15
+
+
+def _pack_glyphs(glyphs: list) -> tuple:
+    """Flattens glyph point arrays for batched fingerprinting.
+
+    Returns:
+        (points, offsets, mins, maxs): all points concatenated, the offset of
+        each glyph in points (plus the total length), and the per-glyph corners
+        of the bounding box (+inf/-inf for glyphs without points)
+    """
+    sizes = np.array([len(glyph) for glyph in glyphs], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    points = np.concatenate(glyphs) if len(glyphs) else np.zeros((0, 3))
+    mins = np.full((len(glyphs), 3), np.inf)
+    maxs = np.full((len(glyphs), 3), -np.inf)
+    filled = sizes > 0
+    if filled.any():
+        mins[filled] = np.minimum.reduceat(points, offsets[:-1][filled], axis=0)
+        maxs[filled] = np.maximum.reduceat(points, offsets[:-1][filled], axis=0)
+    return points, offsets, mins, maxs
+
+
+def _window_bounds(packed: tuple, starts: np.ndarray, length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Bounding box center and height of the windows of ``length`` glyphs at starts."""
+    _, _, mins, maxs = packed
+    if length == 1:
+        lo, hi = mins[starts], maxs[starts]
+    else:
+        windows = np.lib.stride_tricks.sliding_window_view
+        lo = windows(mins, length, axis=0).min(axis=-1)[starts]
+        hi = windows(maxs, length, axis=0).max(axis=-1)[starts]
+    with np.errstate(invalid="ignore"):
+        center = (lo + hi) / 2
+        height = hi[:, 1] - lo[:, 1]
+    # Flat shapes are only centered, like Mobject.scale_to_fit_height does
+    return center, np.where(height > 0, height, 1.0)
+
+
+def _window_keys(packed: tuple, starts, length: int) -> List[int]:
+    """Fingerprints of the windows of ``length`` glyphs starting at each of starts.
+
+    Each window is centered on its bounding box, scaled to unit height and
+    snapped to an integer grid, all windows at once, then the raw bytes of
+    every window are hashed. Nothing is copied into mobjects or formatted.
+    """
+    points, offsets, _, _ = packed
+    starts = np.asarray(starts, dtype=np.int64)
+    if len(starts) == 0:
+        return []
+
+    center, height = _window_bounds(packed, starts, length)
+    begin, counts = offsets[starts], offsets[starts + length] - offsets[starts]
+    ends = np.cumsum(counts)
+    window = np.repeat(np.arange(len(starts)), counts)
+    point_index = np.arange(ends[-1]) - np.repeat(ends - counts - begin, counts)
+    grid = np.rint(
+        (points[point_index] - center[window]) / height[window, None] * _FINGERPRINT_GRID
+    ).astype(np.int64)
+
+    return [
+        int.from_bytes(hashlib.blake2b(grid[end - count : end].data, digest_size=8).digest(), "little")
+        for end, count in zip(ends, counts)
+    ]
+
+
+def _shape_key(points: np.ndarray) -> int:
+    """Hash of a shape once it is centered and scaled to unit height."""
+    return _window_keys(_pack_glyphs([points]), [0], 1)[0]
+
+
+# Glyph fingerprints are interned to small integers shared by every index, so
+# expressions and patterns can be compared as plain integer sequences. IDs come
+# from a counter and are never reused, so IDs from before a reset of the table
+# can only fail to match, never match a different glyph.
+_GLYPH_IDS: Dict[int, int] = {}
+_GLYPH_IDS_LOCK = threading.Lock()
+_NEXT_GLYPH_ID = itertools.count()
+
+# Fingerprints interned before the table is reset (see _trim_glyph_ids)
+GLYPH_IDS_MAXSIZE = 200_000
+
+# Incremented at each reset; indexes and patterns re-intern their glyphs when it changes
+_glyph_id_generation = 0
+
+
+def _glyph_ids(glyphs: list, packed=None) -> List[int]:
+    """Integer glyph IDs of a list of glyph point arrays."""
+    if packed is None:
+        packed = _pack_glyphs(glyphs)
+    keys = _window_keys(packed, range(len(glyphs)), 1)
+    # Tex worker threads intern glyphs too; two fingerprints must never share an ID
+    with _GLYPH_IDS_LOCK:
+        ids = []
+        for key in keys:
+            glyph_id = _GLYPH_IDS.get(key)
+            if glyph_id is None:
+                glyph_id = _GLYPH_IDS[key] = next(_NEXT_GLYPH_ID)
+            ids.append(glyph_id)
+        return ids
+
+
+def _reset_glyph_ids() -> None:
+    global _glyph_id_generation
+    with _GLYPH_IDS_LOCK:
+        _GLYPH_IDS.clear()
+        _glyph_id_generation += 1
+
+
+def _trim_glyph_ids() -> None:
+    """Resets the glyph ID table once it holds GLYPH_IDS_MAXSIZE fingerprints.
+
+    Only called before a lookup starts (``ExpressionShapeIndex.of``), so the
+    IDs compared within one search always come from the same table.
+    """
+    if len(_GLYPH_IDS) >= GLYPH_IDS_MAXSIZE:
+        _reset_glyph_ids()
+
+
+def _kmp_search(sequence: list, pattern: list) -> List[int]:
+    """Start positions of every (possibly overlapping) occurrence of pattern in sequence."""
+    if not pattern:
+        return []
+
+    # failure[i] is the length of the longest proper border of pattern[: i + 1]
+    failure = [0] * len(pattern)
+    k = 0
+    for i in range(1, len(pattern)):
+        while k and pattern[i] != pattern[k]:
+            k = failure[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        failure[i] = k
+
+    starts = []
+    k = 0
+    for i, item in enumerate(sequence):
+        while k and item != pattern[k]:
+            k = failure[k - 1]
+        if item == pattern[k]:
+            k += 1
+        if k == len(pattern):
+            starts.append(i - k + 1)
+            k = failure[k - 1]
+    return starts
+
+
+class _GlyphAutomaton:
+    """Aho-Corasick automaton over glyph ID sequences.
+
+    Finds every occurrence of every pattern in a single pass over an expression,
+    so the cost of a lookup grows with the expression, not with the number of
+    patterns searched for.
+    """
+
+    def __init__(self, patterns: List[tuple]):
+        self.lengths = [len(pattern) for pattern in patterns]
+        self.goto: List[dict] = [{}]
+        self.fail = [0]
+        self.out: List[List[int]] = [[]]
+
+        # Trie of all patterns
+        for number, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            node = 0
+            for glyph_id in pattern:
+                child = self.goto[node].get(glyph_id)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto[node][glyph_id] = child
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = child
+            self.out[node].append(number)
+
+        # Failure links, breadth first so shallower nodes are always ready
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for glyph_id, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and glyph_id not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(glyph_id, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def search(self, sequence: list):
+        """Yields (start, pattern number) for every occurrence of every pattern."""
+        node = 0
+        for i, glyph_id in enumerate(sequence):
+            while node and glyph_id not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(glyph_id, 0)
+            for number in self.out[node]:
+                yield i - self.lengths[number] + 1, number
+
+
+class ExpressionShapeIndex:
+    """Shape index of one expression, built once and queried many times.
+
+    Every glyph of ``text[index]`` is fingerprinted once and mapped to an integer
+    glyph ID. A pattern is then located with a linear-time substring search (KMP)
+    over the ID sequence instead of hashing every window of the expression.
+
+    With ``match="outline"`` glyphs are compared by their resampled outlines
+    within a tolerance instead of by exact fingerprint, so one rendering of a
+    pattern also finds it in script and scriptscript sizes.
+
+    ``ExpressionShapeIndex.of(text)`` returns the index already built for the
+    same expression, so repeated searches never re-render it.
+
+    Example:
+        shapes = ExpressionShapeIndex.of(equation)
+        equal_sign = equation[0][shapes.find(MathTex("="))[0]]
+        xs = shapes.find(MathTex("x"))
+        all_xs = shapes.find("x", match="outline")
+    """
+
+    def __init__(self, text: VMobject, index=0, threshold=None):
+        _warn_threshold(threshold)
+        self.index = index
+        self.glyphs = _search_glyphs(text)[index]
+        self._packed = _pack_glyphs(self.glyphs)
+        self.generation = _glyph_id_generation
+        self.glyph_ids = _glyph_ids(self.glyphs, packed=self._packed)
+        self._outlines = None
+
+    @classmethod
+    def of(cls, text: VMobject, index=0) -> "ExpressionShapeIndex":
+        """Returns the index of ``text[index]``, building it only the first time.
+
+        Indexes are held in a weak-keyed cache, so they live as long as the
+        expression does, and are rebuilt only if its tex string changes. The
+        index keeps no reference to text. The slices found by the expression's
+        ``ExpressionQuery`` objects share the entry, so they are dropped along
+        with its indexes.
         """
-    )
+        _trim_glyph_ids()
+        signature = _tex_signature(text)
+        if signature is None:
+            # Plain VMobjects are indexed from their live points, which may change
+            return cls(text, index)
+
+        cached = _INDEX_CACHE.get(text)
+        if cached is not None and cached[0] == signature and index in cached[1]:
+            return cached[1][index]
+
+        shape_index = cls(text, index)
+        if is_recording():
+            # Built from placeholder glyphs (see tex_batch)
+            return shape_index
+        _expression_cache(text, signature)[1][index] = shape_index
+        return shape_index
+
+    def __len__(self):
+        return len(self.glyphs)
+
+    def _refresh_glyph_ids(self) -> None:
+        """Re-interns the glyphs after a reset of the glyph ID table."""
+        if self.generation != _glyph_id_generation:
+            self.generation = _glyph_id_generation
+            self.glyph_ids = _glyph_ids(self.glyphs, packed=self._packed)
+
+    @property
+    def outlines(self) -> np.ndarray:
+        """Outline descriptors of every glyph, computed on first use."""
+        if self._outlines is None:
+            self._outlines = _outline_descriptors(self.glyphs)
+        return self._outlines
+
+    def find(self, shape: Union[str, VMobject], match="exact", tolerance=OUTLINE_TOLERANCE) -> List[slice]:
+        """Returns the slices of ``text[index]`` that have the same shape as ``shape[0]``.
+
+        shape may also be a tex string, which is served by ``pattern_library``
+        instead of being rendered as a new MathTex.
+
+        Args:
+            shape: Pattern to look for
+            match: "exact" (same fingerprint) or "outline" (same outline up to
+                tolerance, at any size)
+            tolerance: Largest outline distance accepted in "outline" mode, in
+                units of the glyph height
+        """
+        self._refresh_glyph_ids()
+        glyphs, glyph_ids = _pattern(shape)
+        if _match_mode(match) == "outline":
+            return _outline_search(self, glyphs, tolerance)
+        return _do_shape_search(self, glyphs, glyph_ids)
 
+    def find_many(self, shapes_by_key: dict, match="exact", tolerance=OUTLINE_TOLERANCE) -> dict:
+        """Resolves several patterns against the expression in a single pass.
+
+        Args:
+            shapes_by_key: Dictionary mapping any key to the list of shapes
+                (variants) searched for that key; shapes may be tex strings
+            match: "exact" or "outline", see ``find``
+            tolerance: Outline tolerance, see ``find``
+
+        Returns:
+            Dictionary mapping each key to its slices, concatenated variant by
+            variant exactly like consecutive ``find`` calls would return them
+        """
+        if _match_mode(match) == "outline":
+            return {
+                key: [found for shape in shapes for found in self.find(shape, match, tolerance)]
+                for key, shapes in shapes_by_key.items()
+            }
+
+        self._refresh_glyph_ids()
+        variants = []
+        patterns: Dict[tuple, int] = {}
+        for key, shapes in shapes_by_key.items():
+            for shape in shapes:
+                glyphs, glyph_ids = _pattern(shape)
+                # Variants that render to the same glyphs share one automaton pattern
+                patterns.setdefault(glyph_ids, len(patterns))
+                variants.append((key, glyphs, glyph_ids))
+
+        starts: List[List[int]] = [[] for _ in patterns]
+        for start, number in _GlyphAutomaton(list(patterns)).search(self.glyph_ids):
+            starts[number].append(start)
+
+        results = {key: [] for key in shapes_by_key}
+        for key, glyphs, glyph_ids in variants:
+            results[key] += _confirm_windows(self, glyphs, starts[patterns[glyph_ids]])
+        return results
+
+
+# Expression -> (tex signature, {index: ExpressionShapeIndex}, {index: {pattern: slices}}),
+# see ExpressionShapeIndex.of and ExpressionQuery.of
+_INDEX_CACHE: "weakref.WeakKeyDictionary[VMobject, tuple]" = weakref.WeakKeyDictionary()
+
+
+def _expression_cache(text: VMobject, signature: tuple) -> tuple:
+    """The cache entry of text, emptied first if its tex string changed."""
+    cached = _INDEX_CACHE.get(text)
+    if cached is None or cached[0] != signature:
+        cached = (signature, {}, {})
+        _INDEX_CACHE[text] = cached
+    return cached
+
+
+def _tex_signature(text: VMobject) -> Optional[tuple]:
+    """What the shape search renders text from, or None for non-tex mobjects."""
     if hasattr(text, "tex_string") and not isinstance(text, Tex):
-        text_copy = MathTex(text.tex_string, tex_template=template)
-    elif hasattr(text, "tex_strings"):
-        text_copy = Tex(*text.tex_strings, tex_template=template)
-    else:
-        text_copy = text
+        return ("MathTex", text.tex_string)
+    if hasattr(text, "tex_strings"):
+        return ("Tex", tuple(text.tex_strings))
+    return None
 
-    if hasattr(shape, "tex_string") and not isinstance(shape, Tex):
-        shape_copy = MathTex(shape.tex_string, tex_template=template)
-    elif hasattr(shape, "tex_strings"):
-        shape_copy = Tex(*shape.tex_strings, tex_template=template)
-    else:
-        shape_copy = shape
 
-    # Perform the shape search
-    results = _do_shape_search(text_copy, shape_copy, index, threshold)
+def _do_shape_search(shape_index: ExpressionShapeIndex, shape_glyphs: list, shape_ids=None) -> List[slice]:
+    """Internal function that does the actual shape searching.
 
-    return results
+    Candidates come from a KMP search of the pattern's glyph IDs over the glyph
+    IDs of the expression, then go through ``_confirm_windows``.
+    """
+    if shape_ids is None:
+        shape_ids = _glyph_ids(shape_glyphs)
+    starts = _kmp_search(shape_index.glyph_ids, list(shape_ids))
+    return _confirm_windows(shape_index, shape_glyphs, starts)
 
 
-def _do_shape_search(text: VMobject, shape: VMobject, index=0, threshold=100000):
-    """Internal function that does the actual shape searching"""
+def _confirm_windows(shape_index: ExpressionShapeIndex, shape_glyphs: list, starts: List[int]) -> List[slice]:
+    """Turns candidate start positions into slices.
 
-    def get_mobject_key(mobject: Mobject) -> int:
-        mobject.save_state().center().scale_to_fit_height(1)
-        r = np.array2string(
-            mobject.points,
-            precision=2,
-            separator=" ",
-            suppress_small=True,
-            threshold=threshold,
-        )
-        r = r.replace("-0. ", " 0. ")
-        mobject.restore()
-        return hash(r)
+    Windows of more than one glyph are confirmed by comparing the fingerprint of
+    the whole window, which also captures how the glyphs are placed relative to
+    each other.
+    """
+    l = len(shape_glyphs)
+    if l == 0:
+        return []
+
+    if l == 1:
+        return [slice(i, i + 1) for i in starts]
+
+    shape_key = _shape_key(np.concatenate(shape_glyphs))
+    window_keys = _window_keys(shape_index._packed, starts, l)
+    return [slice(i, i + l) for i, key in zip(starts, window_keys) if key == shape_key]
+
+
+def _match_mode(match: str) -> str:
+    if match not in ("exact", "outline"):
+        raise ValueError(f"Unknown match mode {match!r}, expected 'exact' or 'outline'")
+    return match
+
+
+def _subpaths(points: np.ndarray) -> List[np.ndarray]:
+    """Sampled polylines of the subpaths of a glyph, e.g. the dot and the stem of "i".
+
+    A subpath ends wherever a cubic Bézier curve does not start at the end of
+    the previous one. Point arrays that are not made of curves are one polyline.
+    """
+    xy = points[:, :2]
+    if len(xy) % 4:
+        return [xy]
+    curves = xy.reshape(-1, 4, 2)
+    t = np.linspace(0, 1, _CURVE_SAMPLES)[:, None]
+    bernstein = np.hstack([(1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t**2, t**3])
+    sampled = np.einsum("sk,ckd->csd", bernstein, curves)
+    breaks = np.flatnonzero(~np.isclose(curves[1:, 0], curves[:-1, 3]).all(axis=1)) + 1
+    return [part.reshape(-1, 2) for part in np.split(sampled, breaks)]
+
+
+def _resample(part: np.ndarray, count: int) -> np.ndarray:
+    """count points at equal distances along a polyline, both of its ends included."""
+    segments = np.linalg.norm(np.diff(part, axis=0), axis=1)
+    arc = np.concatenate([[0], np.cumsum(segments)])
+    if arc[-1] == 0:
+        return np.repeat(part[:1], count, axis=0)
+    at = np.linspace(0, arc[-1], count)
+    segment = np.clip(np.searchsorted(arc, at, side="right") - 1, 0, len(segments) - 1)
+    fraction = (at - arc[segment]) / np.where(segments[segment] > 0, segments[segment], 1.0)
+    return part[segment] + fraction[:, None] * (part[segment + 1] - part[segment])
+
+
+def _outline_descriptor(points: np.ndarray) -> np.ndarray:
+    """The outline of a glyph resampled at evenly spaced arc lengths.
+
+    The cubic Bézier curves of the glyph are sampled, centered on their bounding
+    box and scaled to unit height. Its subpaths are taken top to bottom, left
+    to right (the longest first where they share a center), so the descriptor
+    does not depend on the order the font lists them in, and each one gets a
+    fixed share of the _OUTLINE_SAMPLES points, taken at equal distances along
+    it. The shares only depend on the number of subpaths: shares following the
+    lengths would move a sample from one subpath to the next whenever a length
+    crosses a rounding boundary. Descriptors of the same glyph at different TeX
+    sizes are close even where the fonts differ slightly.
+    """
+    if len(points) == 0:
+        return np.zeros((_OUTLINE_SAMPLES, 2))
+    parts = _subpaths(points)
+    xy = np.concatenate(parts)
+    lo, hi = xy.min(axis=0), xy.max(axis=0)
+    height = hi[1] - lo[1]
+    scale = height if height > 0 else 1.0
+    parts = [(part - (lo + hi) / 2) / scale for part in parts]
+
+    lengths = [np.linalg.norm(np.diff(part, axis=0), axis=1).sum() for part in parts]
+    order = sorted(
+        range(len(parts)),
+        key=lambda k: (
+            -np.round((parts[k][:, 1].min() + parts[k][:, 1].max()) / 2, 2),
+            np.round((parts[k][:, 0].min() + parts[k][:, 0].max()) / 2, 2),
+            -np.round(lengths[k], 2),
+        ),
+    )
+    # As even as possible, the first subpaths taking the remainder
+    counts = [len(share) for share in np.array_split(np.arange(_OUTLINE_SAMPLES), len(parts))]
+    return np.concatenate([_resample(parts[k], count) for k, count in zip(order, counts) if count])
+
+
+def _outline_descriptors(glyphs: list) -> np.ndarray:
+    """Outline descriptors of a list of glyphs, shape (glyphs, samples, 2)."""
+    if not len(glyphs):
+        return np.zeros((0, _OUTLINE_SAMPLES, 2))
+    return np.stack([_outline_descriptor(glyph) for glyph in glyphs])
+
+
+def _glyph_layout(packed: tuple, starts: np.ndarray, length: int) -> np.ndarray:
+    """Center and height of every glyph of each window, relative to the window.
+
+    Returns an array of shape (windows, length, 3) holding (x, y, height) in
+    units of the window height.
+    """
+    _, _, mins, maxs = packed
+    center, height = _window_bounds(packed, starts, length)
+    glyphs = starts[:, None] + np.arange(length)
+    with np.errstate(invalid="ignore"):
+        glyph_center = (mins[glyphs, :2] + maxs[glyphs, :2]) / 2 - center[:, None, :2]
+        glyph_height = (maxs[glyphs, 1] - mins[glyphs, 1])[..., None]
+    return np.nan_to_num(np.concatenate([glyph_center, glyph_height], axis=-1) / height[:, None, None])
+
+
+def _window_outline_distances(shape_index: ExpressionShapeIndex, shape_glyphs: list) -> np.ndarray:
+    """Worst per-glyph outline distance of every window of len(shape_glyphs) glyphs."""
+    l, n = len(shape_glyphs), len(shape_index)
+    if l == 0 or l > n:
+        return np.zeros(0)
+    pattern = _outline_descriptors(shape_glyphs)
+    # RMS distance between every glyph of the expression and every pattern glyph
+    distances = np.sqrt(
+        ((shape_index.outlines[:, None] - pattern[None]) ** 2).sum(axis=-1).mean(axis=-1)
+    )
+    return np.max([distances[j : n - l + 1 + j, j] for j in range(l)], axis=0)
+
+
+def _outline_search(shape_index: ExpressionShapeIndex, shape_glyphs: list, tolerance=OUTLINE_TOLERANCE) -> List[slice]:
+    """Slices whose glyph outlines match shape_glyphs within tolerance.
+
+    Windows of more than one glyph must also place their glyphs like the
+    pattern does (relative centers and heights within LAYOUT_TOLERANCE).
+    """
+    l = len(shape_glyphs)
+    starts = np.flatnonzero(_window_outline_distances(shape_index, shape_glyphs) <= tolerance)
+    if l > 1 and len(starts):
+        pattern_layout = _glyph_layout(_pack_glyphs(shape_glyphs), np.zeros(1, dtype=np.int64), l)
+        layout = _glyph_layout(shape_index._packed, starts, l)
+        starts = starts[np.abs(layout - pattern_layout).max(axis=(1, 2)) <= LAYOUT_TOLERANCE]
+    return [slice(int(i), int(i) + l) for i in starts]
+
+
+def outline_distances(text: VMobject, shape: Union[str, VMobject], index=0) -> np.ndarray:
+    """Outline distance between shape and every window of text[index].
+
+    Entry i is the largest per-glyph distance between shape and the glyphs of
+    text[index] starting at i. Windows at or under the tolerance are what
+    ``match="outline"`` accepts (before the layout check), so the distances
+    show how much margin separates true matches from look-alikes.
+    """
+    shape_index = ExpressionShapeIndex.of(text, index)
+    return _window_outline_distances(shape_index, _pattern(shape)[0])
+
+
+# Needles every tutorial keeps searching for, preloaded by ``PatternLibrary.preload``
+STANDARD_PATTERNS = (
+    *"0123456789",
+    *"abcxyz",
+    "=", "+", "-", "(", ")", "/",
+    r"\times", r"\div", r"\cdot", r"\pm", r"\neq", r"\leq", r"\geq",
+    r"\circ", r"\sqrt{}", r"\pi", r"\theta", r"\alpha", r"\beta",
+    r"\sin", r"\cos", r"\tan",
+    r"\text{opp}", r"\text{adj}", r"\text{hyp}",
+)
+
+PatternShape = namedtuple("PatternShape", ["glyphs", "glyph_ids"])
+PatternCacheInfo = namedtuple("PatternCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class PatternLibrary:
+    """Bounded LRU library of search patterns, shared by the whole process.
+
+    Holds the glyph fingerprints of (pattern, template, size) tuples so that a
+    needle like "=" or r"\theta" is rendered once per process instead of being
+    built as a new MathTex every time it is searched for. Entries are rendered
+    the way the shape search re-renders everything (txfonts template, see
+    ``_search_glyphs``) unless another template is given.
+
+    Example:
+        pattern_library.preload()
+        shapes.find("=")  # served by the library
+        print(pattern_library.cache_info())
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, PatternShape]" = OrderedDict()
+        self._generation = _glyph_id_generation
+
+    @staticmethod
+    def _key(pattern: str, template: Optional[TexTemplate], size: Optional[str]) -> tuple:
+        # TexTemplate is not hashable, entries are keyed by what LaTeX sees
+        template_key = None if template is None else (template.tex_compiler, template.body)
+        return (pattern, template_key, size)
+
+    def get(self, pattern: str, template: Optional[TexTemplate] = None, size: Optional[str] = None) -> PatternShape:
+        r"""Returns the glyphs and glyph IDs of pattern, rendering it on a miss.
+
+        Args:
+            pattern: Tex string searched for (e.g. "=", r"\times", r"\text{opp}")
+            template: Template to render with (defaults to the search template)
+            size: Optional math style prefix such as r"\scriptstyle"
+        """
+        if self._generation != _glyph_id_generation:
+            # The glyph ID table was reset: same glyphs, new IDs
+            self._generation = _glyph_id_generation
+            for entry_key, entry in self._entries.items():
+                self._entries[entry_key] = PatternShape(entry.glyphs, tuple(_glyph_ids(entry.glyphs)))
+
+        key = self._key(pattern, template, size)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        tex = f"{size} {pattern}" if size else pattern
+        glyphs = _rendered_glyphs("MathTex", [tex], template or _search_template(), "align*")[0]
+        entry = PatternShape(glyphs, tuple(_glyph_ids(glyphs)))
+        if is_recording():
+            # Placeholder glyphs (see tex_batch) are neither kept nor counted
+            return entry
+
+        self.misses += 1
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return entry
+
+    def preload(self, patterns=STANDARD_PATTERNS, template=None, sizes=(None,)) -> None:
+        """Renders patterns ahead of time, all missing ones in a single LaTeX run.
+
+        Args:
+            patterns: Tex strings to load (defaults to ``STANDARD_PATTERNS``)
+            template: Template to render with (defaults to the search template)
+            sizes: Math style prefixes to load each pattern in
+        """
+        requests = [
+            (pattern, template, size)
+            for pattern in patterns
+            for size in sizes
+            if self._key(pattern, template, size) not in self._entries
+        ]
+        if not requests:
+            return
+        # get() keeps nothing while recording: the recorded run only finds
+        # what LaTeX has to compile, the entries are filled once it is cached
+        prerender_tex(lambda: [self.get(*request) for request in requests], max_workers=1)
+        if not is_recording():
+            for request in requests:
+                self.get(*request)
+
+    def cache_info(self) -> PatternCacheInfo:
+        """Returns hit/miss statistics, like ``functools.lru_cache``."""
+        return PatternCacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+    def cache_clear(self) -> None:
+        """Drops every entry and resets the statistics."""
+        self._entries.clear()
+        self.hits = self.misses = 0
 
-    results = []
-    l = len(shape.submobjects[0])
-    shape_aux = VMobject()
-    shape_aux.points = np.concatenate([p.points for p in shape.submobjects[0]])
-    for i in range(len(text.submobjects[index]) - l + 1):
-        subtext = VMobject()
-        subtext.points = np.concatenate(
-            [p.points for p in text.submobjects[index][i : i + l]]
-        )
-        if get_mobject_key(subtext) == get_mobject_key(shape_aux):
-            results.append(slice(i, i + l))
-    return results
 
+# The library used by every search function of this module
+pattern_library = PatternLibrary()
 
-def search_shapes_in_text(text: VMobject, shapes: list[VMobject], index=0):
+
+def clear_shape_caches() -> None:
+    """Empties the in-memory search caches: glyph IDs, shape indexes (and queries) and pattern library.
+
+    The on-disk glyph cache is kept.
+    """
+    _reset_glyph_ids()
+    _INDEX_CACHE.clear()
+    pattern_library.cache_clear()
+
+
+def _pattern(shape: Union[str, VMobject]) -> Tuple[list, tuple]:
+    """Glyphs and glyph IDs of a search pattern given as a tex string or a mobject."""
+    if isinstance(shape, str):
+        return tuple(pattern_library.get(shape))
+    glyphs = _search_glyphs(shape)[0]
+    return glyphs, tuple(_glyph_ids(glyphs))
+
+
+def search_shapes_in_text(text: VMobject, shapes: list[VMobject], index=0, match="exact"):
     r"""Like the previous one, but receives a list of possible sub-texts to search for.
     Example (replaces all x's, both normal and small ones,
     which have a different shape):
@@ -110,15 +852,17 @@ def search_shapes_in_text(text: VMobject, shapes: list[VMobject], index=0):
         ])
         self.wait()
     """
+    shape_index = ExpressionShapeIndex.of(text, index)
     results = []
     for shape in shapes:
-        results += search_shape_in_text(text, shape, index)
+        results += shape_index.find(shape, match)
     return results
 
 
-def group_shapes_in_text(text: VMobject, shapes: VMobject | list[VMobject], index=0):
+def group_shapes_in_text(text: VMobject, shapes: str | VMobject | list[str | VMobject], index=0, match="exact"):
     r"""
     This functions receives a text in which it has to search a given shape (or list of shapes)
+    Shapes given as tex strings are served by ``pattern_library``.
     It returns a VGroup with the shapes found in the text
     It is a usability improvement with respect to search_shape_in_text, because it directly returns
     a group of VMobjects instead of index slices. It also accepts a list or a single shape.
@@ -133,9 +877,14 @@ def group_shapes_in_text(text: VMobject, shapes: VMobject | list[VMobject], inde
         self.play(results.animate.set_color(YELLOW))
         self.wait()
     """
-    if isinstance(shapes, VMobject):
+    if isinstance(shapes, (str, VMobject)):
         shapes = [shapes]
-    results = search_shapes_in_text(text, shapes, index)
+    results = search_shapes_in_text(text, shapes, index, match)
+    return _group_slices(text, results, index)
+
+
+def _group_slices(text: VMobject, results: List[slice], index=0) -> VGroup:
+    """Wraps the parts of text[index] selected by results in a VGroup."""
     if not results:
         # print(
         #     f"No results found for {''.join(shapes[0].tex_string.split(' ')[1:])[:-1]}"
@@ -155,7 +904,7 @@ def colorize_similar_tex(eq, config, index=0):
     case it has several submobject. index=0 searchs all the submobjects.
     """
     for key, color in config.items():
-        group_shapes_in_text(eq, MathTex(key)).set_color(color)
+        group_shapes_in_text(eq, key).set_color(color)
     return eq
 
 
@@ -163,45 +912,50 @@ def all_sizes_symbol(txt: str, template=None):
     """Builds a list of Tex objects with the same symbol in different sizes and templates.
     Includes both default LaTeX and custom template versions.
 
+    All variants are compiled together as the pages of one LaTeX document
+    (see ``tex_batch.build_batched``) instead of one LaTeX run per variant.
+
     Args:
         txt: The symbol or expression to render
         template: Optional TeX template to use (if None, only uses default)
     """
+    variants = _size_variants(txt, template)
+    return build_batched(
+        lambda: [MathTex(tex, tex_template=tex_template) for tex, tex_template in variants]
+    )
+
+
+def _size_variants(txt: str, template=None) -> List[tuple]:
+    """The (tex, template) variants rendered by ``all_sizes_symbol``, in order."""
     sizes = [r"\displaystyle", r"\textstyle", r"\scriptstyle", r"\scriptscriptstyle"]
-    results = []
 
     # Create math mode versions with default LaTeX
-    results.append(MathTex(f"{txt}"))
+    variants = [(f"{txt}", None)]
 
     # If template provided, add template versions
     if template:
-        results.extend(
-            [MathTex(f"{size} {txt}", tex_template=template) for size in sizes]
-        )
+        variants.extend([(f"{size} {txt}", template) for size in sizes])
 
     # Only add text versions for simple text (not math expressions)
     if all(c.isalnum() for c in txt):  # Check if txt is alphanumeric
         # Add default text versions
-        results.extend([MathTex(f"{size} \\text{{{txt}}}") for size in sizes])
+        variants.extend([(f"{size} \\text{{{txt}}}", None) for size in sizes])
         # Add template text versions if template provided
         if template:
-            results.extend(
-                [
-                    MathTex(f"{size} \\text{{{txt}}}", tex_template=template)
-                    for size in sizes
-                ]
-            )
+            variants.extend([(f"{size} \\text{{{txt}}}", template) for size in sizes])
 
-    return results
+    return variants
 
 
-def set_color_by_shape_map(text: VMobject, color_map: dict):
+def set_color_by_shape_map(text: VMobject, color_map: dict, match="exact"):
     r"""Colors elements in text based on their shape, similar to set_color_by_tex_to_color_map
     but works by matching shapes instead of tex strings.
 
     Args:
         text: VMobject (usually from Tex or MathTex)
         color_map: Dictionary mapping tex strings to colors
+        match: "exact" searches every size variant of each key; "outline"
+            searches a single rendering of it at any size
 
     Example:
         set_color_by_shape_map(equation, {
@@ -211,22 +965,51 @@ def set_color_by_shape_map(text: VMobject, color_map: dict):
         })
     """
     for tex, color in color_map.items():
-        group_shapes_in_text(text, all_sizes_symbol(tex)).set_color(color)
+        # Needles are re-rendered with the search template anyway, so only
+        # their tex strings matter and the pattern library serves them
+        variants = _match_variants(tex, match=match)
+        pattern_library.preload(variants)
+        group_shapes_in_text(text, variants, match=match).set_color(color)
     return text
 
 
-def SmartColorizeStatic(text: VMobject, color_map: dict, template=None):
-    """Creates a list of FadeToColor animations for elements in text based on their shape.
-    Checks both default LaTeX style and custom template style for better matching.
+def _match_variants(tex: str, template=None, match="exact") -> List[str]:
+    """Tex strings searched for one color map key.
 
-    Args:
-        text: VMobject (usually from Tex or MathTex)
-        color_map: Dictionary mapping tex strings to either a color or a tuple of (color, indices)
-        template: Optional TeX template to use for matching
+    Exact matching needs every size (and template) variant of
+    ``all_sizes_symbol``; outline matching is size invariant and only needs the
+    math and, for alphanumeric keys, the upright text rendering.
+    """
+    if _match_mode(match) == "outline":
+        return [tex] + ([rf"\text{{{tex}}}"] if tex.isalnum() else [])
+    variants = [variant for variant, _ in _size_variants(tex)]
+    if template:
+        variants += [variant for variant, _ in _size_variants(tex, template)]
+    return variants
+
+
+def _color_map_groups(text: VMobject, color_map: dict, template=None, match="exact"):
+    """Resolves every key of a color map against text in one pass.
+
+    Returns:
+        List of (color, groups) pairs, one per key of color_map, where groups are
+        the matched parts of text already narrowed down to the requested indices
     """
     if template is None and hasattr(text, "tex_template"):
         template = text.tex_template
 
+    shapes_by_key = {}
+    for tex in color_map:
+        # Try with both default and custom template; needles are served by
+        # the pattern library as tex strings
+        shapes_by_key[tex] = _match_variants(tex, template, match)
+
+    # Every needle missing from the library is compiled in one LaTeX run, then
+    # all keys and all their variants are matched in a single pass
+    pattern_library.preload([shape for shapes in shapes_by_key.values() for shape in shapes])
+    slices_by_key = ExpressionShapeIndex.of(text).find_many(shapes_by_key, match)
+
+    resolved = []
     for tex, value in color_map.items():
         # Determine color and indices
         if isinstance(value, tuple):
@@ -234,14 +1017,8 @@ def SmartColorizeStatic(text: VMobject, color_map: dict, template=None):
         else:
             color, indices = value, None
 
-        # Try with both default and custom template
-        default_shapes = all_sizes_symbol(tex)  # Default LaTeX style
-        template_shapes = (
-            all_sizes_symbol(tex, template) if template else []
-        )  # Custom template style
-
         # Combine results from both shape sets
-        groups = group_shapes_in_text(text, default_shapes + template_shapes)
+        groups = _group_slices(text, slices_by_key[tex])
 
         # Apply color only to specified indices, or all if indices is None
         if indices is not None:
@@ -251,13 +1028,29 @@ def SmartColorizeStatic(text: VMobject, color_map: dict, template=None):
             else:
                 groups = [groups[i] for i in indices]
 
+        resolved.append((color, groups))
+    return resolved
+
+
+def SmartColorizeStatic(text: VMobject, color_map: dict, template=None, match="exact"):
+    """Creates a list of FadeToColor animations for elements in text based on their shape.
+    Checks both default LaTeX style and custom template style for better matching.
+
+    Args:
+        text: VMobject (usually from Tex or MathTex)
+        color_map: Dictionary mapping tex strings to either a color or a tuple of (color, indices)
+        template: Optional TeX template to use for matching
+        match: "exact" (every size variant of each key) or "outline" (one
+            rendering per key, matched at any size)
+    """
+    for color, groups in _color_map_groups(text, color_map, template, match):
         for group in groups:
             group.set_color(color)
 
     return text
 
 
-def SmartColorize(text: VMobject, color_map: dict, template=None):
+def SmartColorize(text: VMobject, color_map: dict, template=None, match="exact"):
     """Creates a list of FadeToColor animations for elements in text based on their shape.
     Checks both default LaTeX style and custom template style for better matching.
 
@@ -265,34 +1058,11 @@ def SmartColorize(text: VMobject, color_map: dict, template=None):
         text: VMobject (usually from Tex or MathTex)
         color_map: Dictionary mapping tex strings to either a color or a tuple of (color, indices)
         template: Optional TeX template to use for matching
+        match: "exact" (every size variant of each key) or "outline" (one
+            rendering per key, matched at any size)
     """
-    if template is None and hasattr(text, "tex_template"):
-        template = text.tex_template
-
     animations = []
-    for tex, value in color_map.items():
-        # Determine color and indices
-        if isinstance(value, tuple):
-            color, indices = value
-        else:
-            color, indices = value, None
-
-        # Try with both default and custom template
-        default_shapes = all_sizes_symbol(tex)  # Default LaTeX style
-        template_shapes = (
-            all_sizes_symbol(tex, template) if template else []
-        )  # Custom template style
-
-        # Combine results from both shape sets
-        groups = group_shapes_in_text(text, default_shapes + template_shapes)
-
-        # Apply color only to specified indices, or all if indices is None
-        if indices is not None:
-            # Handle slice objects
-            if isinstance(indices, slice):
-                groups = groups[indices]
-            else:
-                groups = [groups[i] for i in indices]
+    for color, groups in _color_map_groups(text, color_map, template, match):
         # If indices is None, color all groups
         animations.extend([FadeToColor(group, color) for group in groups])
 
@@ -0,0 +1,329 @@
+"""Source-mapped MathTex: which TeX token produced which glyph.
+
+The shape search has to rediscover glyph positions because the link between
+the TeX source and the rendered glyphs is lost during compilation. A
+``SourceMappedMathTex`` keeps it: before compiling, safe tokens of the
+expression (numbers, letters, operators, symbols like ``\\times``) are wrapped
+in ``\\special{dvisvgm:raw ...}`` markers, which dvisvgm turns into SVG groups
+around exactly the glyphs of that token. Reading those groups back gives a
+token -> glyph range map, so finding "25" in an expression is a dictionary
+lookup.
+
+Example:
+    exp = SourceMappedMathTex(r"x^2 + 10x + 25 = 12")
+    exp[0][exp.find_source("25")[0]].set_color(RED)
+
+Markers are only placed where they cannot change the layout (never on the
+argument of a macro, a sub/superscript without braces or inside ``\\text``).
+Tokens left unmarked, and templates whose output does not go through a DVI
+file, make ``find_source`` return None so callers fall back to the shape search.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+from manim import *
+
+
+# Id prefix of the SVG group dvisvgm writes around the glyphs of token k
+MARKER_PREFIX = "nammi-tok-"
+
+_TOKEN = re.compile(r"\\[A-Za-z]+|\\.|\d+(?:\.\d+)?|%[^\n]*|\s+|.", re.S)
+
+# Argument-less control words that typeset a single symbol
+SYMBOL_MACROS = {
+    r"\times", r"\div", r"\cdot", r"\pm", r"\mp", r"\ast", r"\circ", r"\bullet",
+    r"\le", r"\leq", r"\ge", r"\geq", r"\ne", r"\neq", r"\approx", r"\equiv", r"\sim",
+    r"\lt", r"\gt", r"\infty", r"\partial", r"\angle", r"\perp", r"\parallel",
+    r"\to", r"\rightarrow", r"\leftarrow", r"\Rightarrow", r"\implies",
+    r"\alpha", r"\beta", r"\gamma", r"\delta", r"\epsilon", r"\varepsilon", r"\theta",
+    r"\lambda", r"\mu", r"\pi", r"\rho", r"\sigma", r"\tau", r"\phi", r"\varphi",
+    r"\omega", r"\Delta", r"\Theta", r"\Pi", r"\Sigma", r"\Omega",
+    r"\sin", r"\cos", r"\tan", r"\log", r"\ln",
+    r"\%", r"\{", r"\}",
+}
+
+# Spacing commands, which neither take arguments nor produce glyphs
+SPACING_MACROS = {r"\,", r"\;", r"\:", r"\!", r"\ ", r"\quad", r"\qquad"}
+
+# Macros taking one delimiter token (\left( ...)
+DELIMITER_MACROS = {
+    r"\left", r"\right", r"\middle",
+    r"\big", r"\Big", r"\bigg", r"\Bigg", r"\bigl", r"\bigr", r"\Bigl", r"\Bigr",
+}
+
+# Macros whose brace argument is text or a name and is copied untouched
+OPAQUE_MACROS = {
+    r"\text", r"\textbf", r"\textit", r"\textrm", r"\textsf", r"\texttt", r"\mbox",
+    r"\operatorname", r"\begin", r"\end", r"\color", r"\textcolor", r"\colorbox",
+    r"\hspace", r"\vspace", r"\label", r"\tag",
+}
+
+_MARKABLE_CHARACTERS = set("+-=<>(),./|!*:;")
+
+# Tokens that must directly follow the atom before them
+_ATTACHED = {"^", "_", "'", r"\limits", r"\nolimits"}
+
+
+def _is_significant(token: str) -> bool:
+    return not (token.isspace() or token.startswith("%"))
+
+
+def _is_markable(token: str) -> bool:
+    return (
+        token[0].isdigit()
+        or (len(token) == 1 and token.isascii() and token.isalpha())
+        or token in _MARKABLE_CHARACTERS
+        or token in SYMBOL_MACROS
+    )
+
+
+def inject_source_markers(expression: str):
+    """Wraps the safe tokens of a math expression in dvisvgm group markers.
+
+    Args:
+        expression: The tex string as it is sent to LaTeX
+
+    Returns:
+        (marked expression, tokens) where tokens lists every significant source
+        token as a (text, marker number or None) pair, in source order
+    """
+    tokens = _TOKEN.findall(expression)
+    significant = [i for i, token in enumerate(tokens) if _is_significant(token)]
+    following = {a: b for a, b in zip(significant, significant[1:])}
+
+    out, source = [], []
+    marker = 0
+    i = 0
+
+    def copy_group(start: int, open_char: str, close_char: str) -> int:
+        """Copies a balanced group starting at tokens[start] verbatim; returns the next index."""
+        depth = 0
+        j = start
+        while j < len(tokens):
+            token = tokens[j]
+            out.append(token)
+            if _is_significant(token):
+                source.append((token, None))
+            if token == open_char:
+                depth += 1
+            elif token == close_char:
+                depth -= 1
+                if depth == 0:
+                    return j + 1
+            j += 1
+        return j
+
+    def next_significant(j: int) -> Optional[int]:
+        return following.get(j) if _is_significant(tokens[j]) else None
+
+    suppress = False
+    while i < len(tokens):
+        token = tokens[i]
+        if not _is_significant(token):
+            out.append(token)
+            i += 1
+            continue
+
+        after = next_significant(i)
+        after_token = tokens[after] if after is not None else None
+
+        if token in ("{", "}", "&"):
+            suppress = False
+        elif token == "\\\\":
+            suppress = False
+            out.append(token)
+            source.append((token, None))
+            i += 1
+            if after_token == "[":
+                out.extend(tokens[i:after])
+                i = copy_group(after, "[", "]")
+            continue
+        elif token in ("^", "_"):
+            out.append(token)
+            source.append((token, None))
+            i += 1
+            # An unbraced script is a single token and is left alone
+            if after is not None and after_token != "{":
+                out.extend(tokens[i : after + 1])
+                source.append((after_token, None))
+                i = after + 1
+            continue
+        elif token.startswith("\\") and token not in SYMBOL_MACROS and token not in SPACING_MACROS:
+            out.append(token)
+            source.append((token, None))
+            i += 1
+            if token in OPAQUE_MACROS and after_token == "{":
+                out.extend(tokens[i:after])
+                i = copy_group(after, "{", "}")
+                # \begin{array}{cc}: column specs are not math either
+                if token == r"\begin" and i < len(tokens):
+                    rest = next((j for j in range(i, len(tokens)) if _is_significant(tokens[j])), None)
+                    if rest is not None and tokens[rest] in ("{", "["):
+                        out.extend(tokens[i:rest])
+                        i = copy_group(rest, tokens[rest], "}" if tokens[rest] == "{" else "]")
+            elif token in DELIMITER_MACROS and after is not None:
+                out.extend(tokens[i : after + 1])
+                source.append((after_token, None))
+                i = after + 1
+            elif token not in OPAQUE_MACROS:
+                # Unknown macro: whatever follows until the next brace may be its argument
+                suppress = True
+            continue
+
+        if _is_markable(token) and not suppress and after_token not in _ATTACHED:
+            out.append(
+                rf"\special{{dvisvgm:raw <g id='{MARKER_PREFIX}{marker}'>}}"
+                + token
+                + r"\special{dvisvgm:raw </g>}"
+            )
+            source.append((token, marker))
+            marker += 1
+        else:
+            out.append(token)
+            source.append((token, None))
+        i += 1
+
+    return "".join(out), source
+
+
+_NON_RENDERED = {"defs", "style", "title", "desc", "metadata", "clipPath", "mask", "pattern", "symbol"}
+_SHAPES = {"use", "path", "rect", "polygon", "polyline", "circle", "ellipse", "line"}
+
+
+def read_glyph_ranges(svg_file) -> Optional[tuple]:
+    """Reads the marker groups of an SVG written by dvisvgm.
+
+    Returns:
+        (ranges, glyph count): ranges maps each marker number to the
+        (start, stop) range of glyphs drawn inside its group, glyphs being
+        numbered in document order like SVGMobject does. None if the file
+        cannot be read.
+    """
+    try:
+        root = ET.parse(svg_file).getroot()
+    except (OSError, ET.ParseError):
+        return None
+
+    ranges: Dict[int, tuple] = {}
+    count = 0
+
+    def walk(element):
+        nonlocal count
+        for child in element:
+            tag = child.tag.rsplit("}", 1)[-1]
+            if tag in _NON_RENDERED:
+                continue
+            if tag == "g":
+                group_id = child.get("id", "")
+                start = count
+                walk(child)
+                if group_id.startswith(MARKER_PREFIX) and group_id[len(MARKER_PREFIX) :].isdigit():
+                    ranges[int(group_id[len(MARKER_PREFIX) :])] = (start, count)
+            elif tag in _SHAPES:
+                count += 1
+
+    walk(root)
+    return ranges, count
+
+
+class SourceMappedMathTex(MathTex):
+    """MathTex that remembers which source token produced each glyph.
+
+    Renders exactly like MathTex (the markers produce no output), but is
+    compiled separately since its LaTeX source differs.
+
+    Example:
+        exp = SourceMappedMathTex(r"\\frac{3}{4} \\times 25")
+        exp.find_source("25")      # [slice(4, 6)]
+        exp.find_source(r"\\times")  # [slice(3, 4)]
+    """
+
+    def __init__(self, *tex_strings, **kwargs):
+        self._source_tokens = []
+        super().__init__(*tex_strings, **kwargs)
+        self._source_map = self._read_source_map()
+
+    def _get_modified_expression(self, tex_string):
+        expression = super()._get_modified_expression(tex_string)
+        expression, self._source_tokens = inject_source_markers(expression)
+        return expression
+
+    def _read_source_map(self) -> Optional[List[tuple]]:
+        """(text, start, stop) for every marked token, None if the map is unusable."""
+        file_name = getattr(self, "file_name", None)
+        result = read_glyph_ranges(file_name) if file_name else None
+        if result is None:
+            return None
+        ranges, count = result
+
+        glyph_count = sum(len(group.submobjects) for group in self.submobjects)
+        # No markers (e.g. pdf output) or glyphs that SVGMobject numbered
+        # differently: the map cannot be trusted
+        if not ranges or count != glyph_count:
+            return None
+        return [
+            (text, *ranges[marker])
+            for text, marker in self._source_tokens
+            if marker is not None and marker in ranges
+        ]
+
+    @property
+    def has_source_map(self) -> bool:
+        return self._source_map is not None
+
+    @property
+    def source_map(self) -> Optional[Dict[str, List[slice]]]:
+        """Dictionary mapping each marked token to the glyph slices it produced."""
+        if self._source_map is None:
+            return None
+        mapping: Dict[str, List[slice]] = {}
+        for text, start, stop in self._source_map:
+            if stop > start:
+                mapping.setdefault(text, []).append(slice(start, stop))
+        return mapping
+
+    def find_source(self, text: str, index=0) -> Optional[List[slice]]:
+        """Returns the slices of ``self[index]`` produced by the source text.
+
+        text may span several consecutive tokens (e.g. "-5" or "2x"). Returns
+        None when the answer cannot come from the source map: no map, no match,
+        or occurrences of text in parts of the source that were not marked.
+
+        Args:
+            text: Tex source to look for, as written in the expression
+            index: Submobject the slices refer to
+        """
+        if self._source_map is None:
+            return None
+        query = [token for token in _TOKEN.findall(text) if _is_significant(token)]
+        if not query:
+            return None
+
+        found = []
+        tokens = self._source_map
+        for i in range(len(tokens)):
+            j, start, stop = i, tokens[i][1], tokens[i][1]
+            for part in query:
+                if j >= len(tokens) or tokens[j][0] != part or tokens[j][1] != stop:
+                    break
+                stop = tokens[j][2]
+                j += 1
+            else:
+                if stop > start:
+                    found.append(slice(start, stop))
+
+        # Every occurrence in the source must have been found through markers
+        source = [token for token, _ in self._source_tokens]
+        occurrences = sum(
+            source[i : i + len(query)] == query for i in range(len(source) - len(query) + 1)
+        )
+        if not found or len(found) != occurrences:
+            return None
+
+        offset = sum(len(group.submobjects) for group in self.submobjects[:index])
+        size = len(self.submobjects[index].submobjects)
+        if any(s.start < offset or s.stop > offset + size for s in found):
+            return None
+        return [slice(s.start - offset, s.stop - offset) for s in found]
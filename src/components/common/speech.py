@@ -0,0 +1,297 @@
+"""Speech service wrapper with a content-addressed clip cache and concurrent pre-synthesis.
+
+manim_voiceover synthesizes each ``with self.voiceover(...)`` block when the
+block is reached, so the latency of the TTS backend adds up over every block
+of a scene. ``CachedSpeechService`` wraps any speech service (Azure, gTTS,
+the local stand-in, ...) and:
+
+- stores every clip under a key derived from the text, the service, its voice
+  and prosody settings, so a clip is synthesized once for all scenes and runs
+- synthesizes a list of texts ahead of time on a bounded thread pool, after
+  which the voiceover blocks of the scene are cache hits
+
+Example:
+    service = CachedSpeechService(AzureService(voice="en-US-DerekMultilingualNeural"))
+    service.presynthesize(["First sentence.", "Second sentence."])
+    self.set_speech_service(service)
+
+``MathTutorialScene`` collects the texts itself with ``presynthesize_speech``.
+
+``LocalSpeechService`` is an offline stand-in: it writes silent (or tone) WAV
+files as long as the text would take to speak, instantly and without any
+network access. Set ``NAMMI_SPEECH_SERVICE=local`` to render a scene with it.
+"""
+
+import array
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from manim import config
+from manim_voiceover.helper import remove_bookmarks
+from manim_voiceover.services.base import SpeechService
+from manim_voiceover.tracker import AUDIO_OFFSET_RESOLUTION
+
+
+# Attributes of the wrapped service that change the audio it produces
+VOICE_SETTINGS = ("voice", "style", "prosody", "lang", "tld", "model", "speed")
+
+# Environment variable selecting the speech backend of MathTutorialScene
+SPEECH_SERVICE_ENV = "NAMMI_SPEECH_SERVICE"
+
+# Description of a cached clip, next to the audio in its entry directory
+ENTRY_FILE = "clip.json"
+
+
+class CachedSpeechService(SpeechService):
+    """Speech service that caches the clips of another one by content.
+
+    Each clip lives in its own directory ``<store_dir>/<key>``, named after a
+    hash of the text and the settings it was spoken with; the wrapped service
+    writes its files (and its own cache index) there. Since no file is shared
+    between entries, clips can be synthesized concurrently.
+
+    Args:
+        service: Speech service producing the audio
+        max_workers: Clips synthesized at once by ``presynthesize``
+        cache_dir: Directory of manim_voiceover's index of this service
+            (defaults to manim's voiceovers dir)
+        store_dir: Root of the clip cache (defaults to cache_dir); processes
+            sharing a store_dir with their own cache_dir never write the same
+            index file
+        **kwargs: Passed to SpeechService (e.g. global_speed)
+    """
+
+    def __init__(self, service: SpeechService, max_workers=4, cache_dir=None, store_dir=None, **kwargs):
+        if cache_dir is None:
+            cache_dir = Path(config.media_dir) / "voiceovers"
+        super().__init__(cache_dir=cache_dir, **kwargs)
+        self.store_dir = Path(store_dir or cache_dir)
+        self.service = service
+        self.max_workers = max_workers
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def settings(self, **kwargs) -> dict:
+        """Everything besides the text that the audio of the wrapped service depends on."""
+        settings = {
+            name: getattr(self.service, name)
+            for name in VOICE_SETTINGS
+            if getattr(self.service, name, None) is not None
+        }
+        # Per-voiceover overrides, e.g. self.voiceover(text, prosody={...})
+        settings.update(kwargs)
+        return {"service": type(self.service).__name__, "config": settings}
+
+    def cache_key(self, text: str, **kwargs) -> str:
+        """Content address of the clip of text; runs of whitespace count as one space."""
+        text = " ".join(text.split())
+        data = json.dumps({"text": text, **self.settings(**kwargs)}, sort_keys=True, default=str)
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+    def cached(self, text: str, **kwargs) -> Optional[dict]:
+        """The cached result for text, None if it was never synthesized."""
+        key = self.cache_key(text, **kwargs)
+        entry_file = self.store_dir / key / ENTRY_FILE
+        try:
+            with open(entry_file, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Stored relative to store_dir, handed out relative to cache_dir like
+        # manim_voiceover expects
+        audio_file = self.store_dir / entry["original_audio"]
+        if not audio_file.exists():
+            return None
+        entry["original_audio"] = os.path.relpath(audio_file, self.cache_dir)
+        return entry
+
+    def generate_from_text(self, text: str, cache_dir: str = None, path: str = None, **kwargs) -> dict:
+        entry = self.cached(text, **kwargs)
+        if entry is not None:
+            return entry
+
+        key = self.cache_key(text, **kwargs)
+        # One synthesis per clip, even when presynthesize and the scene ask at once
+        with self._lock(key):
+            entry = self.cached(text, **kwargs)
+            if entry is not None:
+                return entry
+
+            entry_dir = self.store_dir / key
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            result = self.service.generate_from_text(text, cache_dir=str(entry_dir), **kwargs)
+
+            entry = dict(result)
+            entry["original_audio"] = f"{key}/{result['original_audio']}"
+            entry["input_data"] = {"input_text": text, **self.settings(**kwargs)}
+            # Written last and atomically: a readable entry always has its audio
+            tmp_file = entry_dir / f"{ENTRY_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(entry, f, default=str)
+            os.replace(tmp_file, entry_dir / ENTRY_FILE)
+            return self.cached(text, **kwargs)
+
+    def _lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def presynthesize(self, texts, max_workers=None, **kwargs) -> int:
+        """Synthesizes every text not cached yet, up to max_workers at once.
+
+        Args:
+            texts: Voiceover texts, as passed to ``self.voiceover``, or
+                (text, kwargs) pairs for blocks with their own voiceover arguments
+            max_workers: Overrides the max_workers of the service
+            **kwargs: Voiceover arguments shared by all texts
+
+        Returns:
+            The number of clips synthesized
+        """
+        requests = {}
+        for item in texts:
+            text, extra = (item, {}) if isinstance(item, str) else item
+            # Whitespace is collapsed like manim_voiceover does before synthesis
+            text, extra = " ".join(text.split()), {**kwargs, **extra}
+            requests.setdefault(self.cache_key(text, **extra), (text, extra))
+        pending = [(text, extra) for text, extra in requests.values() if self.cached(text, **extra) is None]
+        if not pending:
+            return 0
+
+        workers = max(1, min(max_workers or self.max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.generate_from_text, text, **extra) for text, extra in pending]
+            failed = 0
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    # Left to the voiceover block, which synthesizes it again
+                    print(f"Could not presynthesize voiceover: {e!r}")
+                    failed += 1
+        return len(pending) - failed
+
+
+def speech_backend(default="azure") -> str:
+    """Name of the speech backend to use: ``NAMMI_SPEECH_SERVICE`` if set, else default."""
+    return os.environ.get(SPEECH_SERVICE_ENV, "").strip().lower() or default
+
+
+# Relative speaking rates of the SSML rate keywords
+_RATE_KEYWORDS = {"x-slow": 0.5, "slow": 0.75, "medium": 1.0, "default": 1.0, "fast": 1.25, "x-fast": 1.5}
+
+
+def _speaking_rate(prosody) -> float:
+    """Speed factor of an SSML prosody rate ("-15%", "slow", "0.8"), 1 when unset."""
+    rate = str((prosody or {}).get("rate", "")).strip().lower()
+    if not rate:
+        return 1.0
+    if rate in _RATE_KEYWORDS:
+        return _RATE_KEYWORDS[rate]
+    try:
+        if rate.endswith("%"):
+            return max(0.1, 1 + float(rate[:-1]) / 100)
+        return max(0.1, float(rate))
+    except ValueError:
+        return 1.0
+
+
+class LocalSpeechService(SpeechService):
+    """Offline speech service writing WAVs of the estimated speaking duration.
+
+    The duration is derived from the word count, words_per_minute and the
+    prosody rate, so the timing of a scene is close to the real voiceover.
+    Word boundaries are spread evenly over the clip, which keeps bookmarks
+    working. Output is deterministic: the same text gives the same file.
+
+    Args:
+        voice: Recorded in the cache key only, like a real voice name
+        prosody: SSML prosody, only "rate" is used (e.g. {"rate": "-15%"})
+        words_per_minute: Speaking rate at prosody rate 100%
+        tone: Hz of a quiet tone to fill the clip with, None for silence
+        **kwargs: Passed to SpeechService
+    """
+
+    sample_rate = 16000
+
+    def __init__(self, voice="local", prosody=None, words_per_minute=150, tone=None, **kwargs):
+        super().__init__(**kwargs)
+        self.voice = voice
+        self.prosody = prosody or {}
+        self.words_per_minute = words_per_minute
+        self.tone = tone
+
+    def estimate_duration(self, text: str, prosody=None) -> float:
+        """Seconds it would take to speak text."""
+        words = len(re.findall(r"\S+", text))
+        rate = _speaking_rate(self.prosody if prosody is None else prosody)
+        return max(0.5, words * 60 / (self.words_per_minute * rate))
+
+    def generate_from_text(self, text: str, cache_dir: str = None, path: str = None, **kwargs) -> dict:
+        if cache_dir is None:
+            cache_dir = self.cache_dir
+        prosody = kwargs.get("prosody", self.prosody)
+        # Bookmarks are not spoken; word boundaries index the text without them
+        spoken = remove_bookmarks(text)
+        duration = self.estimate_duration(spoken, prosody)
+        input_data = {
+            "input_text": text,
+            "service": "local",
+            "config": {"voice": self.voice, "prosody": prosody, "tone": self.tone},
+        }
+        audio_path = path or self.get_audio_basename(input_data) + ".wav"
+        self._write_wav(Path(cache_dir) / audio_path, duration)
+
+        return {
+            "input_text": text,
+            "input_data": input_data,
+            "original_audio": audio_path,
+            "word_boundaries": self._word_boundaries(spoken, duration),
+        }
+
+    def _write_wav(self, path: Path, duration: float) -> None:
+        count = int(duration * self.sample_rate)
+        if self.tone:
+            step = 2 * math.pi * self.tone / self.sample_rate
+            samples = array.array("h", (int(1000 * math.sin(step * i)) for i in range(count)))
+        else:
+            samples = array.array("h", bytes(2 * count))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(samples.tobytes())
+
+    def _word_boundaries(self, text: str, duration: float) -> list:
+        """Azure-style word boundaries, audio offsets in AUDIO_OFFSET_RESOLUTION units (100 ns).
+
+        A last boundary at the end of the text and the clip keeps bookmarks
+        after the last word inside the range manim_voiceover interpolates.
+        """
+        words = list(re.finditer(r"\S+", text))
+        boundaries = [
+            {
+                "audio_offset": int(AUDIO_OFFSET_RESOLUTION * duration * i / len(words)),
+                "text_offset": word.start(),
+                "word_length": len(word.group()),
+                "text": word.group(),
+                "boundary_type": "Word",
+            }
+            for i, word in enumerate(words)
+        ]
+        boundaries.append({
+            "audio_offset": int(AUDIO_OFFSET_RESOLUTION * duration),
+            "text_offset": len(text),
+            "word_length": 0,
+            "text": "",
+            "boundary_type": "Word",
+        })
+        return boundaries
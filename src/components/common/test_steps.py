@@ -52,16 +52,20 @@ class TestSteps(VMobject):
     
     def _initialize_components(self):
         """Extract and store all components during initialization for easier access later."""
+        # Each step is indexed once and every component is looked up in that index
+        step_1_shapes = ExpressionShapeIndex.of(self._step_1)
+        step_2_shapes = ExpressionShapeIndex.of(self._step_2)
+
         # Find the indices of key components
-        equal_index = search_shape_in_text(self._step_1, MathTex("="))[0]
-        slope_index = search_shape_in_text(self._step_1, MathTex(fr"{self._slope}"))
+        equal_index = step_1_shapes.find("=")[0]
+        slope_index = step_1_shapes.find(fr"{self._slope}")
         if slope_index[0].start < equal_index.start:
             slope_index = slope_index[1]
         else:
             slope_index = slope_index[0]
-        y_intercept_index = search_shape_in_text(self._step_1, MathTex(fr"{self._y_intercept}"))[-1]
-        times_index = search_shape_in_text(self._step_1, MathTex(r"\times"))
-        not_equal_index = search_shape_in_text(self._step_2, MathTex(r"\ne"))
+        y_intercept_index = step_1_shapes.find(fr"{self._y_intercept}")[-1]
+        times_index = step_1_shapes.find(r"\times")
+        not_equal_index = step_2_shapes.find(r"\ne")
         
         self._components = {
             "step_1_y": self._step_1[0][:equal_index.start],
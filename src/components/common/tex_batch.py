@@ -0,0 +1,346 @@
+"""Batched LaTeX compilation into manim's tex cache.
+
+Every MathTex/Tex normally runs its own LaTeX + dvisvgm subprocess. The helpers
+here collect the compilations a piece of code is going to request, write them
+as the pages of one multi-page document, compile it once and split the SVG
+output back into the files manim looks for. Building the mobjects afterwards is
+then a plain cache hit.
+
+Importing this module installs one hook on the ``tex_to_svg_file`` of
+MathTex/Tex: it records in threads inside ``record_tex`` and otherwise
+compiles as manim does, one LaTeX run in manim's tex dir at a time.
+
+Example:
+    # One LaTeX run for all the labels instead of one per label
+    labels = build_batched(lambda: [Tex(text) for text in label_texts])
+"""
+
+import contextvars
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+from manim import *
+from manim.mobject.text import tex_mobject
+from manim.utils import tex_file_writing
+
+
+# Environment wrapping each page of a batch document (see ``_batch_document``)
+PAGE_ENVIRONMENT = "nammipage"
+
+# Smallest number of pages worth a LaTeX run of their own when compiling in parallel
+MIN_PAGES_PER_RUN = 8
+
+# Placeholder handed to MathTex/Tex while recording: a single square glyph
+_PLACEHOLDER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="1" height="1" viewBox="0 0 1 1">'
+    '<path d="M0 0h1v1h-1z"/></svg>'
+)
+
+# What building a MathTex/Tex is expected to raise: manim reports LaTeX errors
+# as ValueError and a missing compiler as OSError, and substrings looked up
+# among placeholder glyphs may not be found (IndexError, KeyError)
+TEX_ERRORS = (IndexError, KeyError, OSError, ValueError)
+
+# Jobs collected by the ``record_tex`` block active in the current thread,
+# None when not recording; other threads keep compiling normally
+_recorder: "contextvars.ContextVar[Optional[list]]" = contextvars.ContextVar("nammi_tex_recorder", default=None)
+
+# Held by every LaTeX run writing into manim's tex dir: after each of its own
+# runs manim deletes the .dvi/.log files of the whole dir (delete_nonsvg_files).
+# Batch documents are compiled in a directory of their own instead.
+_TEX_DIR_LOCK = threading.Lock()
+
+
+def svg_path(expression: str, environment=None, tex_template=None) -> Path:
+    """Returns the SVG file manim uses for expression (it may not exist yet); writes nothing."""
+    if tex_template is None:
+        tex_template = config["tex_template"]
+    code = _texcode(tex_template, expression, environment)
+    return Path(config.get_dir("tex_dir")) / f"{tex_file_writing.tex_hash(code)}.svg"
+
+
+def _placeholder_svg() -> Path:
+    path = Path(config.get_dir("tex_dir")) / "nammi_placeholder.svg"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Kept an .svg so that manim's cleanup of the tex dir leaves it alone
+        tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.svg")
+        tmp_path.write_text(_PLACEHOLDER_SVG, encoding="utf-8")
+        os.replace(tmp_path, path)
+    return path
+
+
+def is_recording() -> bool:
+    """Whether a ``record_tex`` block is active in the current thread."""
+    return _recorder.get() is not None
+
+
+_manim_tex_to_svg_file = tex_mobject.tex_to_svg_file
+
+
+def _tex_to_svg_file(expression, environment=None, tex_template=None):
+    """The tex_to_svg_file of MathTex/Tex: records inside ``record_tex``, compiles under the tex dir lock otherwise."""
+    if tex_template is None:
+        tex_template = config["tex_template"]
+    svg_file = svg_path(expression, environment, tex_template)
+    if svg_file.exists():
+        return svg_file
+    jobs = _recorder.get()
+    if jobs is not None:
+        jobs.append((expression, environment, tex_template))
+        return _placeholder_svg()
+    with _TEX_DIR_LOCK:
+        return _manim_tex_to_svg_file(expression, environment=environment, tex_template=tex_template)
+
+
+# Installed once for the whole process; what it does depends on the calling thread
+tex_mobject.tex_to_svg_file = _tex_to_svg_file
+
+
+@contextmanager
+def record_tex():
+    """Records the LaTeX compilations requested by MathTex/Tex instead of running them.
+
+    Inside the block, every MathTex/Tex built by the current thread whose SVG
+    is not in manim's tex cache yet is built from a placeholder glyph, and its
+    (expression, environment, tex_template) job is appended to the yielded
+    list. Objects built this way are placeholders and must be thrown away.
+    MathTex/Tex built by other threads meanwhile compile as usual. Nested
+    blocks share the job list of the outermost one.
+    """
+    jobs = _recorder.get()
+    if jobs is not None:
+        yield jobs
+        return
+
+    jobs = []
+    token = _recorder.set(jobs)
+    try:
+        yield jobs
+    finally:
+        _recorder.reset(token)
+
+
+def unique_jobs(jobs) -> list:
+    """Returns jobs without repeats, in order; two jobs are the same if they write the same SVG.
+
+    A MathTex also compiles each of its substrings, so a recording usually
+    holds the same job more than once.
+    """
+    unique = {}
+    for expression, environment, tex_template in jobs:
+        unique.setdefault(svg_path(expression, environment, tex_template), (expression, environment, tex_template))
+    return list(unique.values())
+
+
+def compile_tex_batch(jobs, max_workers=1) -> List[Path]:
+    """Compiles every job that is not in manim's tex cache yet, one LaTeX run per template.
+
+    Jobs sharing a template become the pages of a single document, which is
+    compiled once and converted with one dvisvgm call. Each page is stored where
+    manim looks for the SVG of that expression.
+
+    With several workers, large groups are split into up to max_workers
+    documents (of at least MIN_PAGES_PER_RUN pages) compiled concurrently, so
+    the wall time is that of the longest run instead of the sum.
+
+    Args:
+        jobs: Iterable of (expression, environment, tex_template) tuples, as
+            recorded by ``record_tex``
+        max_workers: Number of LaTeX runs in flight at once (None: one per CPU)
+
+    Returns:
+        The SVG file of every job, in order
+    """
+    svg_files = []
+    pending = {}
+    for expression, environment, tex_template in jobs:
+        if tex_template is None:
+            tex_template = config["tex_template"]
+        svg_file = svg_path(expression, environment, tex_template)
+        svg_files.append(svg_file)
+        if not svg_file.exists():
+            # TexTemplate is not hashable, jobs are grouped by what LaTeX sees
+            group = (tex_template.tex_compiler, tex_template.output_format, tex_template.body)
+            pending.setdefault(group, {})[svg_file] = (expression, environment, tex_template)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    chunks = [chunk for group in pending.values() for chunk in _split(list(group.items()), max_workers)]
+    if max_workers > 1 and len(chunks) > 1:
+        # LaTeX and dvisvgm are subprocesses, threads are enough to overlap them
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(_compile_group, chunks))
+    else:
+        for chunk in chunks:
+            _compile_group(chunk)
+    return svg_files
+
+
+def _split(items: list, max_workers: int) -> List[list]:
+    """Splits the items of one template into balanced chunks for parallel runs."""
+    count = max(1, min(max_workers, len(items) // MIN_PAGES_PER_RUN))
+    size, extra = divmod(len(items), count)
+    chunks, start = [], 0
+    for number in range(count):
+        stop = start + size + (number < extra)
+        chunks.append(items[start:stop])
+        start = stop
+    return chunks
+
+
+def _batch_dir() -> Path:
+    """Where batch documents are compiled, next to manim's tex dir but outside of it."""
+    return Path(config.get_dir("tex_dir")).parent / "nammi_tex_batches"
+
+
+def _compile_group(items) -> None:
+    """Compiles [(svg_file, job), ...] sharing one template as a single document."""
+    tex_template = items[0][1][2]
+    document = _batch_document([job for _, job in items]) if len(items) > 1 else None
+    if document is None:
+        _compile_individually(items)
+        return
+
+    digest = hashlib.sha256(document.encode("utf-8")).hexdigest()[:16]
+    # A directory per run: no other LaTeX run, ours or manim's, touches its files
+    _batch_dir().mkdir(parents=True, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix=f"batch_{digest}_", dir=_batch_dir()))
+    tex_file = work_dir / f"batch_{digest}.tex"
+    tex_file.write_text(document, encoding="utf-8")
+
+    try:
+        output_file = tex_file_writing.compile_tex(
+            tex_file, tex_template.tex_compiler, tex_template.output_format
+        )
+        page_files = _convert_pages(output_file, tex_template.output_format)
+        # Pages other than 1..n mean the document did not split as expected
+        if sorted(page_files) != list(range(1, len(items) + 1)):
+            raise ValueError(f"expected pages 1-{len(items)}, got {sorted(page_files)}")
+        for page, (svg_file, _) in enumerate(items, start=1):
+            os.replace(page_files[page], svg_file)
+    except (ValueError, OSError, subprocess.CalledProcessError) as e:
+        print(f"Batched LaTeX compilation failed ({e}), compiling one by one")
+
+    # Whatever was not stored is compiled the usual way
+    _compile_individually([(svg_file, job) for svg_file, job in items if not svg_file.exists()])
+
+    if not config["no_latex_cleanup"]:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _compile_individually(items) -> None:
+    for svg_file, (expression, environment, tex_template) in items:
+        # manim compiles in its tex dir, one run at a time (see _TEX_DIR_LOCK)
+        with _TEX_DIR_LOCK:
+            if not svg_file.exists():
+                tex_file_writing.tex_to_svg_file(expression, environment=environment, tex_template=tex_template)
+
+
+def _texcode(tex_template, expression: str, environment) -> str:
+    if environment is not None:
+        return tex_template.get_texcode_for_expression_in_env(expression, environment)
+    return tex_template.get_texcode_for_expression(expression)
+
+
+def _batch_document(jobs):
+    """Builds one multi-page standalone document with a page per job.
+
+    Each page holds exactly what manim would have put in that job's own
+    document, so every page renders to the same glyphs. Returns None when the
+    template is not a standalone document and cannot be split into pages.
+    """
+    tex_template = jobs[0][2]
+    head, pages = None, []
+    for expression, environment, _ in jobs:
+        code = _texcode(tex_template, expression, environment)
+        head, body = code.split(r"\begin{document}", 1)
+        pages.append(body.rsplit(r"\end{document}", 1)[0])
+
+    match = re.search(r"\\documentclass(\[([^\]]*)\])?\{standalone\}", head)
+    if match is None:
+        return None
+    options = ",".join(filter(None, [match.group(2), f"multi={PAGE_ENVIRONMENT}"]))
+    head = (
+        head[: match.start()]
+        + rf"\documentclass[{options}]{{standalone}}"
+        + head[match.end() :]
+        + rf"\newenvironment{{{PAGE_ENVIRONMENT}}}{{}}{{}}"
+        + "\n"
+    )
+    body = "\n".join(
+        rf"\begin{{{PAGE_ENVIRONMENT}}}{page}\end{{{PAGE_ENVIRONMENT}}}" for page in pages
+    )
+    return head + "\\begin{document}\n" + body + "\n\\end{document}\n"
+
+
+def _convert_pages(output_file: Path, output_format: str) -> dict:
+    """Converts every page of a dvi/xdv/pdf file to SVG; returns {page number: svg file}."""
+    prefix = output_file.with_suffix("")
+    command = [
+        "dvisvgm",
+        *(["--pdf"] if output_format == ".pdf" else []),
+        "--page=1-",
+        str(output_file),
+        "-n",
+        "-v",
+        "0",
+        "-o",
+        f"{prefix}-%p.svg",
+    ]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+    pages = {}
+    for path in prefix.parent.glob(f"{prefix.name}-*.svg"):
+        number = path.stem[len(prefix.name) + 1 :]
+        if number.isdigit():
+            pages[int(number)] = path
+    return pages
+
+
+def build_batched(factory, max_workers=1):
+    """Runs factory with all of its LaTeX compiled in a single batch.
+
+    The factory (any callable building MathTex/Tex objects) is first run while
+    recording. If everything it needs is already cached its result is returned
+    as is; otherwise the missing SVGs are compiled together and the factory is
+    run again on a warm cache, so on a cold cache it runs twice and must not
+    have side effects besides building its result. Inside an outer recording
+    the jobs are left to that recording and the placeholder result is returned.
+    """
+    nested = is_recording()
+    with record_tex() as jobs:
+        already_recorded = len(jobs)
+        result = factory()
+    if nested or len(jobs) == already_recorded:
+        return result
+    compile_tex_batch(jobs, max_workers)
+    return factory()
+
+
+def prerender_tex(factory, max_workers=None) -> int:
+    """Compiles, in parallel, everything factory would compile; returns the number of distinct jobs.
+
+    The factory runs only while recording and its result is thrown away, so
+    it can build throwaway copies of what the real code will build next.
+    Inside an outer recording the jobs are left to that recording, and the
+    count is of the jobs the factory added to it.
+    """
+    nested = is_recording()
+    with record_tex() as jobs:
+        already_recorded = len(jobs)
+        factory()
+    if nested:
+        return len(unique_jobs(jobs[already_recorded:]))
+    jobs = unique_jobs(jobs)
+    compile_tex_batch(jobs, max_workers)
+    return len(jobs)
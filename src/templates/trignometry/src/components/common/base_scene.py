@@ -6,6 +6,7 @@ from manim_voiceover import VoiceoverScene
 # from manim_voiceover.services.azure import AzureService
 from manim_voiceover.services.gtts import GTTSService
 from .smart_tex import *
+from .speech import LocalSpeechService, speech_backend
 from .custom_axes import CustomAxes
 #from src.components.styles.constants import *
 
@@ -23,6 +24,9 @@ BACKGROUND_COLOR = ManimColor("#121212")
 
 class MathTutorialScene(VoiceoverScene):
     """Base scene class that handles Azure voiceover setup."""
+
+    # "gtts" or "local" (offline stand-in), overridden by NAMMI_SPEECH_SERVICE
+    speech_service_name = "gtts"
     
     def __init__(self, renderer=None, **kwargs):
         """Initialize the scene."""
@@ -41,7 +45,11 @@ class MathTutorialScene(VoiceoverScene):
         #     )
         # )
 
-        self.set_speech_service(GTTSService(transcription_model="base"))
+        if speech_backend(self.speech_service_name) == "local":
+            # Same timing, no network: for dry renders, CI and benchmarks
+            self.set_speech_service(LocalSpeechService())
+        else:
+            self.set_speech_service(GTTSService(transcription_model="base"))
         # Set common scene settings
         self.camera.background_color = BACKGROUND_COLOR 
 
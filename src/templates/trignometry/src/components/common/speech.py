@@ -0,0 +1,142 @@
+"""Offline stand-in speech service for the trig template.
+
+``LocalSpeechService`` writes silent (or tone) WAV files as long as the text
+would take to speak, instantly and without any network access. Set
+``NAMMI_SPEECH_SERVICE=local`` to render a scene with it.
+
+Trimmed copy of ``src/components/common/speech.py``: only what this
+template's ``base_scene`` uses.
+"""
+
+import array
+import math
+import os
+import re
+import wave
+from pathlib import Path
+
+from manim_voiceover.helper import remove_bookmarks
+from manim_voiceover.services.base import SpeechService
+from manim_voiceover.tracker import AUDIO_OFFSET_RESOLUTION
+
+
+# Environment variable selecting the speech backend of MathTutorialScene
+SPEECH_SERVICE_ENV = "NAMMI_SPEECH_SERVICE"
+
+
+def speech_backend(default="azure") -> str:
+    """Name of the speech backend to use: ``NAMMI_SPEECH_SERVICE`` if set, else default."""
+    return os.environ.get(SPEECH_SERVICE_ENV, "").strip().lower() or default
+
+
+# Relative speaking rates of the SSML rate keywords
+_RATE_KEYWORDS = {"x-slow": 0.5, "slow": 0.75, "medium": 1.0, "default": 1.0, "fast": 1.25, "x-fast": 1.5}
+
+
+def _speaking_rate(prosody) -> float:
+    """Speed factor of an SSML prosody rate ("-15%", "slow", "0.8"), 1 when unset."""
+    rate = str((prosody or {}).get("rate", "")).strip().lower()
+    if not rate:
+        return 1.0
+    if rate in _RATE_KEYWORDS:
+        return _RATE_KEYWORDS[rate]
+    try:
+        if rate.endswith("%"):
+            return max(0.1, 1 + float(rate[:-1]) / 100)
+        return max(0.1, float(rate))
+    except ValueError:
+        return 1.0
+
+
+class LocalSpeechService(SpeechService):
+    """Offline speech service writing WAVs of the estimated speaking duration.
+
+    The duration is derived from the word count, words_per_minute and the
+    prosody rate, so the timing of a scene is close to the real voiceover.
+    Word boundaries are spread evenly over the clip, which keeps bookmarks
+    working. Output is deterministic: the same text gives the same file.
+
+    Args:
+        voice: Recorded in the cache key only, like a real voice name
+        prosody: SSML prosody, only "rate" is used (e.g. {"rate": "-15%"})
+        words_per_minute: Speaking rate at prosody rate 100%
+        tone: Hz of a quiet tone to fill the clip with, None for silence
+        **kwargs: Passed to SpeechService
+    """
+
+    sample_rate = 16000
+
+    def __init__(self, voice="local", prosody=None, words_per_minute=150, tone=None, **kwargs):
+        super().__init__(**kwargs)
+        self.voice = voice
+        self.prosody = prosody or {}
+        self.words_per_minute = words_per_minute
+        self.tone = tone
+
+    def estimate_duration(self, text: str, prosody=None) -> float:
+        """Seconds it would take to speak text."""
+        words = len(re.findall(r"\S+", text))
+        rate = _speaking_rate(self.prosody if prosody is None else prosody)
+        return max(0.5, words * 60 / (self.words_per_minute * rate))
+
+    def generate_from_text(self, text: str, cache_dir: str = None, path: str = None, **kwargs) -> dict:
+        if cache_dir is None:
+            cache_dir = self.cache_dir
+        prosody = kwargs.get("prosody", self.prosody)
+        # Bookmarks are not spoken; word boundaries index the text without them
+        spoken = remove_bookmarks(text)
+        duration = self.estimate_duration(spoken, prosody)
+        input_data = {
+            "input_text": text,
+            "service": "local",
+            "config": {"voice": self.voice, "prosody": prosody, "tone": self.tone},
+        }
+        audio_path = path or self.get_audio_basename(input_data) + ".wav"
+        self._write_wav(Path(cache_dir) / audio_path, duration)
+
+        return {
+            "input_text": text,
+            "input_data": input_data,
+            "original_audio": audio_path,
+            "word_boundaries": self._word_boundaries(spoken, duration),
+        }
+
+    def _write_wav(self, path: Path, duration: float) -> None:
+        count = int(duration * self.sample_rate)
+        if self.tone:
+            step = 2 * math.pi * self.tone / self.sample_rate
+            samples = array.array("h", (int(1000 * math.sin(step * i)) for i in range(count)))
+        else:
+            samples = array.array("h", bytes(2 * count))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with wave.open(str(path), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(samples.tobytes())
+
+    def _word_boundaries(self, text: str, duration: float) -> list:
+        """Azure-style word boundaries, audio offsets in AUDIO_OFFSET_RESOLUTION units (100 ns).
+
+        A last boundary at the end of the text and the clip keeps bookmarks
+        after the last word inside the range manim_voiceover interpolates.
+        """
+        words = list(re.finditer(r"\S+", text))
+        boundaries = [
+            {
+                "audio_offset": int(AUDIO_OFFSET_RESOLUTION * duration * i / len(words)),
+                "text_offset": word.start(),
+                "word_length": len(word.group()),
+                "text": word.group(),
+                "boundary_type": "Word",
+            }
+            for i, word in enumerate(words)
+        ]
+        boundaries.append({
+            "audio_offset": int(AUDIO_OFFSET_RESOLUTION * duration),
+            "text_offset": len(text),
+            "word_length": 0,
+            "text": "",
+            "boundary_type": "Word",
+        })
+        return boundaries
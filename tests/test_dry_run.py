@@ -0,0 +1,134 @@
+"""Tests for the bookkeeping of dry runs, with a stand-in scene."""
+
+from types import SimpleNamespace
+
+import pytest
+from manim import Square
+
+from src.components.common.dry_run import DryRun
+
+
+class FakeScene:
+    """The part of a Scene a dry run instruments; plays only advance the clock."""
+
+    def __init__(self):
+        self.renderer = SimpleNamespace(time=0.0, skip_animations=False, _original_skipping_status=False)
+        self.duration = 0.0
+
+    def play(self, *animations, run_time=1.0):
+        # Like a play handed to another thread: nothing compiled, duration untouched
+        if not animations:
+            return
+        self.duration = run_time
+        self.renderer.time += run_time
+
+    def wait(self, duration=1.0):
+        self.play("wait", run_time=duration)
+
+    def next_section(self, name="unnamed", **kwargs):
+        pass
+
+    def add_voiceover_text(self, text, **kwargs):
+        return SimpleNamespace(duration=len(text.split()) * 0.5)
+
+
+def test_animation_time_and_boundaries():
+    scene = FakeScene()
+
+    def construct():
+        scene.play("write", run_time=2)
+        scene.next_section("solve")
+        scene.add_voiceover_text("two words")
+        scene.wait(0.5)
+        scene.play("transform", run_time=1.5)
+
+    report = DryRun(scene).run(construct)
+
+    assert report["plays"] == 3
+    assert report["animation_time"] == pytest.approx(4)
+    assert report["sections"] == [("autocreated", 2), ("solve", 2)]
+    assert report["voiceovers"] == [("two words", 1.0)]
+    assert report["boundaries"] == [(1, 2)]
+
+
+def test_play_without_animations_takes_no_time():
+    scene = FakeScene()
+
+    def construct():
+        scene.play("write", run_time=2)
+        scene.play()
+        scene.play("fade", run_time=1)
+
+    report = DryRun(scene).run(construct)
+
+    assert report["plays"] == 3
+    assert report["animation_time"] == pytest.approx(3)
+
+
+def test_warnings_are_the_warning_lines():
+    scene = FakeScene()
+    warnings = [
+        "Warning: Could not find pattern 'x^2'",
+        "[10/17/26 12:00:00] WARNING  Font Comic Sans not in the list of fonts",
+        "ERROR    Latex error converting to dvi",
+        "Could not compile equation 3 ahead: ValueError()",
+        "Cannot find left term target",
+        "No more equations to display.",
+        "Batched LaTeX compilation failed (expected pages 1-3, got [1, 2]), compiling one by one",
+        "Section cache inactive: caching is disabled (--disable_caching)",
+    ]
+    chatter = [
+        "Now we divide both sides by two",
+        "The error term is small",
+        "Dividing by zero cannot work",
+        "Total submobjects: 12",
+        "Failed attempts are fine here",
+    ]
+
+    def construct():
+        for line in warnings + chatter:
+            print(f"  {line}")
+
+    report = DryRun(scene).run(construct)
+
+    assert report["warnings"] == warnings
+
+
+def test_plays_with_time_based_updaters():
+    scene = FakeScene()
+    square = Square()
+    scene.mobjects = [square]
+
+    def construct():
+        scene.play("write")
+        square.add_updater(lambda mobject, dt: mobject.rotate(dt))
+        scene.play("wait")
+        square.clear_updaters()
+        square.add_updater(lambda mobject: mobject.set_x(0))
+        scene.play("wait")
+        scene.updaters = [lambda dt: None]
+        scene.play("wait")
+
+    report = DryRun(scene).run(construct)
+
+    assert report["time_based_plays"] == [1, 3]
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_skip_mode_is_restored(fails):
+    scene = FakeScene()
+    skipped = []
+
+    def construct():
+        skipped.append((scene.renderer.skip_animations, scene.renderer._original_skipping_status))
+        if fails:
+            raise ValueError("construct failed")
+
+    try:
+        DryRun(scene).run(construct)
+    except ValueError:
+        assert fails
+
+    assert skipped == [(True, True)]
+    assert scene.renderer.skip_animations is False
+    assert scene.renderer._original_skipping_status is False
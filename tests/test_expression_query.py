@@ -0,0 +1,265 @@
+"""Tests for ExpressionQuery and find_element, with synthetic glyphs instead of LaTeX."""
+
+import gc
+
+import numpy as np
+import pytest
+from manim import VGroup, VMobject, tempconfig
+
+from src.components.common import smart_tex
+from src.components.common.base_scene import MathTutorialScene
+from src.components.common.expression_query import ExpressionQuery
+from src.components.common.smart_tex import ExpressionShapeIndex, PatternShape, _glyph_ids, clear_shape_caches
+
+# Characters drawn as regular polygons, one more side each
+_ALPHABET = "x12345ac+=()"
+
+
+def _curves(corners):
+    """Closed outline of straight cubic Bézier curves through corners."""
+    points = []
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        a, b = np.array([*a, 0.0]), np.array([*b, 0.0])
+        points += [a, a + (b - a) / 3, a + 2 * (b - a) / 3, b]
+    return np.array(points)
+
+
+def _shape(char):
+    if char == "-":
+        return _curves([(-0.3, -0.05), (0.3, -0.05), (0.3, 0.05), (-0.3, 0.05)])
+    sides = 3 + _ALPHABET.index(char)
+    angles = np.linspace(0, 2 * np.pi, sides, endpoint=False)
+    return _curves([(0.4 * np.sin(a), 0.4 * np.cos(a)) for a in angles])
+
+
+def _glyphs(string):
+    """Glyph point arrays of string, a glyph per character, two units apart."""
+    return [_shape(char) + [2.0 * position, 0, 0] for position, char in enumerate(string)]
+
+
+def _glyph(points):
+    glyph = VMobject()
+    glyph.set_points(points)
+    return glyph
+
+
+class FakeMathTex(VGroup):
+    """Looks like a MathTex to the shape search: a tex string and one group of glyphs."""
+
+    def __init__(self, tex_string):
+        super().__init__(VGroup(*[_glyph(points) for points in _glyphs(tex_string)]))
+        self.tex_string = tex_string
+
+
+class FakeLibrary:
+    """Serves string patterns from the synthetic glyphs, counting the lookups."""
+
+    def __init__(self):
+        self.requests = []
+
+    def get(self, pattern, template=None, size=None):
+        self.requests.append(pattern)
+        glyphs = _glyphs(pattern)
+        return PatternShape(glyphs, tuple(_glyph_ids(glyphs)))
+
+    def cache_clear(self):
+        # Nothing is kept: every pattern is drawn again
+        pass
+
+
+@pytest.fixture(autouse=True)
+def library(monkeypatch):
+    # Expressions are indexed from their own points instead of a re-rendering
+    monkeypatch.setattr(smart_tex, "_search_glyphs", smart_tex._glyph_points)
+    library = FakeLibrary()
+    monkeypatch.setattr(smart_tex, "pattern_library", library)
+    return library
+
+
+def _at(exp, part):
+    """Positions in exp[0] of the glyphs of part."""
+    glyphs = list(exp[0].submobjects)
+    return [glyphs.index(glyph) for glyph in part.submobjects]
+
+
+def test_find_and_find_all():
+    exp = FakeMathTex("x+1=2x")
+    query = ExpressionQuery.of(exp)
+
+    assert _at(exp, query.find("x")) == [0]
+    assert _at(exp, query.find("x", 1)) == [5]
+    assert query.find("x", 2) is None
+    assert [_at(exp, part) for part in query.find_all("x")] == [[0], [5]]
+    assert _at(exp, query.find("=2")) == [3, 4]
+    assert query.find_all("3") == []
+
+
+def test_find_in_context():
+    exp = FakeMathTex("4ac-2a")
+    query = ExpressionQuery.of(exp)
+
+    assert _at(exp, query.find_in_context("a", "4ac")) == [1]
+    # The second "a" is neither within nor next to "4ac"
+    assert query.find_in_context("a", "4ac", 1) is None
+    assert _at(exp, query.find_in_context("2", "-2a")) == [4]
+
+
+def test_find_adjacent_and_signed_numbers():
+    exp = FakeMathTex("x-2=-2")
+    query = ExpressionQuery.of(exp)
+
+    pairs = [[_at(exp, part) for part in pair] for pair in (query.find_adjacent("-", "2", k) for k in range(2))]
+    assert pairs == [[[1], [2]], [[4], [5]]]
+    assert query.find_adjacent("2", "-") is None
+    assert [_at(exp, part) for part in query.find_signed_number("-2", 1)] == [[4], [5]]
+    assert query.find_signed_number("2") is None
+    assert query.find_signed_number("-") is None
+
+
+def test_each_pattern_is_searched_once(library):
+    exp = FakeMathTex("x+1=2x")
+    query = ExpressionQuery.of(exp)
+
+    query.find("x")
+    query.find_all("x")
+    query.find_in_context("x", "2x")
+    ExpressionQuery.of(exp).find_in_context("1", "2x")
+
+    assert library.requests == ["x", "2x", "1"]
+
+
+def test_query_of_a_temporary_expression():
+    query = ExpressionQuery.of(FakeMathTex("x+1=2x"))
+
+    assert [len(part) for part in query.find_all("x")] == [1, 1]
+    assert query.find("3") is None
+
+
+def test_prefetch_searches_in_one_pass(library, monkeypatch):
+    exp = FakeMathTex("x+1=2x")
+    expected = {pattern: ExpressionShapeIndex(exp).find(pattern) for pattern in ("x", "1", "=2", "3")}
+    passes = []
+    find_many = ExpressionShapeIndex.find_many
+
+    def counted_find_many(self, shapes_by_key, **kwargs):
+        passes.append(list(shapes_by_key))
+        return find_many(self, shapes_by_key, **kwargs)
+
+    monkeypatch.setattr(ExpressionShapeIndex, "find_many", counted_find_many)
+    query = ExpressionQuery.of(exp)
+    query.find("x")
+    library.requests.clear()
+
+    query.prefetch(["x", "1", "=2", "1", "3"])
+
+    assert passes == [["1", "=2", "3"]]
+    assert {pattern: query.slices(pattern) for pattern in expected} == expected
+    assert library.requests == ["1", "=2", "3"]
+
+
+def test_query_shares_the_shape_cache():
+    exp = FakeMathTex("x+1")
+    query = ExpressionQuery.of(exp)
+    query.find("x")
+    assert ExpressionQuery.of(exp)._slices is query._slices
+    assert ExpressionQuery.of(exp, 1)._slices is not query._slices
+    shape_index = ExpressionShapeIndex.of(exp)
+    assert ExpressionQuery.of(exp)._slices is query._slices
+
+    # A new tex string drops the found slices along with the shape index
+    exp.tex_string = "x+2"
+    assert ExpressionQuery.of(exp)._slices == {}
+    assert ExpressionShapeIndex.of(exp) is not shape_index
+
+    query = ExpressionQuery.of(exp)
+    query.find("x")
+    clear_shape_caches()
+    assert ExpressionQuery.of(exp)._slices == {}
+
+
+def test_cached_slices_do_not_keep_the_expression_alive():
+    exp = FakeMathTex("x+1")
+    ExpressionQuery.of(exp).find("x")
+    entries = len(smart_tex._INDEX_CACHE)
+
+    del exp
+    gc.collect()
+
+    assert len(smart_tex._INDEX_CACHE) == entries - 1
+
+
+def test_plain_mobjects_are_not_cached():
+    exp = VGroup(VGroup(*[_glyph(points) for points in _glyphs("x+1")]))
+    ExpressionQuery.of(exp).find("x")
+    assert ExpressionQuery.of(exp)._slices == {}
+    assert exp not in smart_tex._INDEX_CACHE
+
+
+def _previous_find_element(pattern, exp, nth=0, as_group=False, context=None):
+    """find_element before it was rebuilt on ExpressionQuery, without color and opacity."""
+    shape_index = ExpressionShapeIndex.of(exp)
+
+    if context:
+        pattern_indices = shape_index.find(pattern)
+        if pattern_indices:
+            context_indices = shape_index.find(context)
+            if context_indices:
+                context_matches = []
+                for p_idx in pattern_indices:
+                    for c_idx in context_indices:
+                        if p_idx.start >= c_idx.start and p_idx.stop <= c_idx.stop:
+                            context_matches.append(p_idx)
+                        elif (abs(p_idx.stop - c_idx.start) <= 1) or (abs(p_idx.start - c_idx.stop) <= 1):
+                            context_matches.append(p_idx)
+                if context_matches and nth < len(context_matches):
+                    element = exp[0][context_matches[nth]]
+                    return VGroup(element) if as_group else element
+
+    indices = shape_index.find(pattern)
+    if indices and nth < len(indices):
+        element = exp[0][indices[nth]]
+        return VGroup(element) if as_group else element
+
+    if pattern.startswith("-") and len(pattern) > 1:
+        adjacent_pairs = [
+            (minus_idx, num_idx)
+            for minus_idx in shape_index.find("-")
+            for num_idx in shape_index.find(pattern[1:])
+            if minus_idx.stop == num_idx.start
+        ]
+        if adjacent_pairs and nth < len(adjacent_pairs):
+            minus_idx, num_idx = adjacent_pairs[nth]
+            return VGroup(exp[0][minus_idx], exp[0][num_idx])
+    return None
+
+
+def _describe(mobject):
+    """Nesting of a found element down to the ids of its glyphs."""
+    if mobject is None:
+        return None
+    if not mobject.submobjects:
+        return id(mobject)
+    return [_describe(submobject) for submobject in mobject.submobjects]
+
+
+@pytest.fixture
+def scene(tmp_path):
+    with tempconfig({"media_dir": str(tmp_path), "pixel_width": 64, "pixel_height": 36}):
+        yield MathTutorialScene()
+
+
+@pytest.mark.parametrize("tex_string", ["4ac-2a=-2x", "x-2=-2x+2", "(x+1)-(-1)"])
+def test_find_element_gives_its_previous_results(scene, tex_string, capsys):
+    exp = FakeMathTex(tex_string)
+    patterns = ["x", "2", "-2", "a", "4ac", "-", "=", "-1", "(-1)", "3", "-3"]
+    contexts = [None, "4ac", "-2", "2x", "(-1)"]
+
+    for pattern in patterns:
+        for context in contexts:
+            for nth in range(3):
+                for as_group in (False, True):
+                    previous = _previous_find_element(pattern, exp, nth, as_group, context)
+                    found = scene.find_element(pattern, exp, nth, as_group=as_group, context=context)
+                    assert _describe(found) == _describe(previous), (pattern, context, nth, as_group)
+    # Misses still warn
+    assert "Warning: Could not find occurrence 0 of '3' within context '4ac'" in capsys.readouterr().out
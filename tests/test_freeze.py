@@ -0,0 +1,166 @@
+"""Tests for freezing mobjects into the background and detecting plays that animate them."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from manim import (
+    AnimationGroup,
+    Circle,
+    Dot,
+    FadeIn,
+    Indicate,
+    LaggedStart,
+    MovingCamera,
+    ReplacementTransform,
+    Square,
+    Succession,
+    Transform,
+    VGroup,
+    tempconfig,
+)
+
+from src.components.common.base_scene import MathTutorialScene
+
+
+def _animates_frozen(frozen, *animations):
+    scene = SimpleNamespace(frozen_mobjects=frozen)
+    return MathTutorialScene._animates_frozen(scene, animations)
+
+
+def test_animating_a_frozen_mobject():
+    axes, dot = VGroup(Square(), Circle()), Dot()
+    assert _animates_frozen([axes], Indicate(axes))
+    assert _animates_frozen([axes], axes.animate.shift([1, 0, 0]))
+    assert not _animates_frozen([axes], FadeIn(dot), dot.animate.shift([1, 0, 0]))
+
+
+def test_animating_part_of_a_frozen_mobject():
+    square = Square()
+    axes = VGroup(VGroup(square, Circle()), Dot())
+    assert _animates_frozen([axes], Indicate(square))
+    assert _animates_frozen([axes], square.animate.set_color("#FF0000"))
+
+
+def test_animating_a_group_holding_a_frozen_mobject():
+    title = Square()
+    assert _animates_frozen([title], FadeIn(VGroup(Dot(), VGroup(title))))
+
+
+def test_transform_into_a_frozen_mobject():
+    label, moving = Square(), Circle()
+    assert _animates_frozen([label], ReplacementTransform(moving, label))
+    assert _animates_frozen([VGroup(label)], Transform(moving, label))
+
+
+def test_frozen_mobjects_inside_animation_groups():
+    label, moving, other = Square(), Circle(), Dot()
+    assert _animates_frozen([label], AnimationGroup(FadeIn(other), Transform(moving, label)))
+    assert _animates_frozen([label], LaggedStart(Succession(FadeIn(other), ReplacementTransform(moving, label))))
+    assert not _animates_frozen([label], AnimationGroup(FadeIn(other), Transform(moving, Dot())))
+
+
+@pytest.fixture
+def scene(tmp_path):
+    with tempconfig({"media_dir": str(tmp_path), "pixel_width": 64, "pixel_height": 36, "frame_rate": 5}):
+        yield MathTutorialScene()
+
+
+def _plain_background(scene):
+    scene.camera.init_background()
+    return scene.camera.background.copy()
+
+
+def test_freeze_draws_into_the_background(scene):
+    plain = _plain_background(scene)
+    square = Square(side_length=4).set_fill("#FF0000", opacity=1)
+    scene.add(square)
+
+    scene.freeze(square)
+
+    assert scene.frozen_mobjects == [square]
+    assert square not in scene.mobjects
+    assert not np.array_equal(scene.camera.background, plain)
+
+
+def test_remove_takes_a_frozen_mobject_out_of_the_background(scene):
+    plain = _plain_background(scene)
+    square, circle = Square(side_length=4).set_fill("#FF0000", opacity=1), Circle()
+    scene.add(square, circle)
+    scene.freeze(square, circle)
+
+    scene.remove(square)
+
+    assert scene.frozen_mobjects == [circle]
+    assert square not in scene.mobjects
+    scene.remove(circle)
+    assert scene.frozen_mobjects == []
+    assert np.array_equal(scene.camera.background, plain)
+
+
+def test_removing_part_of_a_frozen_group(scene):
+    square, circle = Square(), Circle()
+    axes = VGroup(square, circle)
+    scene.add(axes)
+    scene.freeze(axes)
+
+    scene.remove(square)
+
+    assert scene.frozen_mobjects == []
+    assert circle in scene.mobjects and square not in scene.get_mobject_family_members()
+
+
+def test_clear_and_unfreeze_restore_the_background(scene):
+    plain = _plain_background(scene)
+    square = Square(side_length=4).set_fill("#FF0000", opacity=1)
+    scene.add(square)
+    scene.freeze(square)
+
+    scene.unfreeze()
+    assert scene.mobjects == [square]
+    assert np.array_equal(scene.camera.background, plain)
+
+    scene.freeze(square)
+    scene.clear()
+    assert scene.frozen_mobjects == [] and scene.mobjects == []
+    assert np.array_equal(scene.camera.background, plain)
+
+
+def test_direct_edits_are_redrawn(scene):
+    square = Square(side_length=4).set_fill("#FF0000", opacity=1)
+    scene.add(square)
+    scene.freeze(square)
+    red = scene.camera.background.copy()
+
+    square.set_fill("#0000FF")
+    scene._refresh_frozen()
+
+    assert scene.frozen_mobjects == [square]
+    assert not np.array_equal(scene.camera.background, red)
+
+
+def test_mobjects_with_updaters_are_not_frozen(scene, capsys):
+    still, moving = Square(), Circle().add_updater(lambda mobject, dt: mobject.rotate(dt))
+    scene.add(still, moving)
+
+    scene.freeze(still, moving)
+
+    assert scene.frozen_mobjects == [still]
+    assert moving in scene.mobjects
+    assert "Warning" in capsys.readouterr().out
+
+    still.add_updater(lambda mobject, dt: mobject.rotate(dt))
+    scene._refresh_frozen()
+    assert scene.frozen_mobjects == [] and still in scene.mobjects
+
+
+def test_nothing_is_frozen_with_a_moving_camera(scene, capsys):
+    scene.renderer.camera = MovingCamera()
+    square = Square()
+    scene.add(square)
+
+    scene.freeze(square)
+
+    assert scene.frozen_mobjects == []
+    assert square in scene.mobjects
+    assert "Warning" in capsys.readouterr().out
@@ -0,0 +1,111 @@
+"""Tests for building ordered steps, with every LaTeX run replaced by a one-glyph SVG."""
+
+import pytest
+from manim import RIGHT, MathTex, Square, VGroup, VMobject, tempconfig
+
+from src.components.common import smart_tex, tex_batch
+from src.components.common.annotation import Annotation
+from src.components.common.base_scene import MathTutorialScene
+from src.components.common.source_map import SourceMappedMathTex, inject_source_markers
+from src.components.common.tex_batch import record_tex, svg_path
+
+from tests.test_source_map import EXPRESSION, GLYPHS, _write_svg
+
+
+@pytest.fixture
+def compiled(tmp_path, monkeypatch):
+    """Expressions compiled, in batches or one by one; each SVG is a single square."""
+    expressions = []
+
+    def write(expression, environment=None, tex_template=None):
+        expressions.append(expression)
+        path = svg_path(expression, environment, tex_template)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(tex_batch._PLACEHOLDER_SVG, encoding="utf-8")
+        return path
+
+    def compile_tex_batch(jobs, max_workers=None):
+        for expression, environment, tex_template in jobs:
+            write(expression, environment, tex_template)
+
+    monkeypatch.setattr(tex_batch, "_manim_tex_to_svg_file", write)
+    monkeypatch.setattr(tex_batch, "compile_tex_batch", compile_tex_batch)
+    with tempconfig({"media_dir": str(tmp_path / "media"), "pixel_width": 64, "pixel_height": 36}):
+        yield expressions
+
+
+@pytest.fixture
+def scene(compiled):
+    return MathTutorialScene()
+
+
+class MappedTex(SourceMappedMathTex):
+    """A SourceMappedMathTex of EXPRESSION read back from a hand-written SVG, without LaTeX."""
+
+    def __init__(self, tmp_path):
+        VMobject.__init__(self)
+        self.add(VGroup(*[Square(side_length=0.4).shift(RIGHT * 0.5 * k) for k in range(12)]))
+        self.tex_string = EXPRESSION
+        self.file_name = str(_write_svg(tmp_path / "expression.svg", GLYPHS))
+        _, self._source_tokens = inject_source_markers(EXPRESSION)
+        self._source_map = self._read_source_map()
+
+
+def test_annotation_targets_of_a_source_mapped_expression(scene, tmp_path, monkeypatch):
+    exp = MappedTex(tmp_path)
+    assert exp.has_source_map
+    glyphs = list(exp[0].submobjects)
+    laid_out = []
+    layout = Annotation.layout
+
+    def recorded_layout(self, scene, left_term, right_term, **kwargs):
+        laid_out.append((left_term, right_term))
+        return layout(self, scene, left_term, right_term, **kwargs)
+
+    monkeypatch.setattr(Annotation, "layout", recorded_layout)
+    annotation = Annotation("-12", "25", scene.find_element_lazy("12"))
+
+    plan = scene._plan_step(
+        [exp, annotation],
+        scale_map={},
+        label_color="#DBDBDB",
+        label_scale=0.6,
+        expression_scale=1,
+        annotation_scale=1,
+        label_exp_buff=0.1,
+        exp_exp_buff=0.2,
+        annotation_exp_buff=0.2,
+        exp_annotation_buff=0.2,
+    )
+    assert plan["annotations"] == [(annotation, exp)]
+
+    targets = scene.resolve_annotations(plan["annotations"])
+    # Both targets come from the source map: no shape index was built
+    assert smart_tex._INDEX_CACHE[exp][1] == {}
+    (left, right), = targets
+    assert list(left.submobjects) == glyphs[7:9]
+    assert list(right.submobjects) == glyphs[10:12]
+
+    step = scene._build_step(plan, targets)
+    assert laid_out == [(left, right)]
+    assert len(step.expressions) == 1 and len(step.annotations) == 1
+    # One term under each target
+    left_term, right_term = step.annotations[0]
+    assert left_term.get_center()[0] == pytest.approx(left.get_center()[0])
+    assert right_term.get_center()[0] == pytest.approx(right.get_center()[0])
+
+
+def test_steps_need_no_tex_after_prerender(scene, compiled):
+    steps = (
+        ["Subtract 12", MathTex("x^2 + 10x + 25 = 12"), Annotation("-12", "25", "12"), MathTex("x^2 + 10x + 13 = 0")],
+        [MathTex("(x + 5)^2 = 12"), Annotation("-5", scene.find_element_lazy("x"), "12")],
+    )
+    assert scene.prerender_steps(steps) > 0
+    compiled.clear()
+
+    # Building the steps for real: every string was compiled by the prerender
+    with record_tex() as jobs:
+        scene.create_ordered_steps(*steps, prerender=False)
+
+    assert jobs == []
+    assert compiled == []
@@ -0,0 +1,119 @@
+"""Tests for the segment planning of parallel renders."""
+
+from src.components.common import parallel_render
+from src.components.common.parallel_render import SEGMENT_ENV, plan_segments, render_parallel, render_segment
+
+
+def _report(plays, boundaries, seconds_per_play=1.0):
+    return {
+        "plays": plays,
+        "animation_time": plays * seconds_per_play,
+        "boundaries": [[play, play * seconds_per_play] for play in boundaries],
+    }
+
+
+def _assert_covers(segments, plays):
+    assert segments[0][0] == 0
+    assert segments[-1][1] == plays - 1
+    for (_, last), (first, _) in zip(segments, segments[1:]):
+        assert first == last + 1
+    assert all(first <= last for first, last in segments)
+
+
+def test_no_plays():
+    assert plan_segments(_report(0, []), 4) == []
+
+
+def test_cuts_at_boundaries_into_even_segments():
+    segments = plan_segments(_report(12, [0, 3, 6, 9]), 4)
+    assert segments == [(0, 2), (3, 5), (6, 8), (9, 11)]
+
+
+def test_cuts_at_the_closest_boundary():
+    # Half of the video is at play 5; the boundary at 7 is closer than the one at 2
+    segments = plan_segments(_report(10, [0, 2, 7, 9]), 2)
+    assert segments == [(0, 6), (7, 9)]
+
+
+def test_only_cuts_at_boundaries():
+    segments = plan_segments(_report(20, [0, 13, 20]), 4)
+    assert segments == [(0, 12), (13, 19)]
+    _assert_covers(segments, 20)
+
+
+def test_one_worker_renders_everything():
+    assert plan_segments(_report(9, [0, 3, 6]), 1) == [(0, 8)]
+
+
+def test_fewer_plays_than_workers():
+    segments = plan_segments(_report(3, [0, 1, 2]), 8)
+    assert segments == [(0, 0), (1, 1), (2, 2)]
+
+
+def test_segments_cover_every_play_once():
+    for workers in range(1, 10):
+        segments = plan_segments(_report(25, range(0, 25, 2), seconds_per_play=0.5), workers)
+        assert len(segments) <= workers
+        _assert_covers(segments, 25)
+
+
+def test_workers_render_their_segment(monkeypatch):
+    runs = []
+    monkeypatch.setattr(parallel_render, "dry_run", lambda *args: _report(12, [0, 3, 6, 9]))
+    monkeypatch.setattr(parallel_render, "_run", lambda command, **env: runs.append((command, env)))
+
+    result = render_parallel("scene.py", "Scene", workers=4, extra=["--disable_caching", "--fps", "15"])
+
+    *segment_runs, combine = runs
+    ranges = sorted(command[command.index("-n") + 1] for command, _ in segment_runs)
+    assert ranges == ["0,2", "3,5", "6,8", "9,11"]
+    for command, env in segment_runs:
+        assert env[SEGMENT_ENV] == command[command.index("-n") + 1]
+        assert "--fps" in command
+    # The final run concatenates everything
+    assert "-n" not in combine[0] and not combine[1]
+    assert result["segments"] == [(0, 2), (3, 5), (6, 8), (9, 11)]
+
+
+def test_render_segment_reads_the_range(monkeypatch):
+    monkeypatch.setenv(SEGMENT_ENV, "3,5")
+    assert render_segment() == (3, 5)
+    monkeypatch.setenv(SEGMENT_ENV, "")
+    assert render_segment() is None
+
+
+def test_caching_cannot_be_disabled(monkeypatch, capsys):
+    dry_runs = []
+    runs = []
+
+    def dry_run(scene_file, scene_name, quality, extra):
+        dry_runs.append(extra)
+        return _report(4, [0, 2])
+
+    monkeypatch.setattr(parallel_render, "dry_run", dry_run)
+    monkeypatch.setattr(parallel_render, "_run", lambda command, **env: runs.append(command))
+
+    render_parallel("scene.py", "Scene", workers=2, extra=["--disable_caching"])
+
+    assert dry_runs == [[]]
+    assert not any("--disable_caching" in command for command in runs)
+    assert "Warning: --disable_caching ignored" in capsys.readouterr().out
+
+
+def test_warns_about_time_based_updaters(monkeypatch, capsys):
+    report = {**_report(4, [0, 2]), "time_based_plays": [1, 2, 3]}
+    monkeypatch.setattr(parallel_render, "dry_run", lambda *args: report)
+    monkeypatch.setattr(parallel_render, "_run", lambda command, **env: None)
+
+    render_parallel("scene.py", "Scene", workers=2)
+
+    assert "Warning: 3 plays run with time-based (dt) updaters, from play 1" in capsys.readouterr().out
+
+
+def test_no_warning_without_time_based_updaters(monkeypatch, capsys):
+    monkeypatch.setattr(parallel_render, "dry_run", lambda *args: _report(4, [0, 2]))
+    monkeypatch.setattr(parallel_render, "_run", lambda command, **env: None)
+
+    render_parallel("scene.py", "Scene", workers=2)
+
+    assert "Warning" not in capsys.readouterr().out
@@ -0,0 +1,127 @@
+"""Tests for the prewarm rehearsal loop of MathTutorialScene, without LaTeX."""
+
+import pytest
+from manim import Circle, Square, tempconfig
+
+from src.components.common import base_scene
+from src.components.common.base_scene import MathTutorialScene
+
+
+@pytest.fixture
+def scene(tmp_path):
+    with tempconfig({"media_dir": str(tmp_path), "pixel_width": 64, "pixel_height": 36}):
+        yield MathTutorialScene()
+
+
+@pytest.fixture
+def compiled(monkeypatch):
+    """Batches handed to compile_tex_batch by prewarm."""
+    batches = []
+    monkeypatch.setattr(base_scene, "compile_tex_batch", lambda jobs, max_workers=None: batches.append(list(jobs)))
+    return batches
+
+
+def _job(expression):
+    return (expression, "align*", None)
+
+
+def _script(scene, monkeypatch, passes):
+    """Makes each rehearsal return the next (jobs, failure) pair of passes."""
+    remaining = list(passes)
+    calls = []
+
+    def rehearse(construct, voiceovers):
+        calls.append(construct)
+        return remaining.pop(0)
+
+    monkeypatch.setattr(scene, "_rehearse", rehearse)
+    return calls
+
+
+def test_prewarm_stops_once_construct_completes(scene, monkeypatch, compiled):
+    calls = _script(scene, monkeypatch, [
+        ([_job("x")], IndexError("placeholder")),
+        ([_job("x"), _job("y")], None),
+        ([_job("z")], None),
+    ])
+
+    assert scene.prewarm(lambda: None) == 2
+
+    assert len(calls) == 2
+    assert compiled == [[_job("x")], [_job("y")]]
+
+
+def test_prewarm_stops_when_a_pass_records_nothing_new(scene, monkeypatch, compiled, capsys):
+    calls = _script(scene, monkeypatch, [
+        ([_job("x")], IndexError("placeholder")),
+        ([_job("x")], IndexError("placeholder")),
+        ([_job("y")], None),
+    ])
+
+    assert scene.prewarm(lambda: None) == 1
+
+    assert len(calls) == 2
+    assert compiled == [[_job("x")], []]
+    assert "Prewarm rehearsal stopped early: IndexError('placeholder')" in capsys.readouterr().out
+
+
+def test_prewarm_gives_up_after_max_passes(scene, monkeypatch, compiled, capsys):
+    calls = _script(scene, monkeypatch, [([_job(str(k))], KeyError(k)) for k in range(5)])
+
+    assert scene.prewarm(lambda: None, max_passes=3) == 3
+
+    assert len(calls) == 3
+    assert "Prewarm rehearsal stopped early: KeyError(2)" in capsys.readouterr().out
+
+
+def test_prewarm_without_passes(scene, monkeypatch, compiled, capsys):
+    calls = _script(scene, monkeypatch, [])
+
+    assert scene.prewarm(lambda: None, max_passes=0) == 0
+
+    assert calls == [] and compiled == []
+    assert capsys.readouterr().out == ""
+
+
+def test_rehearsal_restores_the_scene(scene):
+    kept = Circle()
+    scene.add(kept)
+    seen = {}
+
+    def construct():
+        seen["rehearsing"] = scene.rehearsing
+        square = Square()
+        scene.add(square)
+        scene.freeze(square)
+        scene.play(square.animate.shift([1, 0, 0]))
+        with scene.voiceover("Divide both sides by two.") as tracker:
+            scene.wait(tracker.duration)
+        raise ValueError("stop")
+
+    voiceovers = {}
+    jobs, failure = scene._rehearse(construct, voiceovers)
+
+    assert jobs == []
+    assert isinstance(failure, ValueError)
+    assert seen == {"rehearsing": True}
+    assert not scene.rehearsing
+    # What setup added is still there, what the rehearsal added is not
+    assert scene.mobjects == [kept] and scene.frozen_mobjects == []
+    # The stand-ins are gone, the scene's own methods are back
+    assert "play" not in vars(scene) and "voiceover" not in vars(scene)
+    assert [text for text, _ in voiceovers.values()] == ["Divide both sides by two."]
+
+
+def test_rehearsal_raises_unexpected_errors(scene):
+    kept = Circle()
+    scene.add(kept)
+
+    def construct():
+        scene.add(Square())
+        raise RuntimeError("not a placeholder failure")
+
+    with pytest.raises(RuntimeError):
+        scene._rehearse(construct, {})
+
+    assert scene.mobjects == [kept]
+    assert not scene.rehearsing and "play" not in vars(scene)
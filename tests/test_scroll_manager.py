@@ -0,0 +1,322 @@
+"""Tests for ScrollManager scrolling, callouts and replacements, without rendering."""
+
+import threading
+
+import numpy as np
+import pytest
+from manim import DOWN, UL, Dot, FadeOut, LaggedStart, Rectangle, Tex, VGroup, tempconfig
+from manim.animation.animation import prepare_animation
+
+from src.components.common import scroll_manager
+from src.components.common.scroll_manager import LazyEquations, ScrollManager
+
+
+class RecordingScene:
+    """Stands in for a Scene: records the plays and brings every animation to its end."""
+
+    def __init__(self):
+        self.plays = []
+        self.waits = []
+
+    def play(self, *animations, **kwargs):
+        animations = [prepare_animation(animation) for animation in animations]
+        self.plays.append((animations, kwargs))
+        for animation in animations:
+            animation.begin()
+            animation.finish()
+
+    def wait(self, duration=1.0):
+        self.waits.append(duration)
+
+
+class Callout:
+    """The part of a callout manager ScrollManager uses."""
+
+    def __init__(self, name):
+        self.name = name
+        self.callout = Dot()
+        self.is_visible = True
+
+    def get_callout(self):
+        return self.callout
+
+
+def _equations(*heights):
+    return VGroup(*[Rectangle(height=height, width=2) for height in heights]).arrange(DOWN, buff=0.5)
+
+
+def _faded_callouts(scene, callouts):
+    """Names of the callouts faded out by the last play, in play order."""
+    by_mobject = {id(callout.callout): callout.name for callout in callouts}
+    animations, _ = scene.plays[-1]
+    return [
+        by_mobject[id(animation.mobject)]
+        for animation in animations
+        if isinstance(animation, FadeOut) and id(animation.mobject) in by_mobject
+    ]
+
+
+@pytest.fixture
+def scene():
+    return RecordingScene()
+
+
+def test_scroll_with_mixed_heights(scene):
+    equations = _equations(1, 3, 0.5, 2, 1.5, 1)
+    top = equations[0].get_top().copy()
+    spacing = equations[4].get_top()[1] - equations[3].get_bottom()[1]
+    manager = ScrollManager(equations)
+    manager.prepare_next(scene, steps=4)
+
+    manager.scroll_down(scene, steps=2)
+
+    # The first equation left in view takes the place of the first one
+    assert np.allclose(equations[2].get_top(), top)
+    assert manager.scroll_offset[1] == pytest.approx(1 + 3 + 2 * 0.5)
+    # Pending equations moved with it, still stacked below
+    assert equations[4].get_top()[1] == pytest.approx(equations[3].get_bottom()[1] + spacing)
+
+    manager.scroll_down(scene, steps=1)
+
+    assert np.allclose(equations[3].get_top(), top)
+    assert manager.scroll_offset[1] == pytest.approx(1 + 3 + 0.5 + 3 * 0.5)
+    assert equations[5].get_top()[1] == pytest.approx(equations[4].get_bottom()[1] + spacing)
+
+
+def test_scroll_past_the_written_equations(scene):
+    equations = _equations(1, 2, 1)
+    top = equations[0].get_top().copy()
+    manager = ScrollManager(equations)
+    manager.prepare_next(scene, steps=1)
+
+    # Everything in view scrolls out: the next equation to come moves up
+    manager.scroll_down(scene, steps=1)
+
+    assert np.allclose(equations[1].get_top(), top)
+    manager.prepare_next(scene)
+    assert manager.current_position == 2
+
+
+def test_callouts_expire_in_attach_order(scene):
+    manager = ScrollManager(_equations(1, 1, 1, 1))
+    callouts = {name: Callout(name) for name in ["scroll 1", "scroll 0", "equation 1", "equation 0", "scroll 0 again"]}
+    manager.attach_callout_at_scroll(1, callouts["scroll 1"])
+    manager.attach_callout_at_scroll(0, callouts["scroll 0"])
+    manager.attach_callout_to_equation(1, callouts["equation 1"])
+    manager.attach_callout_to_equation(0, callouts["equation 0"])
+    manager.attach_callout_at_scroll(0, callouts["scroll 0 again"])
+    manager.prepare_next(scene, steps=3)
+
+    manager.scroll_down(scene, steps=1)
+    assert _faded_callouts(scene, callouts.values()) == ["scroll 0", "scroll 0 again", "equation 0"]
+
+    manager.scroll_down(scene, steps=1)
+    assert _faded_callouts(scene, callouts.values()) == ["scroll 1", "equation 1"]
+    assert not any(callout.is_visible for callout in callouts.values())
+
+
+def test_callouts_attached_too_late_never_fire(scene):
+    manager = ScrollManager(_equations(1, 1, 1))
+    manager.prepare_next(scene, steps=3)
+    manager.scroll_down(scene, steps=1)
+    late = Callout("late")
+    manager.attach_callout_at_scroll(0, late)
+
+    manager.scroll_down(scene, steps=1)
+
+    assert _faded_callouts(scene, [late]) == []
+    assert late.is_visible
+
+
+def test_fade_out_in_view_expires_equation_callouts(scene):
+    manager = ScrollManager(_equations(1, 1, 1))
+    callouts = [Callout("equation 0"), Callout("equation 1"), Callout("equation 2")]
+    for index, callout in enumerate(callouts):
+        manager.attach_callout_to_equation(index, callout)
+    manager.prepare_next(scene, steps=3)
+
+    manager.fade_out_in_view(scene, steps=2)
+
+    assert _faded_callouts(scene, callouts) == ["equation 0", "equation 1"]
+    assert callouts[2].is_visible
+
+
+def _replacements():
+    return [VGroup(Rectangle(height=1, width=3), Dot()) for _ in range(3)]
+
+
+def test_batched_cascade_keeps_the_cascade_timing(scene):
+    equations = _equations(1, 1, 1)
+    manager = ScrollManager(equations)
+    manager.prepare_next(scene, steps=3)
+    scene.plays.clear()
+
+    manager.cascade_update(scene, 0, _replacements(), cascade_delay=0.2, run_time=1, batched=True)
+
+    [([cascade], kwargs)] = scene.plays
+    assert isinstance(cascade, LaggedStart)
+    assert "run_time" not in kwargs
+    assert cascade.lag_ratio == pytest.approx((1 + 0.2) / 1)
+    assert list(cascade.anims_with_timings["start"]) == pytest.approx([0, 1.2, 2.4])
+    # As long as three plays of 1 s with two waits of 0.2 s in between
+    assert cascade.run_time == pytest.approx(3 * 1 + 2 * 0.2)
+
+
+def test_batched_cascade_updates_the_owner_map(scene):
+    equations = _equations(1, 1, 1)
+    originals = list(equations)
+    manager = ScrollManager(equations)
+    manager.prepare_next(scene, steps=3)
+    assert manager.get_top_level_index(originals[1]) == 1
+
+    new_contents = _replacements()
+    manager.cascade_update(scene, 1, new_contents[:2], batched=True)
+
+    assert [manager.get_top_level_index(content) for content in new_contents[:2]] == [1, 2]
+    assert manager.get_top_level_index(new_contents[0][1]) == 1
+    assert manager.get_top_level_parent(new_contents[1][0]) is new_contents[1]
+    assert manager.get_top_level_index(originals[1]) is None
+    assert manager.get_top_level_index(originals[0]) == 0
+    assert manager.replacements == {1: originals[1], 2: originals[2]}
+
+
+def test_cascade_without_run_time_is_not_batched(scene):
+    manager = ScrollManager(_equations(1, 1))
+    manager.prepare_next(scene, steps=2)
+    scene.plays.clear()
+
+    manager.cascade_update(scene, 0, _replacements()[:2], cascade_delay=0.2, run_time=0, batched=True)
+
+    assert len(scene.plays) == 2
+    assert scene.waits == [0.2]
+
+
+class Builder:
+    """Equation builder recording which equations it built, and on which thread."""
+
+    def __init__(self, *heights):
+        self.heights = heights
+        self.built = []
+        self.threads = set()
+
+    def __call__(self, index):
+        self.built.append(index)
+        self.threads.add(threading.current_thread())
+        return Rectangle(height=self.heights[index], width=2)
+
+
+def test_lazy_equations_build_in_order_on_demand():
+    build = Builder(1, 2, 1, 1)
+    equations = LazyEquations(build, len(build.heights), start=[-4, 3, 0], buff=0.5)
+    assert build.built == []
+
+    third = equations[2]
+
+    assert build.built == [0, 1, 2]
+    assert equations.built == 3 and len(equations) == 4
+    assert np.allclose(equations[0].get_corner(UL), [-4, 3, 0])
+    # Stacked downwards, buff apart
+    assert equations[1].get_top()[1] == pytest.approx(equations[0].get_bottom()[1] - 0.5)
+    assert third.get_top()[1] == pytest.approx(equations[1].get_bottom()[1] - 0.5)
+    assert len(equations[0:2]) == 2 and build.built == [0, 1, 2]
+
+
+def test_lazy_equations_from_a_generator_have_no_length():
+    equations = LazyEquations(Rectangle(height=1, width=2) for _ in range(3))
+
+    with pytest.raises(TypeError):
+        len(equations)
+    assert equations.built == 0
+    assert equations.available(10) == 3
+    with pytest.raises(IndexError):
+        equations[3]
+
+
+def test_lazy_equations_release():
+    equations = LazyEquations(Builder(1, 1, 1), 3)
+    equations[2]
+
+    equations.release(0, 2)
+
+    assert equations[0] is None and equations[1] is None
+    assert list(equations) == [equations[2]]
+    assert equations.built == 3
+
+
+def test_scroll_releases_lazy_equations_and_places_the_next_ones(scene):
+    build = Builder(1, 2, 1, 1)
+    equations = LazyEquations(build, len(build.heights), buff=0.5)
+    manager = ScrollManager(equations)
+    manager.prepare_next(scene, steps=2)
+    assert build.built == [0, 1]
+
+    manager.scroll_down(scene, steps=1)
+
+    assert equations[0] is None
+    assert build.built == [0, 1]
+    # Built after the scroll, below the equation that moved up
+    manager.prepare_next(scene)
+    assert build.built == [0, 1, 2]
+    assert equations[2].get_top()[1] == pytest.approx(equations[1].get_bottom()[1] - 0.5)
+
+
+@pytest.fixture
+def batches(tmp_path, monkeypatch):
+    """Batches compiled ahead, with the thread compiling each."""
+    compiled = []
+
+    def compile_tex_batch(jobs, max_workers=1):
+        compiled.append(([expression for expression, _, _ in jobs], threading.current_thread()))
+
+    monkeypatch.setattr(scroll_manager, "compile_tex_batch", compile_tex_batch)
+    with tempconfig({"tex_dir": str(tmp_path / "Tex")}):
+        yield compiled
+
+
+def test_lazy_equations_compile_ahead_on_the_worker(batches):
+    build = Builder(1, 1, 1, 1)
+    # A MathTex records its substrings too, and x_ comes back: each job is sent once
+    tex_strings = lambda index: [f"x_{index}", (Tex, f"step {index}"), f"x_{index}"]
+
+    with LazyEquations(build, 4, tex_strings=tex_strings, lookahead=2) as equations:
+        equations[0]
+        equations[1]
+        equations[3]
+
+    # The next two equations first, then the one after them
+    assert [expressions for expressions, _ in batches] == [
+        ["x_1", "step 1", "x_2", "step 2"],
+        ["x_3", "step 3"],
+    ]
+    assert threading.main_thread() not in {thread for _, thread in batches}
+    # Equations themselves are only built on the calling thread
+    assert build.threads == {threading.main_thread()}
+    assert build.built == [0, 1, 2, 3]
+
+
+def test_failed_compile_ahead_still_builds(batches, monkeypatch, capsys):
+    def fail(jobs, max_workers=1):
+        raise RuntimeError("latex")
+
+    monkeypatch.setattr(scroll_manager, "compile_tex_batch", fail)
+    equations = LazyEquations(Builder(1, 1), 2, tex_strings=lambda index: [f"x_{index}"], lookahead=1)
+
+    equations[0]
+    assert equations[1] is not None
+
+    assert "Could not compile equation 1 ahead: RuntimeError('latex')" in capsys.readouterr().out
+
+
+def test_failed_prepare_ahead_is_reported(batches, capsys):
+    def broken(string):
+        raise ValueError("substring")
+
+    tex_strings = lambda index: [(broken, f"x_{index}"), f"y_{index}"]
+    equations = LazyEquations(Builder(1, 1), 2, tex_strings=tex_strings, lookahead=1)
+
+    equations[0]
+    assert equations[1] is not None
+
+    assert "Could not prepare equation 1 ahead: ValueError('substring')" in capsys.readouterr().out
+    # The other strings of the equation are still compiled ahead
+    assert [expressions for expressions, _ in batches] == [["y_1"]]
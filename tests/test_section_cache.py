@@ -0,0 +1,134 @@
+"""Tests for the partial movie hashes of the section cache, without rendering."""
+
+import hashlib
+from types import SimpleNamespace
+
+from manim import RIGHT, Circle, FadeIn, Square, config
+from manim.renderer import cairo_renderer
+
+from src.components.common.section_cache import (
+    SECTION_CACHE_FILES,
+    SectionCache,
+    _hash_value,
+    hash_mobject,
+    install_section_cache,
+    uninstall_section_cache,
+)
+
+
+def _scene(*mobjects):
+    """The part of a Scene the section cache reads."""
+    return SimpleNamespace(mobjects=list(mobjects), foreground_mobjects=[], frozen_mobjects=[])
+
+
+CAMERA = SimpleNamespace(pixel_width=854, pixel_height=480, frame_rate=15, frame_width=14.2, frame_height=8)
+
+
+def _mobject_hash(mobject):
+    h = hashlib.blake2b()
+    hash_mobject(h, mobject)
+    return h.hexdigest()
+
+
+def _value_hash(value):
+    h = hashlib.blake2b()
+    _hash_value(h, value)
+    return h.hexdigest()
+
+
+def _shifter(distance):
+    return lambda mobject, dt: mobject.shift(RIGHT * distance * dt)
+
+
+def _scaler(default):
+    def scale(mobject, dt, factor=default):
+        mobject.scale(factor)
+
+    return scale
+
+
+def test_hash_follows_points():
+    assert _mobject_hash(Square()) == _mobject_hash(Square())
+    assert _mobject_hash(Square()) != _mobject_hash(Square().shift(RIGHT))
+    assert _mobject_hash(Square()) != _mobject_hash(Square(side_length=3))
+
+
+def test_hash_follows_style():
+    assert _mobject_hash(Square()) != _mobject_hash(Square().set_color("#FF0000"))
+    assert _mobject_hash(Square()) != _mobject_hash(Square().set_fill(opacity=0.5))
+    assert _mobject_hash(Square()) != _mobject_hash(Square().set_stroke(width=8))
+
+
+def test_hash_follows_updater_closures_and_defaults():
+    assert _mobject_hash(Square().add_updater(_shifter(1))) == _mobject_hash(Square().add_updater(_shifter(1)))
+    assert _mobject_hash(Square().add_updater(_shifter(1))) != _mobject_hash(Square().add_updater(_shifter(2)))
+    # Same code and name, another default value
+    assert _value_hash(_scaler(1.0)) == _value_hash(_scaler(1.0))
+    assert _value_hash(_scaler(1.0)) != _value_hash(_scaler(2.0))
+
+
+def test_hash_follows_rate_function_closures():
+    def power(exponent):
+        return lambda t: t**exponent
+
+    square = Square()
+    assert _value_hash(FadeIn(square, rate_func=power(2))) == _value_hash(FadeIn(square, rate_func=power(2)))
+    assert _value_hash(FadeIn(square, rate_func=power(2))) != _value_hash(FadeIn(square, rate_func=power(3)))
+
+
+def _render(blocks, audio_dir):
+    """Play hashes of a run of voiceover blocks, given as (audio bytes, run times of its plays)."""
+    square, circle = Square(), Circle()
+    cache = SectionCache(_scene(square, circle))
+    hashes = []
+    for number, (audio, plays) in enumerate(blocks):
+        audio_file = audio_dir / f"block{number}.mp3"
+        audio_file.write_bytes(audio)
+        cache.start_block(audio_file)
+        hashes.append([
+            cache.play_hash(CAMERA, [FadeIn(square, run_time=run_time)], [square, circle])
+            for run_time in plays
+        ])
+    return hashes
+
+
+def test_hash_follows_block_audio(tmp_path):
+    first = _render([(b"one", [1, 1])], tmp_path)
+    assert _render([(b"one", [1, 1])], tmp_path) == first
+    assert _render([(b"two", [1, 1])], tmp_path)[0][0] != first[0][0]
+
+
+def test_hash_follows_section_boundaries():
+    square = Square()
+    plain, split = SectionCache(_scene(square)), SectionCache(_scene(square))
+    plain.play_hash(CAMERA, [FadeIn(square)], [square])
+    split.play_hash(CAMERA, [FadeIn(square)], [square])
+    split.start_block()
+
+    assert plain.play_hash(CAMERA, [FadeIn(square)], [square]) != split.play_hash(CAMERA, [FadeIn(square)], [square])
+
+
+def test_edit_keeps_the_hashes_of_later_blocks(tmp_path):
+    before = _render([(b"one", [1, 1]), (b"two", [1, 2])], tmp_path)
+    # The second play of the first block is edited, its end state is the same
+    after = _render([(b"one", [1, 3]), (b"two", [1, 2])], tmp_path)
+
+    assert after[0][0] == before[0][0]
+    assert after[0][1] != before[0][1]
+    assert after[1] == before[1]
+
+
+def test_uninstall_restores_the_hook_and_cache_size():
+    scene = _scene()
+    hook, max_files_cached = cairo_renderer.get_hash_from_play_call, config.max_files_cached
+
+    install_section_cache(scene)
+    assert cairo_renderer.get_hash_from_play_call is not hook
+    assert config.max_files_cached >= SECTION_CACHE_FILES
+
+    uninstall_section_cache(scene)
+    assert cairo_renderer.get_hash_from_play_call is hook
+    assert config.max_files_cached == max_files_cached
+    # A second call changes nothing
+    uninstall_section_cache(scene)
+    assert cairo_renderer.get_hash_from_play_call is hook
@@ -0,0 +1,336 @@
+"""Tests for the glyph ID search of smart_tex."""
+
+import gc
+import threading
+
+import numpy as np
+import pytest
+
+from manim import VGroup, VMobject
+
+from src.components.common import smart_tex
+from src.components.common.smart_tex import (
+    SHAPE_CACHE_ENV,
+    ExpressionShapeIndex,
+    PatternLibrary,
+    _search_template,
+    _shape_cache_key,
+    _glyph_ids,
+    _kmp_search,
+    _load_glyph_points,
+    _store_glyph_points,
+    clear_shape_caches,
+    outline_distances,
+    search_shape_in_text,
+)
+
+
+def _naive_search(sequence, pattern):
+    return [
+        i for i in range(len(sequence) - len(pattern) + 1)
+        if pattern and list(sequence[i : i + len(pattern)]) == list(pattern)
+    ]
+
+
+def test_kmp_finds_overlapping_matches():
+    assert _kmp_search([1, 1, 1, 1], [1, 1]) == [0, 1, 2]
+    assert _kmp_search([1, 2, 1, 2, 1], [1, 2, 1]) == [0, 2]
+
+
+def test_kmp_matches_naive_search():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        sequence = rng.integers(0, 3, size=rng.integers(0, 20)).tolist()
+        pattern = rng.integers(0, 3, size=rng.integers(1, 5)).tolist()
+        assert _kmp_search(sequence, pattern) == _naive_search(sequence, pattern)
+
+
+def test_kmp_empty_pattern_and_no_match():
+    assert _kmp_search([1, 2, 3], []) == []
+    assert _kmp_search([1, 2, 3], [4]) == []
+    assert _kmp_search([], [1]) == []
+    assert _kmp_search([1, 2], [1, 2, 3]) == []
+
+
+def _square(size, x=0.0):
+    """Glyph point array of a square outline."""
+    return np.array([[x, 0, 0], [x + size, 0, 0], [x + size, size, 0], [x, size, 0]], dtype=float)
+
+
+def _square_at(x=0.0):
+    return _square(1, x)
+
+
+def _triangle(x=0.0):
+    return np.array([[x, 0, 0], [x + 1, 0, 0], [x + 0.5, 1, 0]], dtype=float)
+
+
+def test_glyph_ids_depend_on_shape_only():
+    square, moved_square, big_square, triangle = _glyph_ids([_square(1), _square(1, 5), _square(3), _triangle()])
+    assert square == moved_square == big_square
+    assert square != triangle
+
+
+def test_glyph_ids_are_unique_across_threads():
+    # Squares with one corner pulled further each time: all distinct shapes
+    shapes = []
+    for k in range(1, 200):
+        shape = _square(1)
+        shape[2, 0] += 0.02 * k
+        shapes.append(shape)
+    results = [None] * len(shapes)
+
+    def intern(k):
+        results[k] = _glyph_ids([shapes[k]])[0]
+
+    threads = [threading.Thread(target=intern, args=(k,)) for k in range(len(shapes))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == len(shapes)
+    assert _glyph_ids(shapes) == results
+
+
+def test_reset_never_reuses_glyph_ids():
+    before = _glyph_ids([_triangle()])[0]
+    clear_shape_caches()
+    after = _glyph_ids([_square(1)])[0]
+    assert after != before
+    assert _glyph_ids([_triangle()])[0] not in (before, after)
+
+
+def test_concurrent_stores_of_one_key(tmp_path, monkeypatch):
+    monkeypatch.setenv(SHAPE_CACHE_ENV, str(tmp_path))
+    groups = [[_square(1), _triangle()], [_square(2)]]
+    errors = []
+
+    def store():
+        try:
+            for _ in range(20):
+                _store_glyph_points("key", groups)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    loaded = _load_glyph_points("key")
+    assert [[glyph.tolist() for glyph in group] for group in loaded] == [
+        [glyph.tolist() for glyph in group] for group in groups
+    ]
+    assert [path.name for path in tmp_path.iterdir()] == ["key.npz"]
+
+
+def test_preload_from_the_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv(SHAPE_CACHE_ENV, str(tmp_path))
+    stored = {"=": _square(1), "+": _triangle()}
+    for pattern, glyph in stored.items():
+        _store_glyph_points(_shape_cache_key("MathTex", [pattern], _search_template(), "align*"), [[glyph]])
+    library = PatternLibrary()
+
+    # Nothing to compile: the entries come straight from the disk cache
+    library.preload(list(stored))
+
+    assert library.cache_info() == (0, 2, library.maxsize, 2)
+    for pattern, glyph in stored.items():
+        assert library.get(pattern).glyphs[0].tolist() == glyph.tolist()
+    assert library.cache_info().hits == 2
+
+
+def test_automaton_finds_every_pattern_like_kmp():
+    patterns = [(1, 2), (1,), (1, 2, 3), (2, 1, 2), (4,), ()]
+    automaton = smart_tex._GlyphAutomaton(patterns)
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        sequence = rng.integers(1, 4, size=rng.integers(0, 20)).tolist()
+        found = {number: [] for number in range(len(patterns))}
+        for start, number in automaton.search(sequence):
+            found[number].append(start)
+        for number, pattern in enumerate(patterns):
+            assert sorted(found[number]) == _kmp_search(sequence, list(pattern))
+
+
+def test_automaton_reports_prefix_patterns():
+    automaton = smart_tex._GlyphAutomaton([(1,), (1, 2), (1, 2, 1)])
+    assert sorted(automaton.search([1, 2, 1, 2, 1])) == [
+        (0, 0), (0, 1), (0, 2), (2, 0), (2, 1), (2, 2), (4, 0),
+    ]
+
+
+def _glyph(points):
+    glyph = VMobject()
+    glyph.set_points(points)
+    return glyph
+
+
+def _text(*shapes):
+    """An expression-like mobject whose glyphs are shapes, two units apart."""
+    return VGroup(VGroup(*[_glyph(shape(2.0 * position)) for position, shape in enumerate(shapes)]))
+
+
+def _corner(x=0.0):
+    shape = _square(1, x)
+    shape[2, 0] += 0.5
+    return shape
+
+
+def test_find_many_equals_find_per_pattern():
+    index = ExpressionShapeIndex(_text(_square_at, _triangle, _square_at, _triangle, _square_at, _corner))
+    shapes_by_key = {
+        "square triangle": [_text(_square_at, _triangle)],
+        "square": [_text(_square_at)],
+        "square triangle square": [_text(_square_at, _triangle, _square_at)],
+        "corner or triangle": [_text(_corner), _text(_triangle)],
+        "triangle corner": [_text(_triangle, _corner)],
+        "missing": [_text(_triangle, _triangle)],
+        "empty": [VGroup(VGroup())],
+        "no variants": [],
+    }
+
+    found = index.find_many(shapes_by_key)
+
+    assert list(found) == list(shapes_by_key)
+    for key, shapes in shapes_by_key.items():
+        assert found[key] == [match for shape in shapes for match in index.find(shape)]
+    assert found["square"] == [slice(0, 1), slice(2, 3), slice(4, 5)]
+    assert found["square triangle square"] == [slice(0, 3), slice(2, 5)]
+    assert found["corner or triangle"] == [slice(5, 6), slice(1, 2), slice(3, 4)]
+    assert found["missing"] == []
+    assert found["empty"] == []
+    assert found["no variants"] == []
+
+
+def test_find_confirms_layout_of_multi_glyph_windows():
+    index = ExpressionShapeIndex(_text(_square_at, _triangle))
+    # Same glyphs, the triangle much further away
+    spread = VGroup(VGroup(_glyph(_square(1)), _glyph(_triangle(6.0))))
+    assert index.find(_text(_square_at, _triangle)) == [slice(0, 2)]
+    assert index.find(spread) == []
+
+
+def _curves(corners):
+    """Closed outline of straight cubic Bézier curves through corners."""
+    points = []
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        a, b = np.array([*a, 0.0]), np.array([*b, 0.0])
+        points += [a, a + (b - a) / 3, a + 2 * (b - a) / 3, b]
+    return np.array(points)
+
+
+def _box(width, height, x, y):
+    return _curves([(x - width / 2, y - height / 2), (x + width / 2, y - height / 2),
+                    (x + width / 2, y + height / 2), (x - width / 2, y + height / 2)])
+
+
+def _dot(radius, x, y):
+    return _curves([(x + radius * np.cos(a), y + radius * np.sin(a)) for a in np.linspace(0, 2 * np.pi, 8, endpoint=False)])
+
+
+def _i(scale=1.0, stem=0.1, dot_x=0.0, dot_first=False):
+    """An "i" made of a stem and a dot, as two subpaths, scaled around its stem."""
+    def shape(x=0.0):
+        parts = [_box(stem, 0.6, 0, 0), _dot(0.07, dot_x, 0.45)]
+        if dot_first:
+            parts.reverse()
+        return np.concatenate(parts) * scale + [x, 0, 0]
+
+    return shape
+
+
+def _equals(x=0.0, bottom_first=False):
+    bars = [_box(0.5, 0.05, x, 0.1), _box(0.5, 0.05, x, -0.1)]
+    return np.concatenate(bars[::-1] if bottom_first else bars)
+
+
+def test_outline_matches_a_pattern_rendered_at_another_size():
+    text = _text(_equals, _i(), _equals)
+    # Smaller, with a slightly wider stem like another TeX size of the font
+    small = _text(_i(scale=0.7, stem=0.12))
+
+    assert search_shape_in_text(text, small) == []
+    assert search_shape_in_text(text, small, match="outline") == [slice(1, 2)]
+
+
+def test_outline_rejects_a_lookalike_at_another_size():
+    text = _text(_equals, _i(scale=1.5, dot_x=0.25))
+
+    assert outline_distances(text, _text(_i()))[1] > smart_tex.OUTLINE_TOLERANCE
+    assert search_shape_in_text(text, _text(_i()), match="outline") == []
+
+
+def test_outline_does_not_depend_on_subpath_order():
+    text = _text(_i(), _equals)
+
+    distances = outline_distances(text, _text(_i(scale=2.0, dot_first=True)))
+    assert distances[0] == pytest.approx(0, abs=1e-9)
+    assert outline_distances(text, _text(_equals))[1] == pytest.approx(
+        outline_distances(text, _text(lambda x: _equals(x, bottom_first=True)))[1], abs=1e-9
+    )
+
+
+def test_outline_tolerance_on_multi_subpath_glyphs():
+    text = _text(_i(), _equals)
+    pattern = _text(_i(stem=0.12, dot_first=True))
+    distance = outline_distances(text, pattern)[0]
+    assert 0 < distance
+
+    index = ExpressionShapeIndex(text)
+    assert index.find(pattern, match="outline", tolerance=distance * 1.01) == [slice(0, 1)]
+    assert index.find(pattern, match="outline", tolerance=distance * 0.99) == []
+
+
+def test_threshold_is_deprecated():
+    text = _text(_square_at, _triangle)
+
+    with pytest.warns(DeprecationWarning, match="threshold"):
+        assert search_shape_in_text(text, _text(_triangle), threshold=5) == [slice(1, 2)]
+    with pytest.warns(DeprecationWarning, match="threshold"):
+        ExpressionShapeIndex(text, threshold=5)
+
+
+class _Expression(VGroup):
+    """Looks like a MathTex to the index cache: a tex string and one group of glyphs."""
+
+    def __init__(self, tex_string, *shapes):
+        super().__init__(VGroup(*[_glyph(shape(2.0 * position)) for position, shape in enumerate(shapes)]))
+        self.tex_string = tex_string
+
+
+def test_index_is_rebuilt_when_the_tex_string_changes(monkeypatch):
+    indexed = []
+
+    def search_glyphs(text):
+        indexed.append(text.tex_string)
+        return smart_tex._glyph_points(text)
+
+    monkeypatch.setattr(smart_tex, "_search_glyphs", search_glyphs)
+    expression = _Expression("x", _square_at, _triangle)
+
+    shape_index = ExpressionShapeIndex.of(expression)
+    assert ExpressionShapeIndex.of(expression) is shape_index
+    assert indexed == ["x"]
+
+    expression.tex_string = "y"
+    rebuilt = ExpressionShapeIndex.of(expression)
+    assert rebuilt is not shape_index
+    assert ExpressionShapeIndex.of(expression) is rebuilt
+    assert indexed == ["x", "y"]
+
+
+def test_index_is_dropped_with_its_expression(monkeypatch):
+    monkeypatch.setattr(smart_tex, "_search_glyphs", smart_tex._glyph_points)
+    expression = _Expression("x", _square_at)
+    ExpressionShapeIndex.of(expression)
+    assert expression in smart_tex._INDEX_CACHE
+    entries = len(smart_tex._INDEX_CACHE)
+
+    del expression
+    gc.collect()
+
+    assert len(smart_tex._INDEX_CACHE) == entries - 1
@@ -0,0 +1,129 @@
+"""Tests for the source markers of SourceMappedMathTex."""
+
+import re
+
+from manim import VGroup, VMobject
+
+from src.components.common.source_map import (
+    MARKER_PREFIX,
+    SourceMappedMathTex,
+    inject_source_markers,
+    read_glyph_ranges,
+)
+
+_MARKER = re.compile(r"\\special\{dvisvgm:raw <g id='" + MARKER_PREFIX + r"\d+'>\}|\\special\{dvisvgm:raw </g>\}")
+
+
+def _marked(expression):
+    return [text for text, marker in inject_source_markers(expression)[1] if marker is not None]
+
+
+def test_markers_do_not_change_the_source():
+    for expression in [r"\sqrt{\frac{a}{b^{2}}}", r"50\% + \{a\}", r"\text{if } x \le 3", r"x^2 + 10x"]:
+        marked, _ = inject_source_markers(expression)
+        assert _MARKER.sub("", marked) == expression
+
+
+def test_markers_in_nested_braces():
+    assert _marked(r"\frac{12}{x+3}") == ["12", "x", "+", "3"]
+    # b carries a superscript; 2 sits alone in its braces
+    assert _marked(r"\sqrt{\frac{a}{b^{2}}}") == ["a", "2"]
+    marker_numbers = [marker for _, marker in inject_source_markers(r"\frac{12}{x+3}")[1] if marker is not None]
+    assert marker_numbers == [0, 1, 2, 3]
+
+
+def test_markers_on_escaped_characters():
+    assert _marked(r"50\% + \{a\}") == ["50", r"\%", "+", r"\{", "a", r"\}"]
+
+
+def test_text_and_scripts_are_not_marked():
+    assert _marked(r"\text{if } x \le 3") == ["x", r"\le", "3"]
+    assert _marked(r"a_{n} = 2^n") == ["n", "="]
+
+
+def _write_svg(path, glyphs):
+    """Writes an SVG in dvisvgm's layout: one <use> per glyph, marked tokens grouped.
+
+    glyphs lists glyph counts, ints for unmarked glyphs and (marker, count)
+    pairs for marker groups.
+    """
+    body = []
+    for item in glyphs:
+        if isinstance(item, tuple):
+            marker, count = item
+            body.append(f"<g id='{MARKER_PREFIX}{marker}'>" + "<use xlink:href='#g0'/>" * count + "</g>")
+        else:
+            body.append("<use xlink:href='#g0'/>" * item)
+    path.write_text(
+        "<svg xmlns='http://www.w3.org/2000/svg' xmlns:xlink='http://www.w3.org/1999/xlink'>"
+        "<defs><path id='g0' d='M0 0L1 1'/><path id='g1' d='M0 0L1 0'/></defs>"
+        "<g id='page1'>" + "".join(body) + "</g></svg>"
+    )
+    return path
+
+
+def test_read_glyph_ranges(tmp_path):
+    svg = _write_svg(tmp_path / "expression.svg", [2, (0, 1), (1, 2), 1, (2, 1)])
+    assert read_glyph_ranges(svg) == ({0: (2, 3), 1: (3, 5), 2: (6, 7)}, 7)
+
+
+def test_read_glyph_ranges_of_nested_groups(tmp_path):
+    svg = tmp_path / "nested.svg"
+    svg.write_text(
+        "<svg xmlns='http://www.w3.org/2000/svg'>"
+        f"<g id='{MARKER_PREFIX}0'><path d='M0 0'/><g id='{MARKER_PREFIX}1'><path d='M0 0'/></g></g>"
+        f"<g id='{MARKER_PREFIX}x'><rect/></g>"
+        "</svg>"
+    )
+    assert read_glyph_ranges(svg) == ({0: (0, 2), 1: (1, 2)}, 3)
+
+
+def test_read_glyph_ranges_of_unreadable_file(tmp_path):
+    assert read_glyph_ranges(tmp_path / "missing.svg") is None
+    broken = tmp_path / "broken.svg"
+    broken.write_text("<svg><g></svg>")
+    assert read_glyph_ranges(broken) is None
+
+
+def _mapped_tex(tmp_path, expression, glyphs, group_sizes):
+    """A SourceMappedMathTex read back from a hand-written SVG, without LaTeX."""
+    tex = SourceMappedMathTex.__new__(SourceMappedMathTex)
+    tex.submobjects = [VGroup(*[VMobject() for _ in range(size)]) for size in group_sizes]
+    tex.file_name = str(_write_svg(tmp_path / "expression.svg", glyphs))
+    _, tex._source_tokens = inject_source_markers(expression)
+    tex._source_map = tex._read_source_map()
+    return tex
+
+
+# x^2 + 10x + 25 = 12: glyphs x 2 + 1 0 x + 2 5 = 1 2, everything after x^2 marked
+EXPRESSION = "x^2 + 10x + 25 = 12"
+GLYPHS = [2, (0, 1), (1, 2), (2, 1), (3, 1), (4, 2), (5, 1), (6, 2)]
+
+
+def test_find_source(tmp_path):
+    tex = _mapped_tex(tmp_path, EXPRESSION, GLYPHS, [12])
+    assert tex.has_source_map
+    assert tex.find_source("25") == [slice(7, 9)]
+    assert tex.find_source("+") == [slice(2, 3), slice(6, 7)]
+    assert tex.find_source("10x") == [slice(3, 6)]
+    assert tex.find_source("+ 25 =") == [slice(6, 10)]
+
+
+def test_find_source_falls_back(tmp_path):
+    tex = _mapped_tex(tmp_path, EXPRESSION, GLYPHS, [12])
+    # One x is in the unmarked x^2
+    assert tex.find_source("x") is None
+    assert tex.find_source("7") is None
+    assert tex.find_source(" ") is None
+
+
+def test_find_source_relative_to_submobject(tmp_path):
+    tex = _mapped_tex(tmp_path, EXPRESSION, GLYPHS, [5, 7])
+    assert tex.find_source("25", index=1) == [slice(2, 4)]
+    assert tex.find_source("25", index=0) is None
+
+
+def test_glyph_count_mismatch_drops_the_map(tmp_path):
+    tex = _mapped_tex(tmp_path, EXPRESSION, GLYPHS, [11])
+    assert not tex.has_source_map
+    assert tex.find_source("25") is None
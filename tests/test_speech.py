@@ -0,0 +1,104 @@
+"""Tests for the clip cache and the local stand-in speech service."""
+
+import threading
+from pathlib import Path
+
+import pytest
+from manim_voiceover.helper import remove_bookmarks
+from manim_voiceover.tracker import AUDIO_OFFSET_RESOLUTION, TimeInterpolator
+
+from src.components.common.speech import CachedSpeechService, LocalSpeechService
+
+
+class CountingSpeechService(LocalSpeechService):
+    """LocalSpeechService counting the clips it synthesizes."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = 0
+        self._calls_lock = threading.Lock()
+
+    def generate_from_text(self, text, cache_dir=None, path=None, **kwargs):
+        with self._calls_lock:
+            self.calls += 1
+        return super().generate_from_text(text, cache_dir=cache_dir, path=path, **kwargs)
+
+
+@pytest.fixture
+def local(tmp_path):
+    return CountingSpeechService(cache_dir=tmp_path / "local")
+
+
+@pytest.fixture
+def cached(local, tmp_path):
+    return CachedSpeechService(local, max_workers=4, cache_dir=tmp_path / "voiceovers")
+
+
+TEXTS = [f"Step {i}: we subtract {i} from both sides." for i in range(12)]
+
+
+def test_cache_key_ignores_whitespace(cached):
+    assert cached.cache_key("Divide  both\nsides by two.") == cached.cache_key("Divide both sides by two.")
+
+
+def test_cache_key_follows_settings(tmp_path):
+    def key(**settings):
+        service = CachedSpeechService(LocalSpeechService(**settings), cache_dir=tmp_path)
+        return service.cache_key("Divide both sides by two.")
+
+    assert key(voice="a") == key(voice="a")
+    assert key(voice="a") != key(voice="b")
+    assert key(prosody={"rate": "-15%"}) != key(prosody={"rate": "0%"})
+
+
+def test_cache_key_follows_voiceover_arguments(cached):
+    text = "Divide both sides by two."
+    assert cached.cache_key(text, prosody={"rate": "slow"}) != cached.cache_key(text)
+
+
+def test_concurrent_presynthesize_fills_store_once(cached, local):
+    texts = TEXTS + [f"  {text}  " for text in TEXTS]
+
+    threads = [
+        threading.Thread(target=cached.presynthesize, args=(texts,))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert local.calls == len(TEXTS)
+    assert cached.presynthesize(TEXTS) == 0
+    for text in TEXTS:
+        assert (cached.store_dir / cached.cache_key(text) / "clip.json").exists()
+
+
+def test_generate_from_text_hits_cache(cached, local):
+    cached.presynthesize(TEXTS)
+    local.calls = 0
+
+    entry = cached.generate_from_text(TEXTS[3])
+
+    assert local.calls == 0
+    assert entry["input_text"] == TEXTS[3]
+    assert (Path(cached.cache_dir) / entry["original_audio"]).exists()
+
+
+def test_local_bookmark_offsets(local, tmp_path):
+    text = "one two <bookmark mark='A'/>three four"
+    spoken = remove_bookmarks(text)
+    result = local.generate_from_text(text, cache_dir=str(tmp_path))
+    boundaries = result["word_boundaries"]
+    duration = local.estimate_duration(spoken)
+
+    # Offsets are in manim_voiceover's units, not milliseconds
+    assert boundaries[2]["text"] == "three"
+    assert boundaries[2]["audio_offset"] == int(AUDIO_OFFSET_RESOLUTION * duration * 2 / 4)
+    # A last boundary closes the text and the clip
+    assert boundaries[-1]["text_offset"] == len(spoken)
+    assert boundaries[-1]["audio_offset"] == int(AUDIO_OFFSET_RESOLUTION * duration)
+
+    interpolator = TimeInterpolator(boundaries)
+    assert float(interpolator.interpolate(spoken.index("three"))) == pytest.approx(duration / 2, abs=1e-6)
+    assert float(interpolator.interpolate(len(spoken))) == pytest.approx(duration, abs=1e-6)
@@ -0,0 +1,246 @@
+"""Tests for batched LaTeX compilation, without running LaTeX."""
+
+import subprocess
+import threading
+from pathlib import Path
+
+import pytest
+from manim import TexTemplate, tempconfig
+from manim.mobject.text import tex_mobject
+from manim.utils import tex_file_writing
+
+from src.components.common import tex_batch
+from src.components.common.tex_batch import (
+    MIN_PAGES_PER_RUN,
+    PAGE_ENVIRONMENT,
+    _batch_document,
+    _split,
+    build_batched,
+    is_recording,
+    prerender_tex,
+    record_tex,
+    svg_path,
+)
+
+
+@pytest.fixture
+def tex_dir(tmp_path):
+    with tempconfig({"tex_dir": str(tmp_path / "Tex"), "no_latex_cleanup": False}):
+        (tmp_path / "Tex").mkdir()
+        yield tmp_path / "Tex"
+
+
+@pytest.fixture
+def individually(monkeypatch):
+    """Records the expressions compiled one by one."""
+    compiled = []
+
+    def tex_to_svg_file(expression, environment=None, tex_template=None):
+        compiled.append(expression)
+
+    monkeypatch.setattr(tex_file_writing, "tex_to_svg_file", tex_to_svg_file)
+    return compiled
+
+
+def _fake_latex(monkeypatch, pages):
+    """Replaces LaTeX and dvisvgm: the batch converts to the given page numbers."""
+
+    def compile_tex(tex_file, tex_compiler, output_format):
+        return Path(tex_file).with_suffix(output_format)
+
+    def run(command, check, stdout):
+        prefix = command[command.index("-o") + 1].replace("-%p.svg", "")
+        for page in pages:
+            Path(f"{prefix}-{page}.svg").write_text(f"page {page}")
+
+    monkeypatch.setattr(tex_file_writing, "compile_tex", compile_tex)
+    monkeypatch.setattr(subprocess, "run", run)
+
+
+def _items(tmp_path, count, template=None):
+    template = template or TexTemplate()
+    return [(tmp_path / f"out{k}.svg", (f"x_{k}", "align*", template)) for k in range(count)]
+
+
+def test_split_keeps_small_groups_whole():
+    items = list(range(2 * MIN_PAGES_PER_RUN - 1))
+    assert _split(items, 8) == [items]
+    assert _split(items[:1], 8) == [items[:1]]
+
+
+def test_split_balances_chunks():
+    items = list(range(10 * MIN_PAGES_PER_RUN + 3))
+    chunks = _split(items, 4)
+    assert len(chunks) == 4
+    assert [item for chunk in chunks for item in chunk] == items
+    assert max(map(len, chunks)) - min(map(len, chunks)) <= 1
+
+
+def test_split_keeps_minimum_pages_per_run():
+    items = list(range(3 * MIN_PAGES_PER_RUN + 2))
+    chunks = _split(items, 8)
+    assert len(chunks) == 3
+    assert all(len(chunk) >= MIN_PAGES_PER_RUN for chunk in chunks)
+    assert _split(items, 1) == [items]
+
+
+def test_batch_document_has_a_page_per_job():
+    template = TexTemplate()
+    document = _batch_document([("first^2", None, template), ("second", "align*", template)])
+    assert rf"\documentclass[preview,multi={PAGE_ENVIRONMENT}]{{standalone}}" in document
+    assert document.count(rf"\begin{{{PAGE_ENVIRONMENT}}}") == 2
+    assert document.index("first^2") < document.index(r"\begin{align*}") < document.index("second")
+    assert document.count(r"\begin{document}") == document.count(r"\end{document}") == 1
+
+
+def test_batch_document_needs_standalone():
+    template = TexTemplate(documentclass=r"\documentclass{article}")
+    assert _batch_document([("x", None, template), ("y", None, template)]) is None
+
+
+def test_single_item_is_compiled_individually(tmp_path, tex_dir, individually):
+    tex_batch._compile_group(_items(tmp_path, 1))
+    assert individually == ["x_0"]
+
+
+def test_non_standalone_template_is_compiled_individually(tmp_path, tex_dir, individually):
+    template = TexTemplate(documentclass=r"\documentclass{article}")
+    tex_batch._compile_group(_items(tmp_path, 3, template))
+    assert individually == ["x_0", "x_1", "x_2"]
+
+
+def test_pages_go_to_their_output_files(tmp_path, tex_dir, individually, monkeypatch):
+    # Past page 9 the file names no longer sort like the page numbers
+    items = _items(tmp_path, 12)
+    _fake_latex(monkeypatch, range(1, 13))
+
+    tex_batch._compile_group(items)
+
+    assert individually == []
+    for page, (svg_file, _) in enumerate(items, start=1):
+        assert svg_file.read_text() == f"page {page}"
+    # Compiled away from manim's tex dir, and cleaned up
+    assert list(tex_dir.iterdir()) == []
+    assert list(tex_batch._batch_dir().iterdir()) == []
+
+
+def test_unexpected_pages_fall_back(tmp_path, tex_dir, individually, monkeypatch):
+    items = _items(tmp_path, 3)
+    _fake_latex(monkeypatch, [1, 2, 4])
+
+    tex_batch._compile_group(items)
+
+    assert individually == ["x_0", "x_1", "x_2"]
+    assert not any(svg_file.exists() for svg_file, _ in items)
+
+
+def test_missing_page_file_falls_back(tmp_path, tex_dir, individually, monkeypatch):
+    items = _items(tmp_path, 3)
+    _fake_latex(monkeypatch, [1, 2, 3])
+    convert_pages = tex_batch._convert_pages
+
+    def lose_page_two(output_file, output_format):
+        pages = convert_pages(output_file, output_format)
+        pages[2].unlink()
+        return pages
+
+    monkeypatch.setattr(tex_batch, "_convert_pages", lose_page_two)
+
+    tex_batch._compile_group(items)
+
+    assert items[0][0].read_text() == "page 1"
+    assert individually == ["x_1", "x_2"]
+
+
+@pytest.fixture
+def manim_compiles(monkeypatch):
+    """Replaces manim's own compilation; records the expressions it is asked for."""
+    compiled = []
+
+    def tex_to_svg_file(expression, environment=None, tex_template=None):
+        compiled.append(expression)
+        return svg_path(expression, environment, tex_template)
+
+    monkeypatch.setattr(tex_batch, "_manim_tex_to_svg_file", tex_to_svg_file)
+    return compiled
+
+
+def test_svg_path_writes_nothing(tex_dir):
+    template = TexTemplate()
+    path = svg_path("x^2", "align*", template)
+    assert list(tex_dir.iterdir()) == []
+    assert path == Path(tex_file_writing.generate_tex_file("x^2", "align*", template)).with_suffix(".svg")
+
+
+def test_recording_ignores_other_threads(tex_dir, manim_compiles):
+    with record_tex() as jobs:
+        tex_mobject.tex_to_svg_file("recorded")
+        thread = threading.Thread(target=tex_mobject.tex_to_svg_file, args=("other thread",))
+        thread.start()
+        thread.join()
+
+    assert [expression for expression, _, _ in jobs] == ["recorded"]
+    assert manim_compiles == ["other thread"]
+    assert not is_recording()
+
+
+def test_nested_recording_keeps_recording(tex_dir, manim_compiles):
+    with record_tex() as outer:
+        with record_tex() as inner:
+            assert inner is outer
+        tex_mobject.tex_to_svg_file("after inner")
+        assert is_recording()
+    tex_mobject.tex_to_svg_file("after outer")
+
+    assert [expression for expression, _, _ in outer] == ["after inner"]
+    assert manim_compiles == ["after outer"]
+
+
+def test_manim_compiles_wait_for_the_tex_dir(tex_dir, manim_compiles):
+    # e.g. a MathTex built on the main thread while a worker compiles ahead
+    with tex_batch._TEX_DIR_LOCK:
+        thread = threading.Thread(target=tex_mobject.tex_to_svg_file, args=("waiting",))
+        thread.start()
+        thread.join(timeout=0.2)
+        assert thread.is_alive() and manim_compiles == []
+    thread.join()
+
+    assert manim_compiles == ["waiting"]
+
+
+def test_build_batched_runs_the_factory_twice_on_a_cold_cache(tex_dir, monkeypatch):
+    def compile_tex_batch(jobs, max_workers=1):
+        for expression, environment, tex_template in jobs:
+            svg_path(expression, environment, tex_template).write_text("svg")
+
+    monkeypatch.setattr(tex_batch, "compile_tex_batch", compile_tex_batch)
+    calls = []
+
+    def factory():
+        calls.append(tex_mobject.tex_to_svg_file("x", "align*"))
+        return calls[-1]
+
+    assert build_batched(factory) == svg_path("x", "align*")
+    assert [path.name for path in calls] == ["nammi_placeholder.svg", svg_path("x", "align*").name]
+
+    # Warm cache: a single run
+    calls.clear()
+    build_batched(factory)
+    assert len(calls) == 1
+
+
+def test_prerender_counts_each_job_once(tex_dir, monkeypatch):
+    compiled = []
+    monkeypatch.setattr(tex_batch, "compile_tex_batch", lambda jobs, max_workers=None: compiled.append(jobs))
+
+    def factory():
+        # e.g. a MathTex compiling its substrings as well
+        for expression in ("x", "y", "x", "y", "x"):
+            tex_mobject.tex_to_svg_file(expression, "align*")
+
+    assert prerender_tex(factory) == 2
+    assert [[expression for expression, _, _ in jobs] for jobs in compiled] == [["x", "y"]]
+
+    with record_tex():
+        tex_mobject.tex_to_svg_file("x", "align*")
+        assert prerender_tex(factory) == 2